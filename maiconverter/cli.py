@@ -6,12 +6,13 @@ import sys
 
 import maiconverter
 from maiconverter.maicrypt import finale_file_encrypt, finale_file_decrypt
-from maiconverter.maima2 import MaiMa2
+from maiconverter.maima2 import MaiMa2, diff_ma2
 from maiconverter.maisxt import MaiSxt
 from maiconverter.simai import parse_file, SimaiChart
 from maiconverter.converter import (
     ma2_to_sdt,
     ma2_to_simai,
+    stream_ma2_to_simai,
     sdt_to_ma2,
     sdt_to_simai,
     simai_to_ma2,
@@ -83,7 +84,8 @@ def chart_convert(args, output):
         if args.bpm is None:
             raise RuntimeError("BPM required for SDT file")
 
-        file_regex = r"\.s.t"
+        # Encrypted charts are read directly when a key is given
+        file_regex = r"\.s.t" if args.key is None else r"\.s.[tb]"
     else:
         file_regex = r"\.txt"
 
@@ -116,7 +118,63 @@ def chart_convert(args, output):
             raise
 
 
+def chart_diff(args):
+    if args.compare is None:
+        raise RuntimeError("Chart to compare with not supplied")
+
+    if os.path.isdir(args.path):
+        if not os.path.isdir(args.compare):
+            raise NotADirectoryError(args.compare)
+
+        old_files = {
+            file for file in os.listdir(args.path) if re.search(r"\.ma2", file)
+        }
+        new_files = {
+            file for file in os.listdir(args.compare) if re.search(r"\.ma2", file)
+        }
+        for file in sorted(old_files - new_files):
+            print(f"Only in {args.path}: {file}")
+        for file in sorted(new_files - old_files):
+            print(f"Only in {args.compare}: {file}")
+
+        pairs = [
+            (os.path.join(args.path, file), os.path.join(args.compare, file))
+            for file in sorted(old_files & new_files)
+        ]
+    else:
+        pairs = [(args.path, args.compare)]
+
+    for old_file, new_file in pairs:
+        try:
+            old = MaiMa2.open(old_file, encoding=args.encoding)
+            new = MaiMa2.open(new_file, encoding=args.encoding)
+            result = diff_ma2(old, new)
+        except:
+            print(f"Error occurred comparing {old_file} and {new_file}.")
+            raise
+
+        print(f"{old_file} -> {new_file}: {result.summary()}")
+        if not result.is_empty():
+            print(result.to_str(resolution=args.resolution))
+
+
 def handle_ma2(file, name, output_path, args):
+    if args.command == "ma2tosimai" and len(args.delay) == 0:
+        # Convert straight from the ma2 lines to simai text. Charts that
+        # can't be streamed are converted through the chart objects below.
+        try:
+            with open(file, "r", encoding=args.encoding) as in_f, open(
+                os.path.join(output_path, name + ".txt"),
+                "w+",
+                newline="\r\n",
+                encoding="utf-8",
+            ) as out:
+                out.writelines(stream_ma2_to_simai(in_f, max_den=args.max_divisor))
+
+            return
+        except ValueError as e:
+            print(f"Warning: {e}")
+
     ma2 = MaiMa2.open(file, encoding=args.encoding)
     if len(args.delay) != 0:
         ma2.offset(args.delay)
@@ -134,11 +192,17 @@ def handle_ma2(file, name, output_path, args):
         if isinstance(output, SimaiChart):
             out.write(output.export(max_den=args.max_divisor))
         else:
-            out.write(output.export())
+            output.export_to(out)
 
 
 def handle_sxt(file, name, output_path, args):
-    sxt = MaiSxt.open(file, encoding=args.encoding, bpm=args.bpm)
+    if re.search(r"\.s.b", file) is not None:
+        if args.key is None:
+            raise RuntimeError("Key not supplied")
+
+        sxt = MaiSxt.from_encrypted(file, args.bpm, args.key, encoding=args.encoding)
+    else:
+        sxt = MaiSxt.open(file, encoding=args.encoding, bpm=args.bpm)
     if len(args.delay) != 0:
         sxt.offset(args.delay)
 
@@ -155,7 +219,7 @@ def handle_sxt(file, name, output_path, args):
         if isinstance(output, SimaiChart):
             out.write(output.export(max_den=args.max_divisor))
         else:
-            out.write(output.export(resolution=args.resolution))
+            output.export_to(out, resolution=args.resolution)
 
 
 def handle_simai_chart(file, name, output_path, args):
@@ -177,9 +241,9 @@ def handle_simai_chart(file, name, output_path, args):
         os.path.join(output_path, name + ext), "w+", newline="\r\n", encoding="utf-8"
     ) as out:
         if isinstance(converted, MaiSxt):
-            out.write(converted.export())
+            converted.export_to(out)
         else:
-            out.write(converted.export(resolution=args.resolution))
+            converted.export_to(out, resolution=args.resolution)
 
 
 def handle_simai_file(file, output_path, args):
@@ -205,9 +269,9 @@ def handle_simai_file(file, output_path, args):
                 encoding="utf-8",
             ) as out:
                 if isinstance(converted, MaiSxt):
-                    out.write(converted.export())
+                    converted.export_to(out)
                 else:
-                    out.write(converted.export(resolution=args.resolution))
+                    converted.export_to(out, resolution=args.resolution)
         except:
             print(f"Error processing {i + 1} chart of file.")
             raise
@@ -252,6 +316,7 @@ COMMANDS = [
     "simaifiletosdt",
     "simaitoma2",
     "simaitosdt",
+    "ma2diff",
 ]
 
 
@@ -268,11 +333,18 @@ def parse_arg():
         help="Specify whether to encrypt or decrypt",
     )
     parser.add_argument("path", metavar="input", type=file_path, help="")
+    parser.add_argument(
+        "-c",
+        "--compare",
+        metavar="Compare path",
+        type=file_path,
+        help="ma2 file or directory to compare the input with for ma2diff",
+    )
     parser.add_argument(
         "-k",
         "--key",
         type=str,
-        help="16 byte AES key for encrypt/decrypt (Prepend hex value with 0x)",
+        help="16 byte AES key for encrypt/decrypt, and for reading encrypted charts in sdttoma2/sdttosimai (Prepend hex value with 0x)",
     )
     parser.add_argument(
         "--database",
@@ -379,6 +451,10 @@ def main():
     args = parse_arg()
     print(f"MaiConverter {maiconverter.__version__} by donmai")
 
+    if args.command == "ma2diff":
+        chart_diff(args)
+        return
+
     if args.output is None:
         if os.path.isdir(args.path):
             output_dir = os.path.join(args.path, "output")
@@ -1,6 +1,7 @@
 from .maima2tomaisxt import ma2_to_sdt
-from .maima2tosimai import ma2_to_simai
+from .maima2tosimai import ma2_to_simai, stream_ma2_to_simai
 from .maisxttomaima2 import sdt_to_ma2
 from .maisxttosimai import sdt_to_simai
 from .simaitomaima2 import simai_to_ma2
 from .simaitomaisxt import simai_to_sdt
+from .notetable import NoteRow, NoteTable
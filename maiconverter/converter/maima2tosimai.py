@@ -1,32 +1,25 @@
-from typing import Sequence, List
+import heapq
+import itertools
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
 
 from ..simai import (
     SimaiChart,
-    pattern_from_int,
+    export_fragments,
     HoldNote as SimaiHoldNote,
     TouchHoldNote as SimaiTouchHoldNote,
     SlideNote as SimaiSlideNote,
 )
-from ..maima2 import (
-    MaiMa2,
-    TapNote,
-    HoldNote,
-    SlideNote,
-    TouchTapNote,
-    TouchHoldNote,
-    BPM,
-)
-from ..event import MaiNote, NoteType
+from ..maima2 import MaiMa2, BPM
+from ..event import MaiNote, SimaiNote
+from .notetable import NoteTable
+
+# Number of ma2 notes converted at a time by stream_ma2_to_simai
+STREAM_CHUNK_SIZE = 256
 
 
 def ma2_to_simai(ma2: MaiMa2) -> SimaiChart:
     simai_chart = SimaiChart()
-
-    for bpm in ma2.bpms:
-        measure = 1.0 if bpm.measure <= 1.0 else bpm.measure
-
-        simai_chart.set_bpm(measure, bpm.bpm)
-
+    convert_bpms(simai_chart, ma2.bpms)
     convert_notes(simai_chart, ma2.notes)
 
     if len(simai_chart.bpms) != 1:
@@ -35,116 +28,175 @@ def ma2_to_simai(ma2: MaiMa2) -> SimaiChart:
     return simai_chart
 
 
+def stream_ma2_to_simai(
+    lines: Iterable[str], max_den: int = 1000
+) -> Iterator[str]:
+    """Converts the lines of a ma2 file to simai text without building
+    either chart.
+
+    Notes are read and converted a chunk at a time, and only the notes
+    of measures that aren't written yet are held. Header lines, including
+    BPM changes, come before the notes in a ma2 file, and notes are in
+    time order.
+
+    Args:
+        lines: Lines of a ma2 file, e.g. an open file object.
+        max_den: The maximum denominator when making a fraction.
+
+    Returns:
+        An iterator over parts of the simai chart's text. Joined, they are
+        the same as `ma2_to_simai(ma2).export(max_den)`.
+
+    Raises:
+        ValueError: When the chart's version is not supported, when a BPM
+            change comes after notes were converted, or when notes are
+            not in time order.
+
+    Examples:
+        Convert "example.ma2" to a simai chart named "example.txt".
+
+        >>> with open("example.ma2") as in_f, open("example.txt", "w") as out:
+        ...     out.writelines(stream_ma2_to_simai(in_f))
+    """
+    ma2 = MaiMa2()
+    notes = ma2.iter_notes(lines)
+    chunk = list(itertools.islice(notes, STREAM_CHUNK_SIZE))
+
+    # A chart that only holds the BPMs, for the tempo of converted notes
+    simai_chart = SimaiChart()
+    convert_bpms(simai_chart, ma2.bpms)
+    bpm_count = len(ma2.bpms)
+    fix = len(simai_chart.bpms) != 1
+
+    def points() -> Iterator[Tuple[float, List[SimaiNote], List[BPM]]]:
+        notes_at: Dict[float, List[SimaiNote]] = {}
+        bpms_at: Dict[float, List[BPM]] = {}
+        for bpm in simai_chart.bpms:
+            bpms_at.setdefault(bpm.measure, []).append(bpm)
+
+        measures = set(bpms_at)
+        measures |= {int(measure) for measure in measures}
+        measures.add(1.0)
+        # Measures not written yet
+        heap = list(measures)
+        heapq.heapify(heap)
+
+        def add_measure(measure: float) -> None:
+            if measure not in measures:
+                measures.add(measure)
+                heapq.heappush(heap, measure)
+
+        # Measure of the latest note. Measures before it are complete.
+        latest = None
+        current_chunk = chunk
+        while len(current_chunk) != 0:
+            converted = SimaiChart()
+            convert_notes(converted, current_chunk)
+            for note in converted.notes:
+                if fix:
+                    fix_note_durations(simai_chart, note)
+
+                measure = note.measure
+                if latest is None or measure > latest:
+                    if latest is None or int(measure) > latest:
+                        add_measure(int(measure))
+                    add_measure(measure)
+                    while heap[0] < measure:
+                        done = heapq.heappop(heap)
+                        measures.discard(done)
+                        yield done, notes_at.pop(done, []), bpms_at.pop(done, [])
+
+                    latest = measure
+                elif measure < latest:
+                    raise ValueError(
+                        f"Ma2 notes are not in time order at measure {measure}"
+                    )
+
+                notes_at.setdefault(measure, []).append(note)
+
+            current_chunk = list(itertools.islice(notes, STREAM_CHUNK_SIZE))
+            if len(ma2.bpms) != bpm_count:
+                raise ValueError("BPM change after notes can't be streamed")
+
+        while len(heap) != 0:
+            done = heapq.heappop(heap)
+            yield done, notes_at.pop(done, []), bpms_at.pop(done, [])
+
+    return export_fragments(points(), simai_chart.get_bpm, max_den=max_den)
+
+
+def convert_bpms(simai_chart: SimaiChart, ma2_bpms: Sequence[BPM]) -> None:
+    for bpm in ma2_bpms:
+        measure = 1.0 if bpm.measure <= 1.0 else bpm.measure
+
+        simai_chart.set_bpm(measure, bpm.bpm)
+
+
 def convert_notes(simai_chart: SimaiChart, ma2_notes: Sequence[MaiNote]) -> None:
-    for ma2_note in ma2_notes:
-        note_type = ma2_note.note_type
-        if isinstance(ma2_note, TapNote):
-            is_break = note_type in [NoteType.break_tap, NoteType.break_star, NoteType.ex_break_tap,
-                                     NoteType.ex_break_star]
-            is_ex = note_type in [NoteType.ex_tap, NoteType.ex_star, NoteType.ex_break_tap, NoteType.ex_break_star]
-            is_star = note_type in [
-                NoteType.star,
-                NoteType.break_star,
-                NoteType.ex_star,
-            ]
-            simai_chart.add_tap(
-                measure=ma2_note.measure,
-                position=ma2_note.position,
-                is_break=is_break,
-                is_star=is_star,
-                is_ex=is_ex,
-            )
-        elif isinstance(ma2_note, HoldNote):
-            is_break = note_type in [NoteType.break_hold, NoteType.ex_break_hold]
-            is_ex = note_type in [NoteType.ex_hold, NoteType.ex_break_hold]
-            simai_chart.add_hold(
-                measure=ma2_note.measure,
-                position=ma2_note.position,
-                duration=ma2_note.duration,
-                is_ex=is_ex,
-                is_break=is_break
-            )
-        elif isinstance(ma2_note, SlideNote):
-            # Ma2 slide durations does not include the delay
-            # like in simai
-            pattern = pattern_from_int(
-                ma2_note.pattern, ma2_note.position, ma2_note.end_position
-            )
-            simai_chart.add_slide(
-                measure=ma2_note.measure,
-                start_position=ma2_note.position,
-                end_position=ma2_note.end_position,
-                duration=ma2_note.duration,
-                pattern=pattern[0],
-                delay=ma2_note.delay,
-                reflect_position=pattern[1],
-            )
-        elif isinstance(ma2_note, TouchTapNote):
-            simai_chart.add_touch_tap(
-                measure=ma2_note.measure,
-                position=ma2_note.position,
-                region=ma2_note.region,
-                is_firework=ma2_note.is_firework,
-            )
-        elif isinstance(ma2_note, TouchHoldNote):
-            simai_chart.add_touch_hold(
-                measure=ma2_note.measure,
-                position=ma2_note.position,
-                region=ma2_note.region,
-                duration=ma2_note.duration,
-                is_firework=ma2_note.is_firework,
-            )
-        else:
-            print("Warning: Unknown note type {}".format(note_type))
+    # Ma2 slide durations does not include the delay
+    # like in simai
+    NoteTable.from_ma2(ma2_notes).to_simai(simai_chart)
 
 
 def fix_durations(simai: SimaiChart):
     """Simai note durations (slide delay, slide duration, hold note duration)
     disregards bpm changes midway, unlike ma2. So we'll have to compensate for those.
     """
+    for note in simai.notes:
+        fix_note_durations(simai, note)
+
 
-    def bpm_changes(start: float, duration: float) -> List[BPM]:
-        result: List[BPM] = []
-        for bpm in simai.bpms:
-            if start < bpm.measure < start + duration:
-                result.append(bpm)
-
-        return result
-
-    def compensate_duration(
-            start: float, duration: float, base_bpm: float, changes: List[BPM]
-    ) -> float:
-        new_duration = 0
-
-        note_start = start
-        for bpm in changes:
-            new_duration += (
-                    base_bpm
-                    * (bpm.measure - note_start)
-                    / simai.get_bpm(bpm.measure - 0.0001)
+def fix_note_durations(simai: SimaiChart, note: SimaiNote) -> None:
+    """Compensates the durations of a single note for the bpm changes of
+    the chart. See `fix_durations`.
+    """
+    if isinstance(note, (SimaiHoldNote, SimaiTouchHoldNote, SimaiSlideNote)):
+        bpms = _bpm_changes(simai, note.measure, note.duration)
+        if len(bpms) != 0:
+            note.duration = _compensate_duration(
+                simai, note.measure, note.duration, simai.get_bpm(note.measure), bpms
+            )
+    if isinstance(note, SimaiSlideNote):
+        bpms = _bpm_changes(simai, note.measure, note.delay)
+        if len(bpms) != 0:
+            note.delay = _compensate_duration(
+                simai, note.measure, note.delay, simai.get_bpm(note.measure), bpms
             )
 
-            note_start = bpm.measure
 
-        if note_start < start + duration:
-            new_duration += (
-                    base_bpm
-                    * (start + duration - note_start)
-                    / simai.get_bpm(note_start + 0.0001)
-            )
+def _bpm_changes(simai: SimaiChart, start: float, duration: float) -> List[BPM]:
+    result: List[BPM] = []
+    for bpm in simai.bpms:
+        if start < bpm.measure < start + duration:
+            result.append(bpm)
 
-        return new_duration
+    return result
 
-    for note in simai.notes:
-        if isinstance(note, (SimaiHoldNote, SimaiTouchHoldNote, SimaiSlideNote)):
-            bpms = bpm_changes(note.measure, note.duration)
-            if len(bpms) != 0:
-                note.duration = compensate_duration(
-                    note.measure, note.duration, simai.get_bpm(note.measure), bpms
-                )
-        if isinstance(note, SimaiSlideNote):
-            bpms = bpm_changes(note.measure, note.delay)
-            if len(bpms) != 0:
-                note.delay = compensate_duration(
-                    note.measure, note.delay, simai.get_bpm(note.measure), bpms
-                )
+
+def _compensate_duration(
+        simai: SimaiChart,
+        start: float,
+        duration: float,
+        base_bpm: float,
+        changes: List[BPM],
+) -> float:
+    new_duration = 0
+
+    note_start = start
+    for bpm in changes:
+        new_duration += (
+                base_bpm
+                * (bpm.measure - note_start)
+                / simai.get_bpm(bpm.measure - 0.0001)
+        )
+
+        note_start = bpm.measure
+
+    if note_start < start + duration:
+        new_duration += (
+                base_bpm
+                * (start + duration - note_start)
+                / simai.get_bpm(note_start + 0.0001)
+        )
+
+    return new_duration
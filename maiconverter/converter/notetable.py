@@ -0,0 +1,524 @@
+from __future__ import annotations
+
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from ..event import MaiNote, NoteType
+from ..maima2 import MaiMa2
+from ..maisxt import MaiSxt
+from ..simai import (
+    SimaiChart,
+    pattern_from_int,
+    pattern_to_int,
+    illegal_v_slide_exception,
+    convert_v_slide_to_connected_slides,
+    TapNote as SimaiTapNote,
+    HoldNote as SimaiHoldNote,
+    SlideNote as SimaiSlideNote,
+    TouchTapNote as SimaiTouchTapNote,
+    TouchHoldNote as SimaiTouchHoldNote,
+)
+
+# Tap, hold, and touch note types to (kind, is_break, is_ex, is_star)
+NOTE_KINDS: Dict[NoteType, Tuple[str, bool, bool, bool]] = {
+    NoteType.tap: ("tap", False, False, False),
+    NoteType.break_tap: ("tap", True, False, False),
+    NoteType.ex_tap: ("tap", False, True, False),
+    NoteType.ex_break_tap: ("tap", True, True, False),
+    NoteType.star: ("tap", False, False, True),
+    NoteType.break_star: ("tap", True, False, True),
+    NoteType.ex_star: ("tap", False, True, True),
+    NoteType.ex_break_star: ("tap", True, True, True),
+    NoteType.hold: ("hold", False, False, False),
+    NoteType.break_hold: ("hold", True, False, False),
+    NoteType.ex_hold: ("hold", False, True, False),
+    NoteType.ex_break_hold: ("hold", True, True, False),
+    NoteType.touch_tap: ("touch_tap", False, False, False),
+    NoteType.touch_hold: ("touch_hold", False, False, False),
+}
+
+
+class NoteRow(NamedTuple):
+    """A single note of a NoteTable, with a value for every column.
+    See NoteTable for what each value means.
+    """
+
+    kind: str
+    measure: float
+    position: int
+    duration: float = 0.0
+    end_position: int = 0
+    pattern: int = 0
+    delay: float = 0.25
+    is_break: bool = False
+    is_ex: bool = False
+    is_star: bool = False
+    is_connect: bool = False
+    region: str = "C"
+    is_firework: bool = False
+    size: str = "M1"
+    source: Any = None
+
+
+def _common_row(note: MaiNote) -> Optional[NoteRow]:
+    # Row of a tap, hold, or touch note, which are alike in every format.
+    # None for other notes.
+    flags = NOTE_KINDS.get(note.note_type)
+    if flags is None:
+        return None
+
+    kind, is_break, is_ex, is_star = flags
+    if kind == "tap":
+        return NoteRow(
+            kind,
+            note.measure,
+            note.position,
+            is_break=is_break,
+            is_ex=is_ex,
+            is_star=is_star,
+            source=note,
+        )
+    if kind == "hold":
+        return NoteRow(
+            kind,
+            note.measure,
+            note.position,
+            duration=note.duration,
+            is_break=is_break,
+            is_ex=is_ex,
+            source=note,
+        )
+
+    return NoteRow(
+        kind,
+        note.measure,
+        note.position,
+        duration=getattr(note, "duration", 0.0),
+        region=note.region,
+        is_firework=note.is_firework,
+        size=getattr(note, "size", "M1"),
+        source=note,
+    )
+
+
+def _slide_row(
+    note: MaiNote, pattern: int, end_position: int, duration: float, delay: float
+) -> NoteRow:
+    return NoteRow(
+        "slide",
+        note.measure,
+        note.position,
+        duration=duration,
+        end_position=end_position,
+        pattern=pattern,
+        delay=delay,
+        is_break=getattr(note, "is_break", False),
+        is_ex=getattr(note, "is_ex", False),
+        is_connect=getattr(note, "is_connect", False),
+        source=note,
+    )
+
+
+class NoteTable:
+    """Notes of a chart stored as parallel columns, one value per note.
+
+    The format-neutral intermediate of the converters. Every chart format
+    is loaded into a table by one loader and emitted from a table by one
+    emitter, so converting between formats only transforms columns.
+    Durations do not include the slide delay, like in ma2 and simai, and
+    slide patterns use their numerical representation.
+
+    Attributes:
+        kinds: Kind of each note. One of "tap", "hold", "slide",
+            "touch_tap", or "touch_hold".
+        measures: Time when each note starts, in terms of measures.
+        positions: Button, start button of slides, or position in the
+            touch region of each note.
+        durations: Duration of holds, touch holds, and slides.
+        end_positions: Ending button of slides.
+        patterns: Numerical representation of the slide patterns.
+        delays: Slide delays.
+        is_break: Whether each note is a break note.
+        is_ex: Whether each note is an ex note.
+        is_star: Whether each tap note is a star note.
+        is_connect: Whether each slide is a connect slide.
+        regions: Touch region of touch notes.
+        is_firework: Whether each touch note produces fireworks.
+        sizes: Size of touch notes.
+        sources: The note each row was loaded from, or None.
+
+    Examples:
+        Convert a ma2 chart's notes into a simai chart.
+
+        >>> simai = SimaiChart()
+        >>> NoteTable.from_ma2(ma2.notes).to_simai(simai)
+    """
+
+    def __init__(self) -> None:
+        self.kinds: List[str] = []
+        self.measures: List[float] = []
+        self.positions: List[int] = []
+        self.durations: List[float] = []
+        self.end_positions: List[int] = []
+        self.patterns: List[int] = []
+        self.delays: List[float] = []
+        self.is_break: List[bool] = []
+        self.is_ex: List[bool] = []
+        self.is_star: List[bool] = []
+        self.is_connect: List[bool] = []
+        self.regions: List[str] = []
+        self.is_firework: List[bool] = []
+        self.sizes: List[str] = []
+        self.sources: List[Any] = []
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def _column_lists(self) -> Tuple[List[Any], ...]:
+        # Every column, in the order of the fields of NoteRow
+        return (
+            self.kinds,
+            self.measures,
+            self.positions,
+            self.durations,
+            self.end_positions,
+            self.patterns,
+            self.delays,
+            self.is_break,
+            self.is_ex,
+            self.is_star,
+            self.is_connect,
+            self.regions,
+            self.is_firework,
+            self.sizes,
+            self.sources,
+        )
+
+    def extend(self, rows: Iterable[NoteRow]) -> NoteTable:
+        """Adds notes given as rows."""
+        for column, values in zip(self._column_lists(), zip(*rows)):
+            column.extend(values)
+
+        return self
+
+    def append(
+        self,
+        kind: str,
+        measure: float,
+        position: int,
+        duration: float = 0.0,
+        end_position: int = 0,
+        pattern: int = 0,
+        delay: float = 0.25,
+        is_break: bool = False,
+        is_ex: bool = False,
+        is_star: bool = False,
+        is_connect: bool = False,
+        region: str = "C",
+        is_firework: bool = False,
+        size: str = "M1",
+        source: Any = None,
+    ) -> NoteTable:
+        """Adds a note as a new row. Values that don't apply to a kind of
+        note are ignored when the row is emitted.
+        """
+        return self.extend(
+            [
+                NoteRow(
+                    kind=kind,
+                    measure=measure,
+                    position=position,
+                    duration=duration,
+                    end_position=end_position,
+                    pattern=pattern,
+                    delay=delay,
+                    is_break=is_break,
+                    is_ex=is_ex,
+                    is_star=is_star,
+                    is_connect=is_connect,
+                    region=region,
+                    is_firework=is_firework,
+                    size=size,
+                    source=source,
+                )
+            ]
+        )
+
+    def rows(self) -> Iterator[NoteRow]:
+        """Returns an iterator over the notes as rows."""
+        return map(NoteRow._make, zip(*self._column_lists()))
+
+    def columns(self) -> Dict[str, List[Any]]:
+        """Returns the note columns by name, in the form taken by
+        `MaiMa2.extend_from_columns`.
+        """
+        return {
+            "kinds": self.kinds,
+            "measures": self.measures,
+            "positions": self.positions,
+            "durations": self.durations,
+            "end_positions": self.end_positions,
+            "patterns": self.patterns,
+            "delays": self.delays,
+            "is_break": self.is_break,
+            "is_ex": self.is_ex,
+            "is_star": self.is_star,
+            "is_connect": self.is_connect,
+            "regions": self.regions,
+            "is_firework": self.is_firework,
+            "sizes": self.sizes,
+        }
+
+    @classmethod
+    def from_ma2(cls, ma2_notes: Sequence[MaiNote]) -> NoteTable:
+        """Loads the notes of a ma2 chart.
+
+        Args:
+            ma2_notes: Notes of a MaiMa2 object.
+
+        Returns:
+            A NoteTable with one row per note.
+        """
+        rows = []
+        for note in ma2_notes:
+            row = _common_row(note)
+            if row is None and note.note_type == NoteType.complete_slide:
+                row = _slide_row(
+                    note, note.pattern, note.end_position, note.duration, note.delay
+                )
+            if row is None:
+                print("Warning: Unknown note type {}".format(note.note_type))
+                continue
+
+            rows.append(row)
+
+        return cls().extend(rows)
+
+    @classmethod
+    def from_simai(
+        cls,
+        simai_notes: Sequence[MaiNote],
+        split_illegal_v: bool = False,
+    ) -> NoteTable:
+        """Loads the notes of a simai chart.
+
+        Args:
+            simai_notes: Notes of a SimaiChart object.
+            split_illegal_v: When set to true, V slides without a numerical
+                pattern are split into two connected straight slides.
+
+        Returns:
+            A NoteTable with one row per note.
+
+        Raises:
+            illegal_v_slide_exception: When a V slide has no numerical
+                pattern and split_illegal_v is not set.
+        """
+
+        def slide_row(slide: SimaiSlideNote) -> NoteRow:
+            return _slide_row(
+                slide,
+                pattern_to_int(slide),
+                slide.end_position,
+                slide.duration,
+                slide.delay,
+            )
+
+        rows = []
+        for note in simai_notes:
+            row = _common_row(note)
+            if row is not None:
+                rows.append(row)
+            elif note.note_type != NoteType.complete_slide:
+                print(f"Warning: Unknown note type {note.note_type}")
+            elif not split_illegal_v:
+                rows.append(slide_row(note))
+            else:
+                try:
+                    rows.append(slide_row(note))
+                except illegal_v_slide_exception:
+                    first_slide, second_slide = convert_v_slide_to_connected_slides(note)
+                    rows.append(slide_row(first_slide))
+                    rows.append(slide_row(second_slide))
+
+                    print(f"Converted illegal V-slide {note.position+1}-{note.reflect_position+1}-{note.end_position+1}")
+
+        return cls().extend(rows)
+
+    @classmethod
+    def from_sxt(cls, sxt_notes: Sequence[MaiNote]) -> NoteTable:
+        """Loads the notes of an sxt chart. Start and end slides are paired
+        by their slide id into a single slide row.
+
+        Args:
+            sxt_notes: Notes of a MaiSxt object.
+
+        Returns:
+            A NoteTable with one row per tap, hold, and slide.
+
+        Raises:
+            Exception: When an end slide has no start slide, or when more
+                than one start slide has its slide id.
+        """
+        rows = []
+        # Start slides by slide id, and slide ids used by more than one start slide
+        start_slides: Dict[int, MaiNote] = {}
+        duplicate_ids = set()
+        for note in sxt_notes:
+            row = _common_row(note)
+            if row is not None:
+                rows.append(row)
+                continue
+
+            note_type = note.note_type
+            if note_type == NoteType.start_slide:
+                if note.slide_id in start_slides:
+                    duplicate_ids.add(note.slide_id)
+                start_slides[note.slide_id] = note
+            elif note_type == NoteType.end_slide:
+                if note.slide_id not in start_slides:
+                    raise Exception("No corresponding start slide")
+                if note.slide_id in duplicate_ids:
+                    raise Exception("Multiple start slides with same slide id")
+
+                start_slide = start_slides[note.slide_id]
+                # Sxt slide durations include the delay
+                rows.append(
+                    _slide_row(
+                        start_slide,
+                        note.pattern,
+                        note.position,
+                        start_slide.duration - start_slide.delay,
+                        start_slide.delay,
+                    )
+                )
+            else:
+                print("Warning: Unknown note type {}".format(note_type))
+
+        return cls().extend(rows)
+
+    def to_ma2(self, ma2: MaiMa2, slide_check: bool = True) -> MaiMa2:
+        """Adds the notes to a ma2 chart with `MaiMa2.extend_from_columns`.
+
+        Args:
+            ma2: The MaiMa2 object the notes are added to.
+            slide_check: When set to true, will check validity of slides.
+
+        Returns:
+            The given MaiMa2 object.
+        """
+        return ma2.extend_from_columns(**self.columns(), slide_check=slide_check)
+
+    def to_simai(self, simai: SimaiChart) -> SimaiChart:
+        """Adds the notes to a simai chart. Touch note sizes are dropped.
+
+        Args:
+            simai: The SimaiChart object the notes are added to.
+
+        Returns:
+            The given SimaiChart object.
+        """
+        notes = []
+        for row in self.rows():
+            kind = row.kind
+            if kind == "tap":
+                note = SimaiTapNote(
+                    row.measure, row.position, row.is_break, row.is_star, row.is_ex
+                )
+            elif kind == "hold":
+                note = SimaiHoldNote(
+                    row.measure, row.position, row.duration, row.is_ex, row.is_break
+                )
+            elif kind == "slide":
+                simai_pattern, reflect_position = pattern_from_int(
+                    row.pattern, row.position, row.end_position
+                )
+                note = SimaiSlideNote(
+                    row.measure,
+                    row.position,
+                    row.end_position,
+                    row.duration,
+                    simai_pattern,
+                    row.delay,
+                    row.is_break,
+                    row.is_ex,
+                    row.is_connect,
+                    reflect_position,
+                )
+            elif kind == "touch_tap":
+                note = SimaiTouchTapNote(
+                    row.measure, row.position, row.region, row.is_firework
+                )
+            elif kind == "touch_hold":
+                note = SimaiTouchHoldNote(
+                    row.measure, row.position, row.region, row.duration, row.is_firework
+                )
+            else:
+                raise ValueError(f"Unknown note kind {kind}")
+
+            notes.append(note)
+
+        simai.notes.extend(notes)
+        return simai
+
+    def to_sxt(
+        self,
+        sxt: MaiSxt,
+        touch_converter: Optional[Callable[[MaiSxt, Any], None]] = None,
+    ) -> MaiSxt:
+        """Adds the notes to an sxt chart. Ex and break flags of holds and
+        slides, and ex flags of taps are dropped.
+
+        Args:
+            sxt: The MaiSxt object the notes are added to.
+            touch_converter: Called with the sxt chart and the source note
+                of every touch note. When not given, touch notes are
+                skipped.
+
+        Returns:
+            The given MaiSxt object.
+
+        Raises:
+            ValueError: When a kind is unknown, or a slide is invalid.
+        """
+        skipped_notes = 0
+        for row in self.rows():
+            kind = row.kind
+            if kind == "tap":
+                sxt.add_tap(
+                    row.measure, row.position, is_break=row.is_break, is_star=row.is_star
+                )
+            elif kind == "hold":
+                sxt.add_hold(row.measure, row.position, row.duration)
+            elif kind == "slide":
+                # Sxt slide durations include the delay
+                sxt.add_slide(
+                    row.measure,
+                    row.position,
+                    row.end_position,
+                    row.duration + row.delay,
+                    row.pattern,
+                    row.delay,
+                )
+            elif kind in ("touch_tap", "touch_hold"):
+                if touch_converter is not None:
+                    touch_converter(sxt, row.source)
+                else:
+                    skipped_notes += 1
+            else:
+                raise ValueError(f"Unknown note kind {kind}")
+
+        if skipped_notes > 0:
+            print("Skipped {} touch note(s)".format(skipped_notes))
+
+        return sxt
@@ -1,4 +1,4 @@
-from typing import List, Tuple, Optional
+from typing import List
 
 from ..maima2 import (
     MaiMa2,
@@ -7,18 +7,9 @@ from ..maima2 import (
     TouchHoldNote as Ma2TouchHoldNote,
     SlideNote as Ma2SlideNote,
 )
-from ..simai import (
-    SimaiChart,
-    pattern_to_int,
-    TapNote,
-    HoldNote,
-    SlideNote,
-    TouchHoldNote,
-    TouchTapNote,
-    illegal_v_slide_exception,
-    convert_v_slide_to_connected_slides,
-)
-from ..event import SimaiNote, NoteType
+from ..simai import SimaiChart
+from ..event import SimaiNote
+from .notetable import NoteTable
 
 
 def simai_to_ma2(simai: SimaiChart, fes_mode: bool = False) -> MaiMa2:
@@ -39,102 +30,9 @@ def simai_to_ma2(simai: SimaiChart, fes_mode: bool = False) -> MaiMa2:
 
 
 def convert_notes(ma2: MaiMa2, simai_notes: List[SimaiNote]) -> None:
-    for simai_note in simai_notes:
-        note_type = simai_note.note_type
-        if isinstance(simai_note, TapNote):
-            is_break = note_type in [NoteType.break_tap, NoteType.break_star, NoteType.ex_break_star,
-                                     NoteType.ex_break_tap]
-            is_ex = note_type in [NoteType.ex_tap, NoteType.ex_star, NoteType.ex_break_star, NoteType.ex_break_tap]
-            is_star = note_type in [
-                NoteType.star,
-                NoteType.break_star,
-                NoteType.ex_star,
-                NoteType.ex_break_star
-            ]
-            ma2.add_tap(
-                measure=simai_note.measure,
-                position=simai_note.position,
-                is_break=is_break,
-                is_star=is_star,
-                is_ex=is_ex,
-            )
-        elif isinstance(simai_note, HoldNote):
-            is_break = note_type in [NoteType.break_hold, NoteType.ex_break_hold]
-            is_ex = note_type in [NoteType.ex_hold, NoteType.ex_break_hold]
-            ma2.add_hold(
-                measure=simai_note.measure,
-                position=simai_note.position,
-                duration=simai_note.duration,
-                is_ex=is_ex,
-                is_break=is_break
-            )
-        elif isinstance(simai_note, SlideNote):
-            # Ma2 slide durations does not include the delay
-            # like in simai
-            try:
-                pattern = pattern_to_int(simai_note)
-                ma2.add_slide(
-                    measure=simai_note.measure,
-                    start_position=simai_note.position,
-                    end_position=simai_note.end_position,
-                    duration=simai_note.duration,
-                    pattern=pattern,
-                    delay=simai_note.delay,
-                    is_break=simai_note.is_break,
-                    is_ex=simai_note.is_ex,
-                    is_connect=simai_note.is_connect
-                )
-            except illegal_v_slide_exception:
-                # 将非法V型滑条分解为两个连接的直线滑条
-                first_slide, second_slide = convert_v_slide_to_connected_slides(simai_note)
-                
-                # 添加第一个滑条
-                pattern1 = pattern_to_int(first_slide)
-                ma2.add_slide(
-                    measure=first_slide.measure,
-                    start_position=first_slide.position,
-                    end_position=first_slide.end_position,
-                    duration=first_slide.duration,
-                    pattern=pattern1,
-                    delay=first_slide.delay,
-                    is_break=first_slide.is_break,
-                    is_ex=first_slide.is_ex,
-                    is_connect=first_slide.is_connect
-                )
-                
-                # 添加第二个滑条
-                pattern2 = pattern_to_int(second_slide)
-                ma2.add_slide(
-                    measure=second_slide.measure,
-                    start_position=second_slide.position,
-                    end_position=second_slide.end_position,
-                    duration=second_slide.duration,
-                    pattern=pattern2,
-                    delay=second_slide.delay,
-                    is_break=second_slide.is_break,
-                    is_ex=second_slide.is_ex,
-                    is_connect=second_slide.is_connect
-                )
-                
-                print(f"Converted illegal V-slide {simai_note.position+1}-{simai_note.reflect_position+1}-{simai_note.end_position+1}")
-
-        elif isinstance(simai_note, TouchTapNote):
-            ma2.add_touch_tap(
-                measure=simai_note.measure,
-                position=simai_note.position,
-                region=simai_note.region,
-                is_firework=simai_note.is_firework,
-            )
-        elif isinstance(simai_note, TouchHoldNote):
-            ma2.add_touch_hold(
-                measure=simai_note.measure,
-                position=simai_note.position,
-                region=simai_note.region,
-                duration=simai_note.duration,
-                is_firework=simai_note.is_firework,
-            )
-        else:
-            print(f"Warning: Unknown note type {note_type}")
+    # Ma2 slide durations does not include the delay
+    # like in simai. Illegal V slides are split into two connected slides.
+    NoteTable.from_simai(simai_notes, split_illegal_v=True).to_ma2(ma2)
 
 
 def fix_durations(ma2: MaiMa2):
@@ -1,3 +1,5 @@
 from .ma2note import *
 from .tools import parse_v1
+from .stats import Ma2Statistics
 from .maima2 import MaiMa2
+from .diff import Ma2Diff, diff_ma2
@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from .ma2note import Ma2Note
+
+
+@dataclass
+class Ma2Diff:
+    """Differences between two ma2 charts.
+
+    Attributes:
+        added: Notes only in the new chart.
+        removed: Notes only in the old chart.
+        moved: (old, new) pairs of notes at the same time that changed
+            position, end position, or touch region.
+        retimed: (old, new) pairs of notes at the same position that changed
+            start time, by at most diff_ma2's max_retime, duration, or delay.
+        bpm_changes: (measure, old bpm, new bpm) of BPM events that differ.
+            The old or new bpm is None when there's no event at the measure.
+        meter_changes: (measure, old meter, new meter) of meter events that
+            differ, with meters as (numerator, denominator).
+    """
+
+    added: List[Ma2Note] = field(default_factory=list)
+    removed: List[Ma2Note] = field(default_factory=list)
+    moved: List[Tuple[Ma2Note, Ma2Note]] = field(default_factory=list)
+    retimed: List[Tuple[Ma2Note, Ma2Note]] = field(default_factory=list)
+    bpm_changes: List[Tuple[float, Optional[float], Optional[float]]] = field(
+        default_factory=list
+    )
+    meter_changes: List[
+        Tuple[float, Optional[Tuple[int, int]], Optional[Tuple[int, int]]]
+    ] = field(default_factory=list)
+
+    def is_empty(self) -> bool:
+        return not (
+            self.added
+            or self.removed
+            or self.moved
+            or self.retimed
+            or self.bpm_changes
+            or self.meter_changes
+        )
+
+    def summary(self) -> str:
+        return (
+            f"{len(self.added)} added, {len(self.removed)} removed, "
+            f"{len(self.moved)} moved, {len(self.retimed)} retimed, "
+            f"{len(self.bpm_changes)} BPM and {len(self.meter_changes)} meter changes"
+        )
+
+    def to_str(self, resolution: int = 384) -> str:
+        """Returns a readable report with the ma2 line of each changed note."""
+        lines = []
+        for measure, old, new in self.bpm_changes:
+            lines.append(f"BPM {measure}: {old} -> {new}")
+        for measure, old, new in self.meter_changes:
+            lines.append(f"MET {measure}: {old} -> {new}")
+        for note in self.removed:
+            lines.append("- " + note.to_str(resolution))
+        for note in self.added:
+            lines.append("+ " + note.to_str(resolution))
+        for old, new in self.moved:
+            lines.append(f"~ {old.to_str(resolution)} -> {new.to_str(resolution)}")
+        for old, new in self.retimed:
+            lines.append(f"@ {old.to_str(resolution)} -> {new.to_str(resolution)}")
+
+        return "\n".join(lines)
+
+
+def _time_key(measure: float, tolerance: float) -> int:
+    return round(measure / tolerance)
+
+
+def _type_key(note: Any) -> Tuple:
+    # Everything about a note besides its time and position
+    return (
+        type(note).__name__,
+        note.note_type.value,
+        getattr(note, "pattern", 0),
+        getattr(note, "is_break", False),
+        getattr(note, "is_ex", False),
+        getattr(note, "is_connect", False),
+        getattr(note, "is_firework", False),
+        getattr(note, "size", ""),
+    )
+
+
+def _position_key(note: Any) -> Tuple:
+    return note.position, getattr(note, "end_position", 0), getattr(note, "region", "")
+
+
+def _same_timing(old: Any, new: Any, tolerance: float) -> bool:
+    return all(
+        math.isclose(getattr(old, name, 0.0), getattr(new, name, 0.0), abs_tol=tolerance)
+        for name in ["duration", "delay"]
+    )
+
+
+def _pair_groups(
+    olds: List[Any],
+    news: List[Any],
+    group_key,
+    order_key,
+    max_gap: Optional[float] = None,
+) -> Tuple[List[Tuple[Any, Any]], List[Any], List[Any]]:
+    # Pairs notes of the same group in order. When max_gap is given, only
+    # notes whose order keys are at most max_gap apart are paired. Returns
+    # the pairs, and the notes left unpaired in each list.
+    groups: Dict[Any, Tuple[List[Any], List[Any]]] = {}
+    for note in olds:
+        groups.setdefault(group_key(note), ([], []))[0].append(note)
+    for note in news:
+        groups.setdefault(group_key(note), ([], []))[1].append(note)
+
+    pairs = []
+    unpaired_olds = []
+    unpaired_news = []
+    for group_olds, group_news in groups.values():
+        group_olds.sort(key=order_key)
+        group_news.sort(key=order_key)
+        if max_gap is None:
+            count = min(len(group_olds), len(group_news))
+            pairs.extend(zip(group_olds[:count], group_news[:count]))
+            unpaired_olds.extend(group_olds[count:])
+            unpaired_news.extend(group_news[count:])
+            continue
+
+        i = j = 0
+        while i < len(group_olds) and j < len(group_news):
+            gap = order_key(group_news[j]) - order_key(group_olds[i])
+            if abs(gap) <= max_gap:
+                pairs.append((group_olds[i], group_news[j]))
+                i += 1
+                j += 1
+            elif gap > 0:
+                unpaired_olds.append(group_olds[i])
+                i += 1
+            else:
+                unpaired_news.append(group_news[j])
+                j += 1
+        unpaired_olds.extend(group_olds[i:])
+        unpaired_news.extend(group_news[j:])
+
+    return pairs, unpaired_olds, unpaired_news
+
+
+def _diff_events(
+    old_events: Dict[int, Tuple[float, Any]],
+    new_events: Dict[int, Tuple[float, Any]],
+) -> List[Tuple[float, Any, Any]]:
+    changes = []
+    for key in sorted(set(old_events) | set(new_events)):
+        old_measure, old_value = old_events.get(key, (None, None))
+        new_measure, new_value = new_events.get(key, (None, None))
+        if old_value != new_value:
+            measure = old_measure if old_measure is not None else new_measure
+            changes.append((measure, old_value, new_value))
+
+    return changes
+
+
+def diff_ma2(
+    old: Any, new: Any, tolerance: float = 0.0001, max_retime: float = 1.0
+) -> Ma2Diff:
+    """Finds the differences between two ma2 charts.
+
+    Notes of both charts are sorted by (time, type, position) and aligned
+    in a single merge pass. Notes that don't align are then paired as moved
+    (same time and type, different position) or retimed (same type and
+    position, at most max_retime measures apart), and the rest are added
+    or removed.
+    Matching notes with different durations or delays are also retimed.
+
+    Args:
+        old: The original MaiMa2 chart.
+        new: The changed MaiMa2 chart.
+        tolerance: Measures closer than this are the same time.
+        max_retime: Notes further apart than this many measures are not
+            paired as retimed. Defaults to 1 measure.
+
+    Returns:
+        A Ma2Diff with every change.
+
+    Examples:
+        Compare two versions of a chart.
+
+        >>> result = diff_ma2(MaiMa2.open("old.ma2"), MaiMa2.open("new.ma2"))
+        >>> print(result.summary())
+    """
+    result = Ma2Diff()
+
+    def key(note: Any) -> Tuple:
+        return _time_key(note.measure, tolerance), _type_key(note), _position_key(note)
+
+    old_notes = sorted(old.notes, key=key)
+    new_notes = sorted(new.notes, key=key)
+    old_keys = [key(note) for note in old_notes]
+    new_keys = [key(note) for note in new_notes]
+
+    unmatched_olds = []
+    unmatched_news = []
+    i = j = 0
+    while i < len(old_notes) and j < len(new_notes):
+        if old_keys[i] == new_keys[j]:
+            if not _same_timing(old_notes[i], new_notes[j], tolerance):
+                result.retimed.append((old_notes[i], new_notes[j]))
+            i += 1
+            j += 1
+        elif old_keys[i] < new_keys[j]:
+            unmatched_olds.append(old_notes[i])
+            i += 1
+        else:
+            unmatched_news.append(new_notes[j])
+            j += 1
+    unmatched_olds.extend(old_notes[i:])
+    unmatched_news.extend(new_notes[j:])
+
+    moved, unmatched_olds, unmatched_news = _pair_groups(
+        unmatched_olds,
+        unmatched_news,
+        lambda note: (_time_key(note.measure, tolerance), _type_key(note)),
+        _position_key,
+    )
+    result.moved = sorted(moved, key=lambda pair: pair[0].measure)
+
+    retimed, unmatched_olds, unmatched_news = _pair_groups(
+        unmatched_olds,
+        unmatched_news,
+        lambda note: (_type_key(note), _position_key(note)),
+        lambda note: note.measure,
+        max_gap=max_retime + tolerance,
+    )
+    result.retimed = sorted(result.retimed + retimed, key=lambda pair: pair[0].measure)
+
+    result.removed = sorted(unmatched_olds, key=lambda note: note.measure)
+    result.added = sorted(unmatched_news, key=lambda note: note.measure)
+
+    result.bpm_changes = _diff_events(
+        {_time_key(bpm.measure, tolerance): (bpm.measure, bpm.bpm) for bpm in old.bpms},
+        {_time_key(bpm.measure, tolerance): (bpm.measure, bpm.bpm) for bpm in new.bpms},
+    )
+    result.meter_changes = _diff_events(
+        {
+            _time_key(meter.measure, tolerance): (
+                meter.measure,
+                (meter.numerator, meter.denominator),
+            )
+            for meter in old.meters
+        },
+        {
+            _time_key(meter.measure, tolerance): (
+                meter.measure,
+                (meter.numerator, meter.denominator),
+            )
+            for meter in new.meters
+        },
+    )
+    return result
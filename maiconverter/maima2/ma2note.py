@@ -1,5 +1,5 @@
 import math
-from typing import Tuple
+from typing import Tuple, List, Dict, Iterable, Optional
 
 from maiconverter.event import MaiNote, NoteType, Event, EventType
 from maiconverter.tool import slide_distance
@@ -38,8 +38,194 @@ slide_dict = {
     "SF_": 13,
 }
 
+# Slide name of each slide pattern
+_slide_names = {v: k for k, v in slide_dict.items()}
+
+
+# Line templates of ma2 notes and events
+_TAP_TEMPLATE = "{}{}\t{}\t{}\t{}".format
+_HOLD_TEMPLATE = "{}HLD\t{}\t{}\t{}\t{}".format
+_SLIDE_TEMPLATE = "{}{}\t{}\t{}\t{}\t{}\t{}\t{}".format
+_TOUCH_TAP_TEMPLATE = "NMTTP\t{}\t{}\t{}\t{}\t{}\t{}".format
+_TOUCH_HOLD_TEMPLATE = "NMTHO\t{}\t{}\t{}\t{}\t{}\t{}\t{}".format
+_BPM_TEMPLATE = "BPM\t{}\t{}\t{:.3f}".format
+_METER_TEMPLATE = "MET\t{}\t{}\t{}\t{}".format
+
+# Note name prefix of taps and holds by (is_break, is_ex)
+_NOTE_PREFIXES = {
+    (False, False): "NM",
+    (True, False): "BR",
+    (False, True): "EX",
+    (True, True): "BX",
+}
+
+
+class TickTable:
+    """Converts between measures and ma2's integer (bar, tick) timing
+    for a single resolution.
+
+    The measure fraction of every tick is precomputed, so parsing a
+    ma2 is a table lookup per field. Use `TickTable.get` to share
+    tables between charts and notes.
+
+    Attributes:
+        resolution: The number of ticks equal to one measure.
+        fractions: The measure fraction of every tick in a measure.
+    """
+
+    _tables: Dict[int, "TickTable"] = {}
+
+    def __init__(self, resolution: int) -> None:
+        if resolution <= 0:
+            raise ValueError(f"Resolution is not positive: {resolution}")
+
+        self.resolution = resolution
+        self.fractions = [tick / resolution for tick in range(resolution)]
+
+    @classmethod
+    def get(cls, resolution: int) -> "TickTable":
+        """Returns the shared tick table of a resolution."""
+        table = cls._tables.get(resolution)
+        if table is None:
+            table = cls(resolution)
+            cls._tables[resolution] = table
+
+        return table
+
+    def to_measure(self, bar: int, tick: int) -> float:
+        """Converts ma2 (bar, tick) timing to measures."""
+        if 0 <= tick < self.resolution:
+            return bar + self.fractions[tick]
+
+        return bar + tick / self.resolution
+
+    def to_duration(self, ticks: int) -> float:
+        """Converts a duration in ticks to measures."""
+        return ticks / self.resolution
+
+    def to_ma2_time(self, measure: float) -> Tuple[int, int]:
+        """Same as `measure_to_ma2_time` for this table's resolution."""
+        if measure < 0:
+            raise ValueError("Measure is negative. " + str(measure))
+
+        (decimal_part, whole_part) = math.modf(measure)
+        return int(whole_part), round(decimal_part * self.resolution)
+
+    def to_ticks(self, duration: float) -> int:
+        """Converts a duration in measures to ticks."""
+        return round(duration * self.resolution)
+
+    def note_times(self, notes: Iterable["Ma2Note"]) -> List[Tuple[int, int]]:
+        """Converts the start times of notes to (bar, tick) with
+        `Ma2Note.ticks`, one note at a time. Times already cached on a note
+        are reused, and new ones are cached on it for later exports."""
+        return [note.ticks(self.resolution) for note in notes]
+
+
+class Ma2Note(MaiNote):
+    """Base class of ma2 notes.
+
+    Caches the note's (bar, tick) start time for the last resolution
+    it was requested in. The cache is invalidated when the measure changes.
+
+    Notes read from a ma2 with native ticks also keep their start time,
+    duration, and delay as integer ticks of the file's resolution. The
+    ticks are written back as-is, or rescaled exactly to resolutions they
+    divide into, for as long as the note's measure, duration, and delay
+    are unchanged.
+    """
+
+    _ticks = None
+    # (resolution, start ticks, duration ticks, delay ticks, float times)
+    _native = None
+
+    def _float_times(self) -> Tuple[float, Optional[float], Optional[float]]:
+        return self.measure, getattr(self, "duration", None), getattr(self, "delay", None)
+
+    def set_native_ticks(
+            self,
+            resolution: int,
+            start: int,
+            duration: Optional[int] = None,
+            delay: Optional[int] = None,
+    ) -> None:
+        """Keeps integer ticks as the note's timing.
+
+        Args:
+            resolution: Number of ticks in a measure.
+            start: Start time of the note, in ticks from measure 0.
+            duration: Duration of a hold or slide, in ticks.
+            delay: Delay of a slide, in ticks.
+        """
+        self._native = (resolution, start, duration, delay, self._float_times())
 
-class SlideNote(MaiNote):
+    def has_native_ticks(self) -> bool:
+        """Whether the note's native ticks are still its timing."""
+        native = self._native
+        return native is not None and native[4] == self._float_times()
+
+    def shift_native_ticks(self, measure_offset: float) -> None:
+        """Moves the native start time by an offset in measures, and sets the
+        note's measure from it. Native ticks are dropped when the offset is
+        not a whole number of ticks.
+        """
+        resolution, start, duration, delay, _ = self._native
+        shift = measure_offset * resolution
+        start += round(shift)
+        if not math.isclose(shift, round(shift), abs_tol=1e-6) or start < 0:
+            self._native = None
+            return
+
+        measure = TickTable.get(resolution).to_measure(*divmod(start, resolution))
+        self.measure = round(measure * 10000) / 10000
+        self.set_native_ticks(resolution, start, duration, delay)
+
+    def _native_field(self, index: int, resolution: int) -> Optional[int]:
+        # Native ticks of a field in given resolution, or None when they
+        # don't apply anymore or can't be rescaled exactly
+        if not self.has_native_ticks():
+            return None
+
+        native_resolution = self._native[0]
+        ticks = self._native[index]
+        if ticks is None or resolution == native_resolution:
+            return ticks
+
+        scaled, remainder = divmod(ticks * resolution, native_resolution)
+        return scaled if remainder == 0 else None
+
+    def ticks(self, resolution: int) -> Tuple[int, int]:
+        """Returns the note's start time in ma2's (bar, tick) timing."""
+        start = self._native_field(1, resolution)
+        if start is not None:
+            return divmod(start, resolution)
+
+        cache = self._ticks
+        if cache is not None and cache[0] == resolution and cache[1] == self.measure:
+            return cache[2]
+
+        ticks = TickTable.get(resolution).to_ma2_time(self.measure)
+        self._ticks = (resolution, self.measure, ticks)
+        return ticks
+
+    def duration_ticks(self, resolution: int) -> int:
+        """Returns the note's duration in ticks."""
+        duration = self._native_field(2, resolution)
+        if duration is not None:
+            return duration
+
+        return TickTable.get(resolution).to_ticks(self.duration)
+
+    def delay_ticks(self, resolution: int) -> int:
+        """Returns the slide's delay in ticks."""
+        delay = self._native_field(3, resolution)
+        if delay is not None:
+            return delay
+
+        return TickTable.get(resolution).to_ticks(self.delay)
+
+
+class SlideNote(Ma2Note):
     def __init__(
             self,
             measure: float,
@@ -93,37 +279,31 @@ class SlideNote(MaiNote):
         self.is_connect = is_connect
 
     def to_str(self, resolution: int = 384) -> str:
-        measure = measure_to_ma2_time(self.measure, resolution)
-        template = "{}\t{}\t{}\t{}\t{}\t{}\t{}"
-        inv_slide_dict = {v: k for k, v in slide_dict.items()}
-        if self.pattern not in inv_slide_dict:
+        measure = self.ticks(resolution)
+        if self.pattern not in _slide_names:
             raise ValueError(f"Unknown slide pattern {self.pattern}")
 
-        prefix = "NM"
+        # Ex slides are written as regular slides
         if self.is_connect:
             prefix = "CN"
-        elif self.is_ex and self.is_break:
-            prefix = "BR"
-        elif self.is_ex:
-            prefix = "NM"
         elif self.is_break:
             prefix = "BR"
+        else:
+            prefix = "NM"
 
-        pattern = inv_slide_dict[self.pattern]
-        delay = round(self.delay * resolution)
-        duration = round(self.duration * resolution)
-        return template.format(
-            prefix + pattern,
+        return _SLIDE_TEMPLATE(
+            prefix,
+            _slide_names[self.pattern],
             measure[0],
             measure[1],
             self.position,
-            delay,
-            duration,
+            self.delay_ticks(resolution),
+            self.duration_ticks(resolution),
             self.end_position,
         )
 
 
-class HoldNote(MaiNote):
+class HoldNote(Ma2Note):
     def __init__(
             self,
             measure: float,
@@ -163,22 +343,18 @@ class HoldNote(MaiNote):
         self.duration = duration
 
     def to_str(self, resolution: int) -> str:
-        measure = measure_to_ma2_time(self.measure, resolution)
-
-        prefix = "NM"
-        if self.is_ex and self.is_break:
-            prefix = "BX"
-        elif self.is_ex:
-            prefix = "EX"
-        elif self.is_break:
-            prefix = "BR"
-
-        template = "{}HLD\t{}\t{}\t{}\t{}"
-        duration = round(self.duration * resolution)
-        return template.format(prefix, measure[0], measure[1], self.position, duration)
+        measure = self.ticks(resolution)
+        duration = self.duration_ticks(resolution)
+        return _HOLD_TEMPLATE(
+            _NOTE_PREFIXES[(self.is_break, self.is_ex)],
+            measure[0],
+            measure[1],
+            self.position,
+            duration,
+        )
 
 
-class TapNote(MaiNote):
+class TapNote(Ma2Note):
     def __init__(
             self,
             measure: float,
@@ -224,21 +400,17 @@ class TapNote(MaiNote):
         self.is_break = is_break
 
     def to_str(self, resolution: int) -> str:
-        measure = measure_to_ma2_time(self.measure, resolution)
-        template = "{}{}\t{}\t{}\t{}"
-
-        prefix = "NM"
-        if self.is_ex and self.is_break:
-            prefix = "BX"
-        elif self.is_ex:
-            prefix = "EX"
-        elif self.is_break:
-            prefix = "BR"
-        suffix = "STR" if self.is_star else "TAP"
-        return template.format(prefix, suffix, measure[0], measure[1], self.position)
+        measure = self.ticks(resolution)
+        return _TAP_TEMPLATE(
+            _NOTE_PREFIXES[(self.is_break, self.is_ex)],
+            "STR" if self.is_star else "TAP",
+            measure[0],
+            measure[1],
+            self.position,
+        )
 
 
-class TouchTapNote(MaiNote):
+class TouchTapNote(Ma2Note):
     def __init__(
             self,
             measure: float,
@@ -280,10 +452,9 @@ class TouchTapNote(MaiNote):
         self.size = size
 
     def to_str(self, resolution: int) -> str:
-        measure = measure_to_ma2_time(self.measure, resolution)
-        template = "NMTTP\t{}\t{}\t{}\t{}\t{}\t{}"
+        measure = self.ticks(resolution)
         fireworks = 1 if self.is_firework else 0
-        return template.format(
+        return _TOUCH_TAP_TEMPLATE(
             measure[0],
             measure[1],
             self.position,
@@ -293,7 +464,7 @@ class TouchTapNote(MaiNote):
         )
 
 
-class TouchHoldNote(MaiNote):
+class TouchHoldNote(Ma2Note):
     def __init__(
             self,
             measure: float,
@@ -338,13 +509,10 @@ class TouchHoldNote(MaiNote):
         self.size = size
 
     def to_str(self, resolution: int) -> str:
-        measure = measure_to_ma2_time(self.measure, resolution)
-        template = "{}\t{}\t{}\t{}\t{}\t{}\t{}\t{}"
-        name = "NMTHO"
-        duration = round(self.duration * resolution)
+        measure = self.ticks(resolution)
+        duration = self.duration_ticks(resolution)
         fireworks = 1 if self.is_firework else 0
-        return template.format(
-            name,
+        return _TOUCH_HOLD_TEMPLATE(
             measure[0],
             measure[1],
             self.position,
@@ -386,10 +554,9 @@ class BPM(Event):
         if self.measure == 0.0:
             measure = (0, 0)
         else:
-            measure = measure_to_ma2_time(self.measure, resolution)
+            measure = TickTable.get(resolution).to_ma2_time(self.measure)
 
-        template = "BPM\t{}\t{}\t{:.3f}"
-        return template.format(measure[0], measure[1], self.bpm)
+        return _BPM_TEMPLATE(measure[0], measure[1], self.bpm)
 
 
 class Meter(Event):
@@ -430,10 +597,9 @@ class Meter(Event):
         if self.measure == 0.0:
             measure = (0, 0)
         else:
-            measure = measure_to_ma2_time(self.measure, resolution)
+            measure = TickTable.get(resolution).to_ma2_time(self.measure)
 
-        template = "MET\t{}\t{}\t{}\t{}"
-        return template.format(measure[0], measure[1], self.numerator, self.denominator)
+        return _METER_TEMPLATE(measure[0], measure[1], self.numerator, self.denominator)
 
 
 def measure_to_ma2_time(measure: float, resolution: int) -> Tuple[int, int]:
@@ -492,36 +658,47 @@ def check_slide(pattern: int, start_position: int, end_position: int):
         ValueError: When given a slide that will crash the game or has undefined
             behaviour.
     """
-    if not (0 < pattern < 14):
-        raise ValueError(f"Invalid slide pattern {pattern}")
-    if not (0 <= start_position <= 7):
-        raise ValueError(f"Invalid start position {start_position}")
-    if not (0 <= end_position <= 7):
+    key = (pattern, start_position, end_position)
+    if key not in _slide_errors:
+        if not (0 < pattern < 14):
+            raise ValueError(f"Invalid slide pattern {pattern}")
+        if not (0 <= start_position <= 7):
+            raise ValueError(f"Invalid start position {start_position}")
         raise ValueError(f"Invalid end position {end_position}")
 
+    error = _slide_errors[key]
+    if error is not None:
+        raise ValueError(error)
+
+
+def _slide_error(pattern: int, start_position: int, end_position: int) -> Optional[str]:
+    # Returns why a slide is invalid, or None for valid slides
     distance_cw = slide_distance(start_position, end_position, is_cw=True)
     distance_ccw = slide_distance(start_position, end_position, is_cw=False)
 
     if pattern == 1:
         if not (distance_cw > 1 and distance_ccw > 1):
-            raise ValueError(
-                "Distance between start and end position must be greater than 1 in SI_."
-            )
+            return "Distance between start and end position must be greater than 1 in SI_."
     elif pattern in [6, 7, 13]:
         if distance_cw != 4:
-            raise ValueError(
-                "Start and end position must be opposite of each other in SSL, SSR, or SF_."
-            )
+            return "Start and end position must be opposite of each other in SSL, SSR, or SF_."
     elif pattern == 8:
         if start_position == end_position:
-            raise ValueError(
-                "Start and end position must not be equal to each other in SV_."
-            )
+            return "Start and end position must not be equal to each other in SV_."
     elif pattern == 11:
         if not 0 < distance_cw < 5:
-            raise ValueError("Clockwise distance must be between 0 and 5 in SLL.")
+            return "Clockwise distance must be between 0 and 5 in SLL."
     elif pattern == 12:
         if not 0 < distance_ccw < 5:
-            raise ValueError(
-                "Counter-clockwise distance must be between 0 and 5 in SLR."
-            )
+            return "Counter-clockwise distance must be between 0 and 5 in SLR."
+
+    return None
+
+
+# Why a slide is invalid, or None, for every (pattern, start, end)
+_slide_errors: Dict[Tuple[int, int, int], Optional[str]] = {
+    (pattern, start, end): _slide_error(pattern, start, end)
+    for pattern in range(1, 14)
+    for start in range(8)
+    for end in range(8)
+}
@@ -1,11 +1,15 @@
 from __future__ import annotations
 
-import functools
+import io
+import itertools
 import math
+import mmap
+import os
 from collections import defaultdict
-from typing import Tuple, List, Union
+from typing import Tuple, List, Union, Optional, Iterable, Iterator, Sequence, TextIO
 
 from .ma2note import (
+    Ma2Note,
     TapNote,
     HoldNote,
     SlideNote,
@@ -15,18 +19,29 @@ from .ma2note import (
     Meter,
     check_slide,
 )
-from .tools import parse_v1
-from maiconverter.event import (NoteType,
-                                NOTE_REC_MAPPING)
-from maiconverter.tool import (
-    second_to_measure,
-    measure_to_second,
-    offset_arg_to_measure,
-)
+from .stats import Ma2Statistics
+from .tools import parse_v1, read_v1, iter_v1
+from maiconverter.event import NoteType
+from maiconverter.tool import TempoMap, resolve_offset, apply_offset, write_lines
 
 # Latest chart version
 MA2_VERSION = "1.04.00"
 
+# Line parser of each supported chart version
+_VERSION_PARSERS = {
+    "1.04.00": parse_v1,
+}
+
+# Bulk reader of each supported chart version
+_VERSION_READERS = {
+    "1.04.00": read_v1,
+}
+
+# Streaming reader of each supported chart version
+_VERSION_STREAMERS = {
+    "1.04.00": iter_v1,
+}
+
 
 class MaiMa2:
     """A class that represents a ma2 chart. Contains notes, bpm,
@@ -43,7 +58,7 @@ class MaiMa2:
         notes (list[MaiNote]): Contains notes of the chart.
         version (str): Required for ma2's header.Copied from
             official ma2 chart files.
-        notes_stat (dict[str, int]): Tracks total number of
+        stats (Ma2Statistics): Tracks total number of
             notes used by note type.
     """
 
@@ -74,56 +89,154 @@ class MaiMa2:
         self.notes: List[
             Union[TapNote, HoldNote, SlideNote, TouchTapNote, TouchHoldNote]
         ] = []
-        self.notes_stat = {
-            "NMTAP": 0,
-            "BRTAP": 0,
-            "EXTAP": 0,
-            "BXTAP": 0,
-            "NMHLD": 0,
-            "BRHLD": 0,
-            "EXHLD": 0,
-            "BXHLD": 0,
-            "NMSTR": 0,
-            "BRSTR": 0,
-            "EXSTR": 0,
-            "BXSTR": 0,
-            "NMTTP": 0,
-            "NMTHO": 0,
-            "SLD": 0,
-            "BSL": 0
-        }
+        self.stats = Ma2Statistics()
 
         # TODO: Remove these when the new Ma2 parser is finished
         self.version = ("0.00.00", version)
         self.resolution = 384
 
+    @property
+    def notes_stat(self) -> Ma2Statistics:
+        """Total number of notes used by note type, by note stat key.
+        Same as `stats`."""
+        return self.stats
+
+    def notes_changed(self) -> MaiMa2:
+        """Updates the note statistics of the chart. Call
+        after editing or moving notes directly instead of through the
+        chart's methods.
+
+        Examples:
+            Move every note of a chart by a quarter measure.
+
+            >>> for note in ma2.notes:
+            ...     note.measure += 0.25
+            >>> ma2.notes_changed()
+        """
+        self.stats.rebuild(self.notes)
+        return self
+
+    def _remove_notes(self, notes: Sequence[Ma2Note]) -> None:
+        for note in notes:
+            self.notes.remove(note)
+
+        try:
+            for note in notes:
+                self.stats.remove(note)
+        except ValueError:
+            # A note was moved without calling notes_changed
+            self.stats.rebuild(self.notes)
+
+    @classmethod
+    def open(
+            cls,
+            path: str,
+            encoding: str = "utf-8",
+            use_mmap: bool = False,
+            native_ticks: bool = False,
+    ) -> MaiMa2:
+        """Opens a ma2 file. The file is read once and parsed in bulk
+        with `from_str`.
+
+        Args:
+            path: The path of the ma2 file.
+            encoding: Text encoding of the file. Defaults to utf-8.
+            use_mmap: Whether to memory map the file instead of reading it.
+            native_ticks: Whether notes keep the file's integer tick timing.
+                See `from_str`.
+
+        Examples:
+            Open a ma2 file named "example.ma2" at current directory.
+
+            >>> ma2 = MaiMa2.open("./example.ma2")
+        """
+        if use_mmap and os.path.getsize(path) > 0:
+            with open(path, "rb") as in_f, mmap.mmap(
+                    in_f.fileno(), 0, access=mmap.ACCESS_READ
+            ) as buffer:
+                text = str(buffer, encoding)
+        else:
+            with open(path, "r", encoding=encoding) as in_f:
+                text = in_f.read()
+
+        return cls.from_str(text, native_ticks=native_ticks)
+
     @classmethod
-    def open(cls, path: str, encoding: str = "utf-8") -> MaiMa2:
+    def from_str(cls, text: str, native_ticks: bool = False) -> MaiMa2:
+        """Parses the text of a ma2 file.
+
+        Lines are split into tab separated values all at once, and notes are
+        built in batches by the reader of the chart's version. The result is
+        the same as calling `parse_line` on every line.
+
+        With native_ticks, notes also keep their start times, durations,
+        and delays as the file's integer ticks. Exporting at the same
+        resolution, or at resolutions the ticks rescale into exactly, and
+        offsets of whole ticks then keep the file's timing exactly. Notes
+        whose measure, duration, or delay are changed fall back to their
+        float timing.
+
+        Args:
+            text: The contents of a ma2 file.
+            native_ticks: Whether notes keep the file's integer tick timing.
+
+        Raises:
+            ValueError: When the chart's version is not supported.
+        """
         ma2 = cls()
-        with open(path, "r", encoding=encoding) as in_f:
-            for line in in_f:
-                if line in ["\n", "\r\n"]:
-                    continue
+        rows = [line.rstrip().split("\t") for line in text.splitlines()]
+        rows = [values for values in rows if values != [""]]
+
+        version = next((values for values in rows if values[0] == "VERSION"), None)
+        if version is not None:
+            version = (version[1], version[2])
+        else:
+            version = ma2.version
 
-                ma2.parse_line(line)
+        reader = _VERSION_READERS.get(version[1])
+        if reader is None:
+            raise ValueError(f"Unknown Ma2 version: {version}")
 
+        reader(ma2, rows, native_ticks=native_ticks)
         return ma2
 
     def parse_line(self, line: str) -> MaiMa2:
         # Ma2 notes are tab-separated so we make a list called values that contains all the info
         values = line.rstrip().split("\t")
-        line_type = values[0]
-        if line_type == "VERSION":
-            self.version = (values[1], values[2])
-        elif line_type == "FES_MODE":
-            self.fes_mode = values[1] == "1"
-        elif self.version[1] in ["1.04.00"]:
-            parse_v1(self, values)
-        else:
+        parser = _VERSION_PARSERS.get(self.version[1])
+        if parser is None:
             raise ValueError(f"Unknown Ma2 version: {self.version}")
 
+        parser(self, values)
         return self
 
+    def iter_notes(self, lines: Iterable[str]) -> Iterator[Ma2Note]:
+        """Reads the lines of a ma2 file one at a time.
+
+        Header and event lines, like BPM and meter changes, are read into
+        this chart as they come. Notes are yielded in file order instead
+        of being added, so a file can be read without holding its notes.
+
+        Args:
+            lines: Lines of a ma2 file, e.g. an open file object.
+
+        Raises:
+            ValueError: When the chart's version is not supported.
+
+        Examples:
+            Count the notes of a ma2 file named "example.ma2".
+
+            >>> ma2 = MaiMa2()
+            >>> with open("./example.ma2") as in_f:
+            ...     count = sum(1 for _ in ma2.iter_notes(in_f))
+        """
+        streamer = _VERSION_STREAMERS.get(self.version[1])
+        if streamer is None:
+            raise ValueError(f"Unknown Ma2 version: {self.version}")
+
+        rows = (line.rstrip().split("\t") for line in lines)
+        return streamer(self, (values for values in rows if values != [""]))
+
     def set_bpm(self, measure: float, bpm: float) -> MaiMa2:
         """Sets the bpm at given measure.
 
@@ -330,17 +443,7 @@ class MaiMa2:
             is_ex=is_ex,
         )
 
-        prefix = "NM"
-        if is_ex and is_break:
-            prefix = "BX"
-        elif is_ex:
-            prefix = "EX"
-        elif is_break:
-            prefix = "BR"
-
-        suffix = "STR" if is_star else "TAP"
-        self.notes_stat[prefix + suffix] += 1
-
+        self.stats.add(tap_note)
         self.notes.append(tap_note)
 
         return self
@@ -366,27 +469,7 @@ class MaiMa2:
                and math.isclose(x.measure, measure, abs_tol=0.0001)
                and x.position == position
         ]
-        for note in tap_notes:
-            is_ex = note.note_type in [NoteType.ex_tap, NoteType.ex_star]
-            is_break = note.note_type in [NoteType.break_tap, NoteType.break_star]
-            is_star = note.note_type in [
-                NoteType.star,
-                NoteType.ex_star,
-                NoteType.break_star,
-                NoteType.ex_break_star
-            ]
-            self.notes.remove(note)
-
-            prefix = "NM"
-            if is_ex and is_break:
-                prefix = "BX"
-            elif is_ex:
-                prefix = "EX"
-            elif is_break:
-                prefix = "BR"
-
-            suffix = "STR" if is_star else "TAP"
-            self.notes_stat[prefix + suffix] -= 1
+        self._remove_notes(tap_notes)
 
         return self
 
@@ -421,16 +504,7 @@ class MaiMa2:
         """
         hold_note = HoldNote(measure, position, duration, is_ex, is_break)
 
-        prefix = "NM"
-        if is_ex and is_break:
-            prefix = "BX"
-        elif is_ex:
-            prefix = "EX"
-        elif is_break:
-            prefix = "BR"
-
-        self.notes_stat[prefix + "HLD"] += 1
-
+        self.stats.add(hold_note)
         self.notes.append(hold_note)
 
         return self
@@ -458,20 +532,7 @@ class MaiMa2:
                and math.isclose(x.measure, measure, abs_tol=0.0001)
                and x.position == position
         ]
-        for note in hold_notes:
-            is_ex = note.note_type == NoteType.ex_hold or note.note_type == NoteType.ex_break_hold
-            is_break = note.note_type == NoteType.break_hold or note.note_type == NoteType.ex_break_hold
-            self.notes.remove(note)
-
-            prefix = "NM"
-            if is_ex and is_break:
-                prefix = "BX"
-            elif is_ex:
-                prefix = "EX"
-            elif is_break:
-                prefix = "BR"
-
-            self.notes_stat[prefix + "HLD"] += 1
+        self._remove_notes(hold_notes)
 
         return self
 
@@ -530,12 +591,7 @@ class MaiMa2:
             is_connect
         )
 
-        if not is_connect:
-            if is_break:
-                self.notes_stat["BSL"] += 1
-            else:
-                self.notes_stat["SLD"] += 1
-
+        self.stats.add(slide_note)
         self.notes.append(slide_note)
 
         return self
@@ -555,14 +611,7 @@ class MaiMa2:
                and x.end_position == end_position
         ]
 
-        is_break = self.notes[0].is_break
-
-        for note in slide_notes:
-            self.notes.remove(note)
-            if is_break:
-                self.notes_stat["BSL"] -= 1
-            else:
-                self.notes_stat["SLD"] -= 1
+        self._remove_notes(slide_notes)
 
         return self
 
@@ -594,7 +643,7 @@ class MaiMa2:
             >>> ma2.add_touch_tap(0.75, 1, "B", is_firework=True)
         """
         touch_tap = TouchTapNote(measure, position, region, is_firework, size)
-        self.notes_stat["NMTTP"] += 1
+        self.stats.add(touch_tap)
         self.notes.append(touch_tap)
 
         return self
@@ -608,9 +657,7 @@ class MaiMa2:
                and x.position == position
                and x.region == region
         ]
-        for note in touch_taps:
-            self.notes.remove(note)
-            self.notes_stat["NMTTP"] -= 1
+        self._remove_notes(touch_taps)
 
         return self
 
@@ -647,7 +694,7 @@ class MaiMa2:
         touch_tap = TouchHoldNote(
             measure, position, region, duration, is_firework, size
         )
-        self.notes_stat["NMTHO"] += 1
+        self.stats.add(touch_tap)
         self.notes.append(touch_tap)
 
         return self
@@ -666,74 +713,262 @@ class MaiMa2:
                and x.position == position
                and x.region == region
         ]
-        for note in touch_holds:
-            self.notes.remove(note)
-            self.notes_stat["NMTHO"] -= 1
+        self._remove_notes(touch_holds)
+
+        return self
+
+    def add_notes(
+            self,
+            notes: Iterable[Ma2Note],
+            slide_check: bool = True,
+    ) -> MaiMa2:
+        """Adds already built notes to the list of notes.
+
+        Faster than calling the add methods one note at a time. Every
+        slide is checked before any note is added, then the note totals
+        are updated and the notes are appended in one go.
+
+        Args:
+            notes: Ma2 notes, e.g. TapNote or SlideNote, to add in order.
+            slide_check: When set to true, will check validity of slides.
+
+        Raises:
+            ValueError: When a note is not a ma2 note, or when a slide is
+                invalid and slide_check is set.
 
+        Examples:
+            Add a tap note at measure 1 and a slide from button 1 to 5 at
+            measure 1.5.
+
+            >>> ma2 = MaiMa2()
+            >>> ma2.add_notes([TapNote(1, 0), SlideNote(1.5, 0, 4, 1, 0.5)])
+        """
+        notes = list(notes)
+        for note in notes:
+            if not isinstance(note, Ma2Note):
+                raise ValueError(f"Not a ma2 note: {note}")
+            if slide_check and isinstance(note, SlideNote):
+                check_slide(note.pattern, note.position, note.end_position)
+
+        self.stats.extend(notes)
+        self.notes.extend(notes)
         return self
 
+    def extend_from_columns(
+            self,
+            kinds: Sequence[str],
+            measures: Sequence[float],
+            positions: Sequence[int],
+            durations: Optional[Sequence[float]] = None,
+            end_positions: Optional[Sequence[int]] = None,
+            patterns: Optional[Sequence[int]] = None,
+            delays: Optional[Sequence[float]] = None,
+            is_break: Optional[Sequence[bool]] = None,
+            is_ex: Optional[Sequence[bool]] = None,
+            is_star: Optional[Sequence[bool]] = None,
+            is_connect: Optional[Sequence[bool]] = None,
+            regions: Optional[Sequence[str]] = None,
+            is_firework: Optional[Sequence[bool]] = None,
+            sizes: Optional[Sequence[str]] = None,
+            slide_check: bool = True,
+    ) -> MaiMa2:
+        """Adds notes given as parallel columns, one value per note.
+
+        Columns that don't apply to a kind of note are ignored for it, and
+        columns that aren't given use the same defaults as the add methods.
+        The notes are added with `add_notes`.
+
+        Args:
+            kinds: Kind of each note. One of "tap", "hold", "slide",
+                "touch_tap", or "touch_hold".
+            measures: Time when each note starts, in terms of measures.
+            positions: Button, start button of slides, or position in the
+                touch region of each note.
+            durations: Duration of holds, touch holds, and slides.
+            end_positions: Ending button of slides.
+            patterns: Numerical representation of the slide patterns.
+            delays: Slide delays. Defaults to 0.25.
+            is_break: Whether each note is a break note.
+            is_ex: Whether each note is an ex note.
+            is_star: Whether each tap note is a star note.
+            is_connect: Whether each slide is a connect slide.
+            regions: Touch region of touch notes. Defaults to "C".
+            is_firework: Whether each touch note produces fireworks.
+            sizes: Size of touch notes. Defaults to "M1".
+            slide_check: When set to true, will check validity of slides.
+
+        Raises:
+            ValueError: When a kind is unknown, a note is invalid, or a
+                given column doesn't have one value per kind.
+
+        Examples:
+            Add two taps and a hold.
+
+            >>> ma2 = MaiMa2()
+            >>> ma2.extend_from_columns(
+            ...     ["tap", "tap", "hold"], [1, 1, 2], [0, 4, 2], durations=[0, 0, 0.5]
+            ... )
+        """
+        count = len(kinds)
+
+        def column(name, values, default=None):
+            if values is None:
+                return itertools.repeat(default, count)
+            if len(values) != count:
+                raise ValueError(
+                    f"Column {name} has {len(values)} values, expected {count}"
+                )
+
+            return values
+
+        rows = zip(
+            kinds,
+            column("measures", measures),
+            column("positions", positions),
+            column("durations", durations, 0.0),
+            column("end_positions", end_positions, 0),
+            column("patterns", patterns, 0),
+            column("delays", delays, 0.25),
+            column("is_break", is_break, False),
+            column("is_ex", is_ex, False),
+            column("is_star", is_star, False),
+            column("is_connect", is_connect, False),
+            column("regions", regions, "C"),
+            column("is_firework", is_firework, False),
+            column("sizes", sizes, "M1"),
+        )
+
+        notes = []
+        for (kind, measure, position, duration, end_position, pattern, delay,
+             note_is_break, note_is_ex, note_is_star, note_is_connect,
+             region, note_is_firework, size) in rows:
+            if kind == "tap":
+                note = TapNote(measure, position, note_is_star, note_is_break, note_is_ex)
+            elif kind == "hold":
+                note = HoldNote(measure, position, duration, note_is_ex, note_is_break)
+            elif kind == "slide":
+                note = SlideNote(
+                    measure,
+                    position,
+                    end_position,
+                    pattern,
+                    duration,
+                    delay,
+                    note_is_break,
+                    note_is_ex,
+                    note_is_connect,
+                )
+            elif kind == "touch_tap":
+                note = TouchTapNote(measure, position, region, note_is_firework, size)
+            elif kind == "touch_hold":
+                note = TouchHoldNote(
+                    measure, position, region, duration, note_is_firework, size
+                )
+            else:
+                raise ValueError(f"Unknown note kind {kind}")
+
+            notes.append(note)
+
+        return self.add_notes(notes, slide_check=slide_check)
+
     def offset(self, offset: Union[float, str]) -> MaiMa2:
-        offset = offset_arg_to_measure(offset, self.second_to_measure)
+        # Notes with native ticks are moved by whole ticks
+        apply_offset(self, resolve_offset(offset, self))
 
-        for note in self.notes:
-            note.measure = round(note.measure + offset, 4)
+        return self
 
-        for bpm in self.bpms:
-            if 0 <= bpm.measure <= 1:
-                continue
+    def rescale_bpm(self, bpm: float) -> MaiMa2:
+        """Rewrites the chart so its starting BPM becomes the given BPM while
+        keeping every note's timing in seconds.
 
-            bpm.measure = round(bpm.measure + offset, 4)
+        Every BPM event is multiplied by the same factor, and measures of
+        notes, BPM and meter events, durations, and delays are scaled in
+        place. Events at measure 0 stay at the start of the chart.
 
-        for meter in self.meters:
-            if 0 <= meter.measure <= 1:
-                continue
+        Args:
+            bpm: The new starting BPM of the chart.
+
+        Raises:
+            ValueError: When bpm is not positive, or there is no
+                starting BPM defined.
+
+        Examples:
+            Rewrite a chart that starts at 120 BPM and changes to 180 BPM
+            at measure 3 in double time.
+
+            >>> ma2 = MaiMa2()
+            >>> ma2.set_bpm(0, 120).set_bpm(3, 180)
+            >>> ma2.rescale_bpm(240)
+            >>> ma2.get_bpm(6)
+            360.0
+        """
+        if bpm <= 0:
+            raise ValueError(f"BPM is not positive: {bpm}")
+
+        scale = bpm / self.get_bpm(0.0)
+        for note in self.notes:
+            note.measure = round(note.measure * scale, 4)
+            if isinstance(note, (HoldNote, TouchHoldNote, SlideNote)):
+                note.duration = round(note.duration * scale, 4)
+            if isinstance(note, SlideNote):
+                note.delay = round(note.delay * scale, 4)
 
-            meter.measure = round(meter.measure + offset, 4)
+        for bpm_event in self.bpms:
+            bpm_event.bpm *= scale
+            bpm_event.measure = round(bpm_event.measure * scale, 4)
+
+        for meter in self.meters:
+            meter.measure = round(meter.measure * scale, 4)
 
+        self.notes_changed()
         return self
 
     def measure_to_second(self, measure: float) -> float:
-        bpms = [(bpm.measure, bpm.bpm) for bpm in self.bpms]
-
-        return measure_to_second(measure, bpms)
+        return TempoMap.from_chart(self).measure_to_second(measure)
 
     def second_to_measure(self, seconds: float) -> float:
-        bpms = [(bpm.measure, bpm.bpm) for bpm in self.bpms]
-
-        return second_to_measure(seconds, bpms)
+        return TempoMap.from_chart(self).second_to_measure(seconds)
 
     def get_bpm_statistic(self) -> Tuple[float, float, float, float]:
         """Reads all the BPM defined and provides statistics.
 
+        The mode BPM is the BPM that lasts the most measures
+        until the last note of the chart, or until the last BPM
+        event when there are no notes.
+
         Returns:
             A tuple of floats representing BPMs:
              (STARTING, MODE, HIGHEST, LOWEST)
 
         Raises:
-            Exception: If there are no BPM events defined.
+            ValueError: If there are no BPM events or no
+                starting BPM defined.
         """
         if len(self.bpms) == 0:
             raise ValueError("No BPMs defined.")
+        if not any(0.0 <= x.measure <= 1.0 for x in self.bpms):
+            raise ValueError("No starting BPM defined")
 
-        self.bpms.sort(key=lambda x: x.measure)
-        bpm_list = [bpm.bpm for bpm in self.bpms]
+        bpms = sorted(self.bpms, key=lambda x: x.measure)
+        last_measure = max(
+            (note.measure for note in self.notes), default=bpms[-1].measure
+        )
 
-        starting_bpm = self.get_bpm(0.0)
+        starting_bpm = bpms[0].bpm
         mode_bpm = starting_bpm
-        highest_bpm = max(bpm_list)
-        lowest_bpm = min(bpm_list)
-
+        highest_bpm = starting_bpm
+        lowest_bpm = starting_bpm
         bpm_duration = defaultdict(lambda: 0.0)
 
-        last_measure = max([note.measure for note in self.notes])
-        for i, bpm in enumerate(self.bpms):
-            current_measure = bpm.measure
+        next_measures = [bpm.measure for bpm in bpms[1:]] + [last_measure]
+        for bpm, next_measure in zip(bpms, next_measures):
             bpm_value = bpm.bpm
-            if i == len(self.bpms) - 1:
-                bpm_duration[bpm_value] += last_measure - current_measure
-            else:
-                bpm_duration[bpm_value] += self.bpms[i + 1].measure - current_measure
+            if bpm_value > highest_bpm:
+                highest_bpm = bpm_value
+            if bpm_value < lowest_bpm:
+                lowest_bpm = bpm_value
 
+            bpm_duration[bpm_value] += next_measure - bpm.measure
             if bpm_duration[bpm_value] > bpm_duration[mode_bpm]:
                 mode_bpm = bpm_value
 
@@ -779,78 +1014,54 @@ class MaiMa2:
             the chart. Second part is about score related information.
 
         """
-        result = ""
-        total_notes = 0
-        for note_type in self.notes_stat:
-            total_notes += self.notes_stat[note_type]
-            result += "T_REC_{}\t{}\n".format(NOTE_REC_MAPPING[note_type], self.notes_stat[note_type])
-        result += "T_REC_ALL\t{}\n".format(total_notes)
-
-        num_taps = sum(
-            [self.notes_stat[i] for i in ["NMTAP", "EXTAP", "NMSTR", "EXSTR", "NMTTP"]]
-        )
-        num_breaks = self.notes_stat["BRTAP"] + self.notes_stat["BRSTR"] + self.notes_stat["BXTAP"] + self.notes_stat[
-            "BXSTR"]
-        num_holds = sum([self.notes_stat[i] for i in ["NMHLD", "EXHLD", "BXHLD", "NMTHO"]])
-        num_slides = self.notes_stat["SLD"]
-
-        result += "T_NUM_TAP\t{}\n".format(num_taps)
-        result += "T_NUM_BRK\t{}\n".format(num_breaks)
-        result += "T_NUM_HLD\t{}\n".format(num_holds)
-        result += "T_NUM_SLD\t{}\n".format(num_slides)
-        result += "T_NUM_ALL\t{}\n".format(total_notes)
-
-        judge_taps = num_taps + num_breaks
-        judge_holds = round(num_holds * 1.75)
-        judge_all = judge_taps + judge_holds + num_slides
-        result += "T_JUDGE_TAP\t{}\n".format(judge_taps)
-        result += "T_JUDGE_HLD\t{}\n".format(judge_holds)
-        result += "T_JUDGE_SLD\t{}\n".format(num_slides)
-        result += "T_JUDGE_ALL\t{}\n".format(judge_all)
-
-        taps = [
-            note.measure
-            for note in self.notes
-            if isinstance(note, (TapNote, HoldNote, TouchTapNote, TouchHoldNote))
-        ]
-        measures = set(taps)
-        num_eachpairs = 0
-
-        for measure in measures:
-            if taps.count(measure) > 1:
-                num_eachpairs += 1
-
-        result += "TTM_EACHPAIRS\t{}\n".format(num_eachpairs)
-
-        # From https://docs.google.com/document/d/1gQlxtxOj-E3H2SClJH5PNxLnG6eBufDFrw2yLsffbp0
-        total_max_score_tap = 500 * num_taps
-        total_max_score_break = 2600 * num_breaks
-        total_max_score_hold = 1000 * num_holds
-        total_max_score_slide = 1500 * num_slides
-        total_max_score = (
-                total_max_score_tap
-                + total_max_score_break
-                + total_max_score_hold
-                + total_max_score_slide
-        )
-        result += "TTM_SCR_TAP\t{}\n".format(total_max_score_tap)
-        result += "TTM_SCR_BRK\t{}\n".format(total_max_score_break)
-        result += "TTM_SCR_HLD\t{}\n".format(total_max_score_hold)
-        result += "TTM_SCR_SLD\t{}\n".format(total_max_score_slide)
-        result += "TTM_SCR_ALL\t{}\n".format(total_max_score)
-        total_base_score = (
-                total_max_score_tap
-                + total_max_score_hold
-                + total_max_score_slide
-                + 2500 * num_breaks
-        )
-        max_finale_achievement = int(10000 * total_max_score / total_base_score)
-        total_max_score_s = round(0.97 * total_base_score / 100) * 100
-        total_max_score_ss = total_base_score
-        result += "TTM_SCR_S\t{}\n".format(total_max_score_s)
-        result += "TTM_SCR_SS\t{}\n".format(total_max_score_ss)
-        result += "TTM_RAT_ACV\t{}\n".format(max_finale_achievement)
-        return result
+        if self.stats.size != len(self.notes):
+            # Notes were added or removed directly
+            self.stats.rebuild(self.notes)
+
+        return self.stats.get_epilog()
+
+    def sort_notes(self) -> MaiMa2:
+        """Sorts notes in the order they're written in a ma2 file. Notes
+        that are already in order are sorted in a single pass.
+        """
+        self.notes.sort(key=note_sort_key)
+
+        return self
+
+    def export_to(self, fp: TextIO, resolution: int = 384) -> MaiMa2:
+        """Writes a ma2 text from all the notes and events defined to a
+        file object. Sections are written as they're generated and notes
+        are written in chunks, so the full text is never held in memory.
+
+        Args:
+            fp: A text file object to write to.
+            resolution: Number of ticks in a measure.
+
+        Examples:
+            Write a ma2 chart to "example.ma2".
+
+            >>> with open("example.ma2", "w", newline="\\r\\n", encoding="utf-8") as out:
+            ...     ma2.export_to(out)
+        """
+        # Header
+        fp.write(self.get_header(resolution=resolution))
+        fp.write("\n")
+
+        # BPM and meters
+        self.bpms.sort(key=lambda x: x.measure)
+        write_lines(fp, (bpm.to_str(resolution) for bpm in self.bpms))
+        fp.write("\n")
+        self.meters.sort(key=lambda x: x.measure)
+        write_lines(fp, (meter.to_str(resolution) for meter in self.meters))
+        fp.write("\n\n")
+
+        self.sort_notes()
+        write_lines(fp, (note.to_str(resolution=resolution) for note in self.notes))
+
+        fp.write("\n")
+        fp.write(self.get_epilog())
+        fp.write("\n")
+        return self
 
     def export(self, resolution: int = 384) -> str:
         """Generates a ma2 text from all the notes and events defined.
@@ -860,24 +1071,20 @@ class MaiMa2:
             string is a complete and functioning ma2 text and should
             be stored as-is in a text file with a .ma2 file extension.
         """
-        # Header
-        result = self.get_header(resolution=resolution)
-        result += "\n"
+        out = io.StringIO()
+        self.export_to(out, resolution=resolution)
+        return out.getvalue()
 
-        # BPM and meters
-        self.bpms.sort(key=lambda x: x.measure)
-        result += "\n".join([bpm.to_str(resolution) for bpm in self.bpms]) + "\n"
-        self.meters.sort(key=lambda x: x.measure)
-        result += "\n".join([meter.to_str(resolution) for meter in self.meters]) + "\n"
-        result += "\n"
 
-        self.notes.sort(key=functools.cmp_to_key(sort_note))
-        result += "\n".join([note.to_str(resolution=resolution) for note in self.notes])
+def note_sort_key(note) -> Tuple[float, int]:
+    """Sort key of ma2 notes. Notes are ordered by measure. At the same measure,
+    slides come after other notes and connect slides come after other slides.
+    A total ordering consistent with `sort_note`.
+    """
+    if note.note_type == NoteType.complete_slide:
+        return note.measure, 2 if note.is_connect else 1
 
-        result += "\n"
-        result += self.get_epilog()
-        result += "\n"
-        return result
+    return note.measure, 0
 
 
 def sort_note(note1, note2):
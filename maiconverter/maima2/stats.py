@@ -0,0 +1,299 @@
+from __future__ import annotations
+
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from maiconverter.event import NoteType, NOTE_REC_MAPPING
+from maiconverter.tool import SimultaneousIndex
+
+# Note stat keys in the order they're written in the epilog
+STAT_KEYS = (
+    "NMTAP",
+    "BRTAP",
+    "EXTAP",
+    "BXTAP",
+    "NMHLD",
+    "BRHLD",
+    "EXHLD",
+    "BXHLD",
+    "NMSTR",
+    "BRSTR",
+    "EXSTR",
+    "BXSTR",
+    "NMTTP",
+    "NMTHO",
+    "SLD",
+    "BSL",
+)
+
+# Index of each note stat key in the counters
+STAT_INDEX: Dict[str, int] = {key: i for i, key in enumerate(STAT_KEYS)}
+
+_NOTE_TYPE_INDEX: Dict[NoteType, int] = {
+    NoteType.tap: STAT_INDEX["NMTAP"],
+    NoteType.break_tap: STAT_INDEX["BRTAP"],
+    NoteType.ex_tap: STAT_INDEX["EXTAP"],
+    NoteType.ex_break_tap: STAT_INDEX["BXTAP"],
+    NoteType.hold: STAT_INDEX["NMHLD"],
+    NoteType.break_hold: STAT_INDEX["BRHLD"],
+    NoteType.ex_hold: STAT_INDEX["EXHLD"],
+    NoteType.ex_break_hold: STAT_INDEX["BXHLD"],
+    NoteType.star: STAT_INDEX["NMSTR"],
+    NoteType.break_star: STAT_INDEX["BRSTR"],
+    NoteType.ex_star: STAT_INDEX["EXSTR"],
+    NoteType.ex_break_star: STAT_INDEX["BXSTR"],
+    NoteType.touch_tap: STAT_INDEX["NMTTP"],
+    NoteType.touch_hold: STAT_INDEX["NMTHO"],
+}
+
+_TAP_INDICES = [STAT_INDEX[key] for key in ["NMTAP", "EXTAP", "NMSTR", "EXSTR", "NMTTP"]]
+_BREAK_INDICES = [STAT_INDEX[key] for key in ["BRTAP", "BRSTR", "BXTAP", "BXSTR"]]
+_HOLD_INDICES = [STAT_INDEX[key] for key in ["NMHLD", "EXHLD", "BXHLD", "NMTHO"]]
+_SLIDE_INDEX = STAT_INDEX["SLD"]
+_BREAK_SLIDE_INDEX = STAT_INDEX["BSL"]
+
+
+def stat_index(note: Any) -> Optional[int]:
+    """Returns the index of the note stat counter a ma2 note counts towards.
+    Connect slides are not counted and return None.
+    """
+    if note.note_type == NoteType.complete_slide:
+        if note.is_connect:
+            return None
+
+        return _BREAK_SLIDE_INDEX if note.is_break else _SLIDE_INDEX
+
+    return _NOTE_TYPE_INDEX[note.note_type]
+
+
+class Ma2Statistics(Mapping):
+    """Note counts of a ma2 chart and the summary written at the end
+    of a ma2 file.
+
+    Counters are kept in a list indexed by STAT_INDEX and are updated
+    in constant time when a note is added or removed. Simultaneous tap,
+    hold, and touch notes are tracked as notes are added, so the
+    summary is generated without going through the chart's notes.
+
+    Reading and writing a count by its note stat key, e.g. stats["NMTAP"],
+    works the same as the old notes_stat dictionary.
+
+    Note:
+        The statistics track notes by their measure. Call `rebuild`, or
+        the chart's `notes_changed`, after moving notes of a chart.
+
+        Statistics that another chart's statistics were merged into only
+        hold counts. Notes can't be added to or removed from them, and
+        they can't be copied, until they're rebuilt.
+
+    Attributes:
+        counts (list[int]): Number of notes of each note stat key.
+        eachpairs (int): Number of times two or more tap, hold, or touch
+            notes happen within the tolerance of a `SimultaneousIndex`.
+        size (int): Number of notes counted, including connect slides.
+
+    Examples:
+        Total note counts of several charts.
+
+        >>> total = Ma2Statistics()
+        >>> for ma2 in charts:
+        ...     total.merge(ma2.stats)
+        >>> total["NMTAP"]
+    """
+
+    def __init__(self, notes: Iterable[Any] = ()) -> None:
+        self.counts: List[int] = [0] * len(STAT_KEYS)
+        self.eachpairs = 0
+        self.size = 0
+        # None once other statistics were merged in
+        self._simultaneous: Optional[SimultaneousIndex] = SimultaneousIndex()
+        self.extend(notes)
+
+    def _check_not_merged(self) -> None:
+        if self._simultaneous is None:
+            raise ValueError("Merged statistics only hold counts")
+
+    def add(self, note: Any) -> Ma2Statistics:
+        """Counts a note added to the chart.
+
+        Raises:
+            ValueError: When other statistics were merged into these.
+        """
+        self._check_not_merged()
+        index = stat_index(note)
+        if index is not None:
+            self.counts[index] += 1
+        self.size += 1
+
+        if note.note_type != NoteType.complete_slide:
+            self._simultaneous.add(note)
+            if self._simultaneous.count_at(note.measure) == 2:
+                self.eachpairs += 1
+
+        return self
+
+    def extend(self, notes: Iterable[Any]) -> Ma2Statistics:
+        """Counts several notes added to the chart."""
+        for note in notes:
+            self.add(note)
+
+        return self
+
+    def remove(self, note: Any) -> Ma2Statistics:
+        """Uncounts a note removed from the chart.
+
+        Raises:
+            ValueError: When the note was moved since it was counted, or
+                other statistics were merged into these.
+        """
+        self._check_not_merged()
+        index = stat_index(note)
+        if index is not None:
+            self.counts[index] -= 1
+        self.size -= 1
+
+        if note.note_type != NoteType.complete_slide:
+            if self._simultaneous.count_at(note.measure) == 2:
+                self.eachpairs -= 1
+            self._simultaneous.remove(note)
+
+        return self
+
+    def rebuild(self, notes: Iterable[Any]) -> Ma2Statistics:
+        """Recounts every note. Used after notes were moved."""
+        self.counts = [0] * len(STAT_KEYS)
+        self.eachpairs = 0
+        self.size = 0
+        self._simultaneous = SimultaneousIndex()
+        return self.extend(notes)
+
+    def merge(self, other: Ma2Statistics) -> Ma2Statistics:
+        """Adds the counts of another chart's statistics. Used for totals
+        across several charts.
+
+        Notes of different charts are never simultaneous, so each pairs
+        are added up too. The result only holds counts, see the note of
+        the class.
+        """
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.eachpairs += other.eachpairs
+        self.size += other.size
+        self._simultaneous = None
+        return self
+
+    def copy(self) -> Ma2Statistics:
+        """Returns statistics that follow notes added to and removed from
+        a copy of the chart.
+
+        Raises:
+            ValueError: When other statistics were merged into these.
+        """
+        self._check_not_merged()
+        result = Ma2Statistics()
+        result.counts = list(self.counts)
+        result.eachpairs = self.eachpairs
+        result.size = self.size
+        for group in self._simultaneous.groups():
+            for note in group:
+                result._simultaneous.add(note)
+
+        return result
+
+    def __add__(self, other: Ma2Statistics) -> Ma2Statistics:
+        return Ma2Statistics().merge(self).merge(other)
+
+    def __getitem__(self, key: str) -> int:
+        return self.counts[STAT_INDEX[key]]
+
+    def __setitem__(self, key: str, value: int) -> None:
+        self.counts[STAT_INDEX[key]] = value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(STAT_KEYS)
+
+    def __len__(self) -> int:
+        return len(STAT_KEYS)
+
+    def __repr__(self) -> str:
+        return f"Ma2Statistics({dict(self)}, eachpairs={self.eachpairs})"
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts)
+
+    @property
+    def num_taps(self) -> int:
+        return sum(self.counts[i] for i in _TAP_INDICES)
+
+    @property
+    def num_breaks(self) -> int:
+        return sum(self.counts[i] for i in _BREAK_INDICES)
+
+    @property
+    def num_holds(self) -> int:
+        return sum(self.counts[i] for i in _HOLD_INDICES)
+
+    @property
+    def num_slides(self) -> int:
+        return self.counts[_SLIDE_INDEX]
+
+    def get_epilog(self) -> str:
+        """Returns the summary of all notes and score information
+        written at the end of a ma2 file.
+        """
+        result = ""
+        for key, count in zip(STAT_KEYS, self.counts):
+            result += "T_REC_{}\t{}\n".format(NOTE_REC_MAPPING[key], count)
+        total_notes = self.total
+        result += "T_REC_ALL\t{}\n".format(total_notes)
+
+        num_taps = self.num_taps
+        num_breaks = self.num_breaks
+        num_holds = self.num_holds
+        num_slides = self.num_slides
+
+        result += "T_NUM_TAP\t{}\n".format(num_taps)
+        result += "T_NUM_BRK\t{}\n".format(num_breaks)
+        result += "T_NUM_HLD\t{}\n".format(num_holds)
+        result += "T_NUM_SLD\t{}\n".format(num_slides)
+        result += "T_NUM_ALL\t{}\n".format(total_notes)
+
+        judge_taps = num_taps + num_breaks
+        judge_holds = round(num_holds * 1.75)
+        judge_all = judge_taps + judge_holds + num_slides
+        result += "T_JUDGE_TAP\t{}\n".format(judge_taps)
+        result += "T_JUDGE_HLD\t{}\n".format(judge_holds)
+        result += "T_JUDGE_SLD\t{}\n".format(num_slides)
+        result += "T_JUDGE_ALL\t{}\n".format(judge_all)
+
+        result += "TTM_EACHPAIRS\t{}\n".format(self.eachpairs)
+
+        # From https://docs.google.com/document/d/1gQlxtxOj-E3H2SClJH5PNxLnG6eBufDFrw2yLsffbp0
+        total_max_score_tap = 500 * num_taps
+        total_max_score_break = 2600 * num_breaks
+        total_max_score_hold = 1000 * num_holds
+        total_max_score_slide = 1500 * num_slides
+        total_max_score = (
+                total_max_score_tap
+                + total_max_score_break
+                + total_max_score_hold
+                + total_max_score_slide
+        )
+        result += "TTM_SCR_TAP\t{}\n".format(total_max_score_tap)
+        result += "TTM_SCR_BRK\t{}\n".format(total_max_score_break)
+        result += "TTM_SCR_HLD\t{}\n".format(total_max_score_hold)
+        result += "TTM_SCR_SLD\t{}\n".format(total_max_score_slide)
+        result += "TTM_SCR_ALL\t{}\n".format(total_max_score)
+        total_base_score = (
+                total_max_score_tap
+                + total_max_score_hold
+                + total_max_score_slide
+                + 2500 * num_breaks
+        )
+        max_finale_achievement = int(10000 * total_max_score / total_base_score)
+        total_max_score_s = round(0.97 * total_base_score / 100) * 100
+        total_max_score_ss = total_base_score
+        result += "TTM_SCR_S\t{}\n".format(total_max_score_s)
+        result += "TTM_SCR_SS\t{}\n".format(total_max_score_ss)
+        result += "TTM_RAT_ACV\t{}\n".format(max_finale_achievement)
+        return result
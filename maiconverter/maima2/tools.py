@@ -1,108 +1,444 @@
-from typing import List
-
-from .ma2note import note_dict, slide_dict
-
-_ignored_v1 = [
-    "VERSION",
-    "FES_MODE",
-    "BPM_DEF",
-    "MET_DEF",
-    "CLK_DEF",
-    "CLK",
-    "COMPATIBLE_CODE",
-    "T_REC_TAP",
-    "T_REC_BRK",
-    "T_REC_XTP",
-    "T_REC_HLD",
-    "T_REC_XHO",
-    "T_REC_STR",
-    "T_REC_BST",
-    "T_REC_XST",
-    "T_REC_TTP",
-    "T_REC_THO",
-    "T_REC_SLD",
-    "T_REC_ALL",
-    "T_NUM_TAP",
-    "T_NUM_BRK",
-    "T_NUM_HLD",
-    "T_NUM_SLD",
-    "T_NUM_ALL",
-    "T_JUDGE_TAP",
-    "T_JUDGE_HLD",
-    "T_JUDGE_SLD",
-    "T_JUDGE_ALL",
-    "TTM_EACHPAIRS",
-    "TTM_SCR_TAP",
-    "TTM_SCR_BRK",
-    "TTM_SCR_HLD",
-    "TTM_SCR_SLD",
-    "TTM_SCR_ALL",
-    "TTM_SCR_S",
-    "TTM_SCR_SS",
-    "TTM_RAT_ACV",
-]
+import functools
+from typing import List, Dict, Callable, Tuple, Optional, Any, Iterable, Iterator
+
+from .ma2note import (
+    TapNote,
+    HoldNote,
+    SlideNote,
+    TouchTapNote,
+    TouchHoldNote,
+    slide_dict,
+    check_slide,
+    TickTable,
+)
+from maiconverter.event import NOTE_REC_MAPPING
+
+_ignored_v1 = frozenset(
+    [
+        "BPM_DEF",
+        "MET_DEF",
+        "CLK_DEF",
+        "CLK",
+        "COMPATIBLE_CODE",
+        "T_REC_TAP",
+        "T_REC_BRK",
+        "T_REC_XTP",
+        "T_REC_HLD",
+        "T_REC_XHO",
+        "T_REC_STR",
+        "T_REC_BST",
+        "T_REC_XST",
+        "T_REC_TTP",
+        "T_REC_THO",
+        "T_REC_SLD",
+        "T_REC_ALL",
+        "T_NUM_TAP",
+        "T_NUM_BRK",
+        "T_NUM_HLD",
+        "T_NUM_SLD",
+        "T_NUM_ALL",
+        "T_JUDGE_TAP",
+        "T_JUDGE_HLD",
+        "T_JUDGE_SLD",
+        "T_JUDGE_ALL",
+        "TTM_EACHPAIRS",
+        "TTM_SCR_TAP",
+        "TTM_SCR_BRK",
+        "TTM_SCR_HLD",
+        "TTM_SCR_SLD",
+        "TTM_SCR_ALL",
+        "TTM_SCR_S",
+        "TTM_SCR_SS",
+        "TTM_RAT_ACV",
+    ]
+    + [f"T_REC_{rec}" for rec in NOTE_REC_MAPPING.values()]
+)
 
 
 def parse_v1(ma2, values: List[str]) -> None:
-    """Ma2 line parser for versions 1.02.00 and 1.03.00 currently."""
-    # For notes and events, the first value is a 3-character text
-    line_type = values[0]
-    # Create a list of all valid ma2 note and slide types
-    if line_type in _ignored_v1:
-        # Ignore some parts of the header and all summary statistics lines
+    """Ma2 line parser for version 1.04.00 and older note names."""
+    # For notes and events, the first value is the line tag
+    handler = _handlers_v1.get(values[0])
+    if handler is None:
+        print(f"Warning: Ignoring unknown line type {values[0]}")
         return
-    if line_type == "RESOLUTION":
-        # Set the max number of ticks in a measure
-        ma2._resolution = int(values[1])
-    elif line_type == "BPM":
-        # Set the BPM for a measure
-        measure = float(values[1]) + float(values[2]) / ma2.resolution
-        bpm = float(values[3])
-        ma2.set_bpm(measure, bpm)
-    elif line_type == "MET":
-        # Set MET event
-        measure = float(values[1]) + float(values[2]) / ma2.resolution
-        ma2.set_meter(measure, int(values[3]), int(values[4]))
-    elif line_type in list(note_dict.keys()):
-        _handle_notes_v1(ma2, values)
-    elif line_type in list(slide_dict.keys()):
-        _handle_slides_v1(ma2, values)
-    else:
-        print(f"Warning: Ignoring unknown line type {line_type}")
-
-
-def _handle_notes_v1(ma2, values: List[str]) -> None:
-    line_type = values[0]
-    measure = float(values[1]) + float(values[2]) / ma2.resolution
-    position = int(values[3])
-    if line_type in ["TAP", "BRK", "XTP", "STR", "BST", "XST"]:
-        is_break = line_type in ["BRK", "BST"]
-        is_ex = line_type in ["XTP", "XST"]
-        is_star = line_type in ["STR", "BST", "XST"]
-        ma2.add_tap(measure, position, is_break, is_star, is_ex)
-    elif line_type in ["XHO", "HLD"]:
-        is_ex = line_type == "XHO"
-        duration = float(values[4]) / ma2.resolution
-        ma2.add_hold(measure, position, duration, is_ex)
-    elif line_type == "TTP":
-        region = values[4]
-        is_firework = values[5] == "1"
-        size = values[6] if len(values) > 6 else "M1"
-        ma2.add_touch_tap(measure, position, region, is_firework, size)
-    elif line_type == "THO":
-        duration = float(values[4]) / ma2.resolution
-        region = values[5]
-        is_firework = values[6] == "1"
-        size = values[7] if len(values) > 7 else "M1"
-        ma2.add_touch_hold(measure, position, region, duration, is_firework, size)
-
-
-def _handle_slides_v1(ma2, values: List[str]) -> None:
-    line_type = values[0]
-    pattern = slide_dict[line_type]
-    measure = float(values[1]) + float(values[2]) / ma2.resolution
+
+    handler(ma2, values)
+
+
+def read_v1(ma2, rows: List[List[str]], native_ticks: bool = False) -> None:
+    """Bulk ma2 reader for version 1.04.00 and older note names.
+
+    Header and event lines are handled in file order. Note lines are grouped
+    by tag and by the chart's resolution at that line, and built in batches
+    once the whole file is read. Notes keep their file order and the result
+    is the same as feeding each line to `parse_v1`.
+
+    Args:
+        ma2: The MaiMa2 object the lines are read into.
+        rows: Tab separated values of every non-empty line.
+        native_ticks: Whether notes keep their integer tick timing.
+    """
+    groups: Dict[Tuple[str, int], Tuple[List[int], List[List[str]]]] = {}
+    for index, values in enumerate(rows):
+        tag = values[0]
+        if tag in _note_tags_v1:
+            indices, group = groups.setdefault((tag, ma2.resolution), ([], []))
+            indices.append(index)
+            group.append(values)
+        else:
+            parse_v1(ma2, values)
+
+    notes: List[Any] = [None] * len(rows)
+    for (tag, resolution), (indices, group) in groups.items():
+        kind, flags = _note_tags_v1[tag]
+        built = _builders_v1[kind](TickTable.get(resolution), group, **flags)
+        if native_ticks:
+            _set_native_ticks_v1(kind, resolution, built, group)
+
+        for index, note in zip(indices, built):
+            notes[index] = note
+
+    # Slides were checked by their builder
+    ma2.add_notes((note for note in notes if note is not None), slide_check=False)
+
+
+def iter_v1(ma2, rows: Iterable[List[str]]) -> Iterator[Any]:
+    """Streaming ma2 reader for version 1.04.00 and older note names.
+
+    Header and event lines are handled as they're read. Note lines are
+    built one at a time with the chart's resolution at that line, and
+    yielded in file order instead of being added to the chart.
+
+    Args:
+        ma2: The MaiMa2 object header and event lines are read into.
+        rows: Tab separated values of every non-empty line.
+
+    Yields:
+        The notes of the chart.
+    """
+    for values in rows:
+        note_tag = _note_tags_v1.get(values[0])
+        if note_tag is None:
+            parse_v1(ma2, values)
+            continue
+
+        kind, flags = note_tag
+        yield _builders_v1[kind](TickTable.get(ma2.resolution), [values], **flags)[0]
+
+
+def _handle_ignored_v1(ma2, values: List[str]) -> None:
+    # Some parts of the header and all summary statistics lines
+    return
+
+
+def _handle_version_v1(ma2, values: List[str]) -> None:
+    ma2.version = (values[1], values[2])
+
+
+def _handle_fes_mode_v1(ma2, values: List[str]) -> None:
+    ma2.fes_mode = values[1] == "1"
+
+
+def _handle_resolution_v1(ma2, values: List[str]) -> None:
+    # Set the max number of ticks in a measure
+    ma2.resolution = int(values[1])
+
+
+def _handle_bpm_v1(ma2, values: List[str]) -> None:
+    # Set the BPM for a measure
+    measure = TickTable.get(ma2.resolution).to_measure(int(values[1]), int(values[2]))
+    ma2.set_bpm(measure, float(values[3]))
+
+
+def _handle_meter_v1(ma2, values: List[str]) -> None:
+    measure = TickTable.get(ma2.resolution).to_measure(int(values[1]), int(values[2]))
+    ma2.set_meter(measure, int(values[3]), int(values[4]))
+
+
+def _handle_tap_v1(
+    ma2, values: List[str], is_break: bool, is_star: bool, is_ex: bool
+) -> None:
+    measure = TickTable.get(ma2.resolution).to_measure(int(values[1]), int(values[2]))
+    ma2.add_tap(measure, int(values[3]), is_break, is_star, is_ex)
+
+
+def _handle_hold_v1(ma2, values: List[str], is_break: bool, is_ex: bool) -> None:
+    table = TickTable.get(ma2.resolution)
+    measure = table.to_measure(int(values[1]), int(values[2]))
+    duration = table.to_duration(int(values[4]))
+    ma2.add_hold(measure, int(values[3]), duration, is_ex, is_break)
+
+
+def _handle_touch_tap_v1(ma2, values: List[str]) -> None:
+    measure = TickTable.get(ma2.resolution).to_measure(int(values[1]), int(values[2]))
+    region = values[4]
+    is_firework = values[5] == "1"
+    size = values[6] if len(values) > 6 else "M1"
+    ma2.add_touch_tap(measure, int(values[3]), region, is_firework, size)
+
+
+def _handle_touch_hold_v1(ma2, values: List[str]) -> None:
+    table = TickTable.get(ma2.resolution)
+    measure = table.to_measure(int(values[1]), int(values[2]))
+    duration = table.to_duration(int(values[4]))
+    region = values[5]
+    is_firework = values[6] == "1"
+    size = values[7] if len(values) > 7 else "M1"
+    ma2.add_touch_hold(measure, int(values[3]), region, duration, is_firework, size)
+
+
+def _handle_slide_v1(
+    ma2,
+    values: List[str],
+    pattern: int,
+    is_break: bool,
+    is_ex: bool,
+    is_connect: bool,
+) -> None:
+    table = TickTable.get(ma2.resolution)
+    measure = table.to_measure(int(values[1]), int(values[2]))
     start_position = int(values[3])
-    delay = int(values[4]) / ma2.resolution
-    duration = int(values[5]) / ma2.resolution
+    delay = table.to_duration(int(values[4]))
+    duration = table.to_duration(int(values[5]))
     end_position = int(values[6])
-    ma2.add_slide(measure, start_position, end_position, duration, pattern, delay)
+    ma2.add_slide(
+        measure,
+        start_position,
+        end_position,
+        duration,
+        pattern,
+        delay,
+        is_break=is_break,
+        is_ex=is_ex,
+        is_connect=is_connect,
+    )
+
+
+def _build_taps_v1(
+    table: TickTable,
+    rows: List[List[str]],
+    is_break: bool,
+    is_star: bool,
+    is_ex: bool,
+) -> List[TapNote]:
+    to_measure = table.to_measure
+    return [
+        TapNote(
+            measure=to_measure(int(values[1]), int(values[2])),
+            position=int(values[3]),
+            is_star=is_star,
+            is_break=is_break,
+            is_ex=is_ex,
+        )
+        for values in rows
+    ]
+
+
+def _build_holds_v1(
+    table: TickTable, rows: List[List[str]], is_break: bool, is_ex: bool
+) -> List[HoldNote]:
+    to_measure = table.to_measure
+    to_duration = table.to_duration
+    return [
+        HoldNote(
+            to_measure(int(values[1]), int(values[2])),
+            int(values[3]),
+            to_duration(int(values[4])),
+            is_ex,
+            is_break,
+        )
+        for values in rows
+    ]
+
+
+def _build_touch_taps_v1(table: TickTable, rows: List[List[str]]) -> List[TouchTapNote]:
+    to_measure = table.to_measure
+    return [
+        TouchTapNote(
+            to_measure(int(values[1]), int(values[2])),
+            int(values[3]),
+            values[4],
+            values[5] == "1",
+            values[6] if len(values) > 6 else "M1",
+        )
+        for values in rows
+    ]
+
+
+def _build_touch_holds_v1(
+    table: TickTable, rows: List[List[str]]
+) -> List[TouchHoldNote]:
+    to_measure = table.to_measure
+    to_duration = table.to_duration
+    return [
+        TouchHoldNote(
+            to_measure(int(values[1]), int(values[2])),
+            int(values[3]),
+            values[5],
+            to_duration(int(values[4])),
+            values[6] == "1",
+            values[7] if len(values) > 7 else "M1",
+        )
+        for values in rows
+    ]
+
+
+def _build_slides_v1(
+    table: TickTable,
+    rows: List[List[str]],
+    pattern: int,
+    is_break: bool,
+    is_ex: bool,
+    is_connect: bool,
+) -> List[SlideNote]:
+    to_measure = table.to_measure
+    to_duration = table.to_duration
+    slides = []
+    for values in rows:
+        start_position = int(values[3])
+        end_position = int(values[6])
+        check_slide(pattern, start_position, end_position)
+        slides.append(
+            SlideNote(
+                to_measure(int(values[1]), int(values[2])),
+                start_position,
+                end_position,
+                pattern,
+                to_duration(int(values[5])),
+                to_duration(int(values[4])),
+                is_break,
+                is_ex,
+                is_connect,
+            )
+        )
+
+    return slides
+
+
+def _set_native_ticks_v1(
+    kind: str, resolution: int, notes: List[Any], rows: List[List[str]]
+) -> None:
+    duration_index, delay_index = _native_fields_v1[kind]
+    for note, values in zip(notes, rows):
+        note.set_native_ticks(
+            resolution,
+            int(values[1]) * resolution + int(values[2]),
+            None if duration_index is None else int(values[duration_index]),
+            None if delay_index is None else int(values[delay_index]),
+        )
+
+
+# Column of the duration and delay ticks of each kind of note
+_native_fields_v1: Dict[str, Tuple[Optional[int], Optional[int]]] = {
+    "tap": (None, None),
+    "hold": (4, None),
+    "touch_tap": (None, None),
+    "touch_hold": (4, None),
+    "slide": (5, 4),
+}
+
+_handlers_by_kind_v1: Dict[str, Callable[..., None]] = {
+    "tap": _handle_tap_v1,
+    "hold": _handle_hold_v1,
+    "touch_tap": _handle_touch_tap_v1,
+    "touch_hold": _handle_touch_hold_v1,
+    "slide": _handle_slide_v1,
+}
+
+_builders_v1: Dict[str, Callable[..., List[Any]]] = {
+    "tap": _build_taps_v1,
+    "hold": _build_holds_v1,
+    "touch_tap": _build_touch_taps_v1,
+    "touch_hold": _build_touch_holds_v1,
+    "slide": _build_slides_v1,
+}
+
+
+def _build_note_tags_v1() -> Dict[str, Tuple[str, Dict[str, Any]]]:
+    # Maps a note tag to its kind of note and the flags passed to the
+    # kind's handler and builder.
+    tags: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+
+    # Prefixes as written by ma2 1.04.00: normal, break, ex, and break ex
+    prefixes = {
+        "NM": (False, False),
+        "BR": (True, False),
+        "EX": (False, True),
+        "BX": (True, True),
+    }
+    for prefix, (is_break, is_ex) in prefixes.items():
+        for suffix, is_star in [("TAP", False), ("STR", True)]:
+            tags[prefix + suffix] = (
+                "tap",
+                {"is_break": is_break, "is_star": is_star, "is_ex": is_ex},
+            )
+        tags[prefix + "HLD"] = (
+            "hold",
+            {"is_break": is_break, "is_ex": is_ex},
+        )
+
+    tags["NMTTP"] = ("touch_tap", {})
+    tags["NMTHO"] = ("touch_hold", {})
+
+    for slide_name, pattern in slide_dict.items():
+        for prefix, (is_break, is_ex) in prefixes.items():
+            tags[prefix + slide_name] = (
+                "slide",
+                {
+                    "pattern": pattern,
+                    "is_break": is_break,
+                    "is_ex": is_ex,
+                    "is_connect": False,
+                },
+            )
+        tags["CN" + slide_name] = (
+            "slide",
+            {
+                "pattern": pattern,
+                "is_break": False,
+                "is_ex": False,
+                "is_connect": True,
+            },
+        )
+        # Older charts have no prefix in slides
+        tags[slide_name] = tags["NM" + slide_name]
+
+    # Older note names
+    legacy_names = {
+        "TAP": "NMTAP",
+        "BRK": "BRTAP",
+        "XTP": "EXTAP",
+        "STR": "NMSTR",
+        "BST": "BRSTR",
+        "XST": "EXSTR",
+        "HLD": "NMHLD",
+        "XHO": "EXHLD",
+        "TTP": "NMTTP",
+        "THO": "NMTHO",
+    }
+    for legacy_name, name in legacy_names.items():
+        tags[legacy_name] = tags[name]
+
+    return tags
+
+
+def _build_handlers_v1() -> Dict[str, Callable[..., None]]:
+    handlers: Dict[str, Callable[..., None]] = {
+        tag: _handle_ignored_v1 for tag in _ignored_v1
+    }
+    handlers["VERSION"] = _handle_version_v1
+    handlers["FES_MODE"] = _handle_fes_mode_v1
+    handlers["RESOLUTION"] = _handle_resolution_v1
+    handlers["BPM"] = _handle_bpm_v1
+    handlers["MET"] = _handle_meter_v1
+
+    for tag, (kind, flags) in _note_tags_v1.items():
+        handler = _handlers_by_kind_v1[kind]
+        handlers[tag] = functools.partial(handler, **flags) if flags else handler
+
+    return handlers
+
+
+_note_tags_v1 = _build_note_tags_v1()
+_handlers_v1 = _build_handlers_v1()
@@ -1,3 +1,4 @@
 from .maisxt import MaiSxt
 from .sxtnote import TapNote, SlideStartNote, SlideEndNote, HoldNote, check_slide
 from .sxtchart import SxtChartType
+from .slidematch import SlideMatcher, SlidePairingStats
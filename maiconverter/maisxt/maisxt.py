@@ -1,8 +1,9 @@
 from __future__ import annotations
 
+import io
 import math
 import re
-from typing import Union, List, Dict
+from typing import Any, Union, List, Dict, Optional, Tuple, TextIO
 
 from .sxtnote import (
     TapNote,
@@ -10,9 +11,14 @@ from .sxtnote import (
     SlideStartNote,
     SlideEndNote,
     check_slide,
+    sdt_line_emitters,
+    sdt_note_to_str,
 )
-from ..event import NoteType
-from ..tool import measure_to_second, second_to_measure, offset_arg_to_measure
+from .slidematch import SlideMatcher
+from .tools import read_sxt, read_srt, tokenize
+from ..event import MaiNote, NoteType
+from ..maicrypt import finale_encrypt, finale_file_decrypt
+from ..tool import TempoMap, resolve_offset, apply_offset, write_lines
 
 
 class MaiSxt:
@@ -25,6 +31,7 @@ class MaiSxt:
     Attributes:
         bpm: Singular BPM in which the chart is written in.
         notes: Contains notes of the chart.
+        slide_matcher: Pairs start and end slides of parsed lines.
     """
 
     def __init__(self, bpm: float) -> None:
@@ -32,24 +39,167 @@ class MaiSxt:
             raise ValueError(f"BPM is not positive {bpm}")
 
         self.bpm = bpm
-        self.notes: List[Union[TapNote, HoldNote, SlideStartNote, SlideEndNote]] = []
-        self.start_slide_notes: Dict[int, Dict[str, Union[int, float]]] = {}
+        self._notes: List[Union[TapNote, HoldNote, SlideStartNote, SlideEndNote]] = []
+        # Deleted notes by id, removed from the list of notes when it's next read
+        self._deleted: Dict[int, MaiNote] = {}
+        # Tap, star, hold notes and start slides by (time key, button), and
+        # both halves of each slide by slide id
+        self._taps: Dict[Tuple[int, int], List[TapNote]] = {}
+        self._stars: Dict[Tuple[int, int], List[TapNote]] = {}
+        self._holds: Dict[Tuple[int, int], List[HoldNote]] = {}
+        self._start_slides: Dict[Tuple[int, int], List[SlideStartNote]] = {}
+        self._slides: Dict[int, List[Optional[MaiNote]]] = {}
+        self.slide_matcher = SlideMatcher()
         self.slide_count = 1
 
+    @property
+    def notes(self) -> List[Union[TapNote, HoldNote, SlideStartNote, SlideEndNote]]:
+        if len(self._deleted) != 0:
+            deleted = self._deleted
+            self._notes = [note for note in self._notes if id(note) not in deleted]
+            self._deleted = {}
+
+        return self._notes
+
+    @notes.setter
+    def notes(
+        self, notes: List[Union[TapNote, HoldNote, SlideStartNote, SlideEndNote]]
+    ) -> None:
+        self._notes = notes
+        self._deleted = {}
+        self.notes_changed()
+
+    def notes_changed(self) -> MaiSxt:
+        """Rebuilds the note and slide indexes. Call after changing the
+        measures of notes directly, or adding and removing notes without
+        the add and del methods. Offsets and tempo changes call it already.
+        Notes added or moved directly are also found when the indexes have
+        no note at a measure and button, by going through every note.
+        """
+        self._taps = {}
+        self._stars = {}
+        self._holds = {}
+        self._start_slides = {}
+        self._slides = {}
+        for note in self.notes:
+            for index_name in _index_names(note):
+                _index_add(getattr(self, index_name), note)
+            if isinstance(note, SlideStartNote):
+                self._slides.setdefault(note.slide_id, [None, None])[0] = note
+            elif isinstance(note, SlideEndNote):
+                self._slides.setdefault(note.slide_id, [None, None])[1] = note
+
+        return self
+
+    def _near(self, index_name: str, measure: float, position: int) -> List[Any]:
+        notes = _index_near(getattr(self, index_name), measure, position)
+        if len(notes) == 0 and any(
+            note.position == position
+            and math.isclose(note.measure, measure, abs_tol=0.0001)
+            and index_name in _index_names(note)
+            for note in self.notes
+        ):
+            # The note was added or moved without the add methods
+            self.notes_changed()
+            notes = _index_near(getattr(self, index_name), measure, position)
+
+        return notes
+
+    def _delete_note(self, note: MaiNote) -> None:
+        # The note is kept alive until it's removed from the list, so its id
+        # can't be reused by a new note before then
+        self._deleted[id(note)] = note
+
+    @property
+    def start_slide_notes(self) -> Dict[int, Dict[str, Union[int, float]]]:
+        """Start slides read but still waiting for their end slide, by slide id."""
+        return self.slide_matcher.pending
+
     @classmethod
     def open(cls, path: str, bpm: float, encoding: str = "utf-8") -> MaiSxt:
-        sdt = cls(bpm=bpm)
         with open(path, "r", encoding=encoding) as file:
-            for line in file:
-                if line in ["\n", "\r\n"]:
-                    continue
+            text = file.read()
+
+        return cls.from_str(text, bpm, is_srt=re.search(r"\.srt", path) is not None)
+
+    @classmethod
+    def from_bytes(
+        cls, data: bytes, bpm: float, is_srt: bool = False, encoding: str = "utf-8"
+    ) -> MaiSxt:
+        """Parses the contents of an sxt file given as bytes, such as
+        the output of `finale_decrypt`.
+
+        Args:
+            data: The contents of an sxt file.
+            bpm: Singular BPM in which the chart is written in.
+            is_srt: Whether the data is an SRT chart.
+            encoding: Encoding of the data.
+        """
+        return cls.from_str(data.decode(encoding), bpm, is_srt=is_srt)
+
+    @classmethod
+    def from_encrypted(
+        cls,
+        path: str,
+        bpm: float,
+        key: Union[str, bytes],
+        encoding: str = "utf-8",
+    ) -> MaiSxt:
+        """Opens a Finale encrypted chart (.sdb, .scb, .szb, or .srb) and
+        parses it in memory, without writing the decrypted chart to disk.
+
+        Args:
+            path: Path to the encrypted chart.
+            bpm: Singular BPM in which the chart is written in.
+            key: 16 byte AES key. Either bytes or a string of an integer,
+                with hex values prepended with 0x.
+            encoding: Encoding of the decrypted chart.
+
+        Raises:
+            ValueError: When the key is not 16 bytes.
+
+        Examples:
+            Open an encrypted SDT chart.
+
+            >>> sdt = MaiSxt.from_encrypted("example.sdb", 150, key)
+        """
+        is_srt = re.search(r"\.sr[tb]", path) is not None
+        return cls.from_bytes(
+            finale_file_decrypt(path, key), bpm, is_srt=is_srt, encoding=encoding
+        )
+
+    @classmethod
+    def from_str(cls, text: str, bpm: float, is_srt: bool = False) -> MaiSxt:
+        """Parses the text of an sxt file.
 
-                if re.search(r"\.srt", path) is None:
-                    sdt.parse_line(line)
-                else:
-                    sdt.parse_srt_line(line)
+        Lines are split into values all at once and read by the bulk reader
+        of the chart type. The result is the same as calling `parse_line`,
+        or `parse_srt_line` for SRT, on every line.
 
-        return sdt
+        Args:
+            text: The contents of an sxt file.
+            bpm: Singular BPM in which the chart is written in.
+            is_srt: Whether the text is an SRT chart.
+
+        Raises:
+            ValueError: When a line has an invalid number of columns.
+                When an end slide is declared before an beginning slide.
+                When an unknown note type is given.
+
+        Examples:
+            Read an SDT chart that's already in memory.
+
+            >>> sdt = MaiSxt.from_str(text, bpm=150)
+        """
+        sxt = cls(bpm=bpm)
+        lines = [line for line in text.split("\n") if line not in ["", "\r"]]
+        if is_srt:
+            read_srt(sxt, tokenize(lines))
+        else:
+            read_sxt(sxt, tokenize(lines))
+
+        sxt.slide_matcher.finish()
+        return sxt
 
     def parse_line(self, line: str) -> MaiSxt:
         """Parse a non-SRT comma-separated line.
@@ -62,67 +212,7 @@ class MaiSxt:
                 When an end slide is declared before an beginning slide.
                 When an unknown note type is given.
         """
-        values = line.rstrip().rstrip(",").replace(" ", "").split(",")
-        if not (7 <= len(values) <= 9):
-            raise ValueError(f"Line has invalid number of columns {len(values)}")
-
-        measure = float(values[0]) + float(values[1])
-        position = int(values[3])
-        note_type = int(values[4])
-
-        if note_type in [1, 3, 4, 5]:
-            # Regular tap note, break tap note, star note, break star note
-            is_star = note_type in [4, 5]
-            is_break = note_type in [3, 5]
-            self.add_tap(
-                measure=measure, position=position, is_break=is_break, is_star=is_star
-            )
-        elif note_type == 2:
-            # Hold note
-            duration = float(values[2])
-            self.add_hold(measure, position, duration)
-        elif note_type == 0:  # Start slide
-            if len(values) == 9:
-                # SDT includes delay
-                delay = float(values[8])
-            else:
-                delay = 0.25
-
-            duration = float(values[2])
-            slide_id = int(values[5])
-            pattern = int(values[6])
-            start_slide = {
-                "position": position,
-                "measure": measure,
-                "duration": duration,
-                "delay": delay,
-                "pattern": pattern,
-            }
-            self.start_slide_notes[slide_id] = start_slide
-        elif note_type == 128:  # End slide
-            slide_id = int(values[5])
-
-            # Get information about corresponding start slide
-            if slide_id not in self.start_slide_notes:
-                raise ValueError("End slide is declared before slide start!")
-
-            start_slide = self.start_slide_notes[slide_id]
-            start_measure = start_slide["measure"]
-            start_position = start_slide["position"]
-            duration = start_slide["duration"]
-            delay = start_slide["delay"]
-            slide_pattern = start_slide["pattern"]
-            self.add_slide(
-                start_measure,
-                int(start_position),
-                position,
-                duration,
-                int(slide_pattern),
-                delay,
-            )
-        else:
-            raise ValueError("Unknown note type {}".format(note_type))
-
+        read_sxt(self, tokenize([line]))
         return self
 
     def parse_srt_line(self, line: str) -> MaiSxt:
@@ -132,67 +222,11 @@ class MaiSxt:
             line: An SRT comma-separated line.
 
         Raises:
-            ValueError: When the number of columns are not between 7 and 9.
-                When an end slide is declared before an beginning slide.
-                When an unknown note type is given.
+            ValueError: When the number of columns are not 7.
+                When an unknown note type or slide pattern is given.
+            RuntimeError: When an end slide is declared before an beginning slide.
         """
-        srt_slide_to_later_dict = {
-            0: 1,
-            1: 3,
-            2: 2,
-        }
-        values = line.rstrip().rstrip(",").replace(" ", "").split(",")
-        if len(values) != 7:
-            raise ValueError(f"SRT should have 7 columns. Given: {len(values)}")
-
-        measure = float(values[0]) + float(values[1])
-        position = int(values[3])
-        note_type = int(values[4])
-
-        if note_type in [0, 4]:
-            # 0: Regular tap note or star and start slide note
-            # 4: Break tap note
-            slide_id = int(values[5])
-            if slide_id != 0:
-                # Tap notes with a non-zero slide id are stars and start slide
-                self.add_tap(measure=measure, position=position, is_star=True)
-                duration = float(values[2])
-                # Slide patterns in SZT, and later, starts at 1
-                pattern = srt_slide_to_later_dict[int(values[6])]
-                start_slide: Dict[str, Union[float, int]] = {
-                    "position": position,
-                    "measure": measure,
-                    "duration": duration,
-                    "pattern": pattern,
-                }
-                self.start_slide_notes[slide_id] = start_slide
-            else:
-                is_break = note_type == 4
-                self.add_tap(measure=measure, position=position, is_break=is_break)
-        elif note_type == 2:  # Hold note
-            duration = float(values[2])
-            self.add_hold(measure, position, duration)
-        elif note_type == 128:
-            slide_id = int(values[5])
-            # Get information about corresponding start slide
-            if slide_id not in self.start_slide_notes:
-                raise RuntimeError("End slide is declared before slide start!")
-
-            start: Dict[str, Union[float, int]] = self.start_slide_notes[slide_id]
-            start_measure = start["measure"]
-            start_position = start["position"]
-            duration = start["duration"]
-            slide_pattern = start["pattern"]
-            self.add_slide(
-                start_measure,
-                int(start_position),
-                position,
-                duration,
-                int(slide_pattern),
-            )
-        else:
-            raise ValueError(f"Unknown note type {note_type}")
-
+        read_srt(self, tokenize([line]))
         return self
 
     def add_tap(
@@ -221,7 +255,10 @@ class MaiSxt:
         tap_note = TapNote(
             measure=measure, position=position, is_break=is_break, is_star=is_star
         )
-        self.notes.append(tap_note)
+        self._notes.append(tap_note)
+        _index_add(self._taps, tap_note)
+        if is_star:
+            _index_add(self._stars, tap_note)
 
         return self
 
@@ -239,15 +276,11 @@ class MaiSxt:
             >>> sxt.add_tap(26.75, 4, is_break=True)
             >>> sxt.del_tap(26.75, 4)
         """
-        tap_notes = [
-            x
-            for x in self.notes
-            if isinstance(x, TapNote)
-            and math.isclose(x.measure, measure, abs_tol=0.0001)
-            and x.position == position
-        ]
-        for note in tap_notes:
-            self.notes.remove(note)
+        for note in self._near("_taps", measure, position):
+            _index_remove(self._taps, note)
+            if note.note_type in _STAR_TYPES:
+                _index_remove(self._stars, note)
+            self._delete_note(note)
 
         return self
 
@@ -272,7 +305,8 @@ class MaiSxt:
             >>> sxt.add_hold(1.5, 5, 2.75)
         """
         hold_note = HoldNote(measure=measure, position=position, duration=duration)
-        self.notes.append(hold_note)
+        self._notes.append(hold_note)
+        _index_add(self._holds, hold_note)
 
         return self
 
@@ -296,15 +330,9 @@ class MaiSxt:
             >>> sxt.add_hold(3.25, 0, 2)
             >>> sxt.del_hold(3.25, 0)
         """
-        hold_notes = [
-            x
-            for x in self.notes
-            if isinstance(x, HoldNote)
-            and math.isclose(x.measure, measure, abs_tol=0.0001)
-            and x.position == position
-        ]
-        for note in hold_notes:
-            self.notes.remove(note)
+        for note in self._near("_holds", measure, position):
+            _index_remove(self._holds, note)
+            self._delete_note(note)
 
         return self
 
@@ -364,19 +392,13 @@ class MaiSxt:
             pattern=pattern,
             slide_id=slide_id,
         )
-        self.notes.append(start_slide)
-        self.notes.append(end_slide)
+        self._notes.append(start_slide)
+        self._notes.append(end_slide)
         self.slide_count += 1
+        _index_add(self._start_slides, start_slide)
+        self._slides[slide_id] = [start_slide, end_slide]
 
-        star_notes = [
-            x
-            for x in self.notes
-            if isinstance(x, TapNote)
-            and x.note_type in [NoteType.star, NoteType.break_star]
-            and math.isclose(x.measure, measure, abs_tol=0.0001)
-            and x.position == start_position
-        ]
-        for star_note in star_notes:
+        for star_note in self._near("_stars", measure, start_position):
             star_note.amount += 1
 
         return self
@@ -387,66 +409,138 @@ class MaiSxt:
         start_position: int,
         end_position: int,
     ) -> MaiSxt:
-        start_slides = [
-            x
-            for x in self.notes
-            if isinstance(x, SlideStartNote)
-            and math.isclose(x.measure, measure, abs_tol=0.0001)
-            and x.position == start_position
-        ]
-        end_slides: List[SlideEndNote] = []
-        for note in start_slides:
-            slides = [
-                x
-                for x in self.notes
-                if isinstance(x, SlideEndNote)
-                and x.slide_id == note.slide_id
-                and x.position == end_position
-            ]
-            end_slides += slides
-
-        correct_start_slides = []
-        for note in end_slides:
-            slides = [
-                x
-                for x in self.notes
-                if isinstance(x, SlideStartNote) and x.slide_id == note.slide_id
-            ]
-            correct_start_slides += slides
-
-        star_notes = [
-            x
-            for x in self.notes
-            if isinstance(x, TapNote)
-            and x.note_type in [NoteType.star, NoteType.break_star]
-            and math.isclose(x.measure, measure, abs_tol=0.0001)
-            and x.position == start_position
-        ]
-
-        for note in correct_start_slides:
-            self.notes.remove(note)
-
-        for note in end_slides:
-            self.notes.remove(note)
-
-        for star_note in star_notes:
-            star_note.amount -= 1
+        """Deletes the matching slides in the list of notes. Both the start
+        and end slide are deleted, and the slide count of stars at the start
+        of each slide is decreased. If there are no match, nothing happens.
+
+        Args:
+            measure: Time when the slide starts, in terms of measures.
+            start_position: Button where the slide starts.
+            end_position: Button where the slide ends.
+
+        Examples:
+            Add a slide at measure 2 from button 6 to button 3 and delete it.
+
+            >>> sxt = MaiSxt(150)
+            >>> sxt.add_slide(2, 6, 3, 1.75, 1)
+            >>> sxt.del_slide(2, 6, 3)
+        """
+        deleted = 0
+        for start_slide in self._near("_start_slides", measure, start_position):
+            start_note, end_note = self._slides.get(start_slide.slide_id, (None, None))
+            if end_note is None or end_note.position != end_position:
+                continue
+
+            del self._slides[start_slide.slide_id]
+            _index_remove(self._start_slides, start_slide)
+            self._delete_note(start_slide)
+            if start_note is not None and start_note is not start_slide:
+                self._delete_note(start_note)
+            self._delete_note(end_note)
+            deleted += 1
+
+        if deleted != 0:
+            for star_note in self._near("_stars", measure, start_position):
+                star_note.amount -= deleted
 
         return self
 
     def offset(self, offset: Union[float, str]) -> MaiSxt:
-        offset = offset_arg_to_measure(offset, self.second_to_measure)
+        apply_offset(self, resolve_offset(offset, self))
+
+        return self
+
+    def rescale_bpm(self, bpm: float) -> MaiSxt:
+        """Rewrites the chart in another BPM while keeping every note's timing
+        in seconds. Measures, durations, and delays are scaled in place.
+
+        Args:
+            bpm: The new BPM of the chart.
+
+        Raises:
+            ValueError: When bpm is not positive.
+
+        Examples:
+            Rewrite a 150 BPM chart in 300 BPM.
+
+            >>> sxt = MaiSxt(150)
+            >>> sxt.add_hold(2, 0, 0.5)
+            >>> sxt.rescale_bpm(300)
+            >>> sxt.notes[0].measure, sxt.notes[0].duration
+            (4.0, 1.0)
+        """
+        if bpm <= 0:
+            raise ValueError(f"BPM is not positive {bpm}")
 
+        scale = bpm / self.bpm
         for note in self.notes:
-            note.measure = round((note.measure + offset) * 10000.0) / 10000.0
+            note.measure = round(note.measure * scale * 10000.0) / 10000.0
+            if isinstance(note, (HoldNote, SlideStartNote)):
+                note.duration = round(note.duration * scale * 10000.0) / 10000.0
+            if isinstance(note, SlideStartNote):
+                note.delay = round(note.delay * scale * 10000.0) / 10000.0
 
-        return self
+        self.bpm = bpm
+        return self.notes_changed()
 
     def measure_to_second(self, measure: float) -> float:
-        return measure_to_second(measure, [(0.0, self.bpm)])
+        return TempoMap.from_chart(self).measure_to_second(measure)
 
     def second_to_measure(self, seconds: float) -> float:
-        return second_to_measure(seconds, [(0.0, self.bpm)])
+        return TempoMap.from_chart(self).second_to_measure(seconds)
+
+    def export_to(self, fp: TextIO) -> MaiSxt:
+        """Writes an sxt text from all the notes defined to a file object.
+        Notes are printed by the line emitter of their class and written in
+        chunks, so the full text is never held in memory.
+
+        Args:
+            fp: A text file object to write to.
+
+        Examples:
+            Write an sxt chart to "example.sdt".
+
+            >>> with open("example.sdt", "w", newline="\\r\\n", encoding="utf-8") as out:
+            ...     sxt.export_to(out)
+        """
+        self.notes.sort()
+        emitters = sdt_line_emitters
+        write_lines(
+            fp,
+            (
+                emitters[type(note)](note)
+                if type(note) in emitters
+                else sdt_note_to_str(note)
+                for note in self.notes
+            ),
+        )
+        fp.write("\n")
+        return self
+
+    def export_encrypted(
+        self, key: Union[str, bytes], encoding: str = "utf-8", newline: str = "\r\n"
+    ) -> bytes:
+        """Generates an sxt text from all the notes defined and encrypts it
+        for Finale, without writing the plain chart to disk.
+
+        Args:
+            key: 16 byte AES key. Either bytes or a string of an integer,
+                with hex values prepended with 0x.
+            encoding: Encoding of the chart text.
+            newline: Line separator of the chart text.
+
+        Returns:
+            Encrypted chart that should be stored as-is in a file with an
+            .sdb, .scb, .szb, or .srb extension.
+
+        Raises:
+            ValueError: When the key is not 16 bytes.
+        """
+        text = self.export()
+        if newline != "\n":
+            text = text.replace("\n", newline)
+
+        return finale_encrypt(key=key, plaintext=text.encode(encoding))
 
     def export(self) -> str:
         """Generates an sxt text from all the notes defined.
@@ -456,5 +550,58 @@ class MaiSxt:
             string is a complete and functioning sxt text and should
             be stored as-is in a text file with an sxt file extension.
         """
-        self.notes.sort()
-        return "\n".join([str(note) for note in self.notes]) + "\n"
+        out = io.StringIO()
+        self.export_to(out)
+        return out.getvalue()
+
+
+_STAR_TYPES = frozenset([NoteType.star, NoteType.break_star])
+
+
+def _index_names(note: MaiNote) -> Tuple[str, ...]:
+    # Names of the indexes of MaiSxt a note is kept in
+    if isinstance(note, TapNote):
+        if note.note_type in _STAR_TYPES:
+            return "_taps", "_stars"
+
+        return ("_taps",)
+    if isinstance(note, HoldNote):
+        return ("_holds",)
+    if isinstance(note, SlideStartNote):
+        return ("_start_slides",)
+
+    return ()
+
+
+def _time_key(measure: float) -> int:
+    return round(measure * 10000)
+
+
+def _index_add(index: Dict[Tuple[int, int], List[Any]], note: MaiNote) -> None:
+    index.setdefault((_time_key(note.measure), note.position), []).append(note)
+
+
+def _index_remove(index: Dict[Tuple[int, int], List[Any]], note: MaiNote) -> None:
+    key = (_time_key(note.measure), note.position)
+    group = index.get(key, [])
+    for i, other in enumerate(group):
+        if other is note:
+            del group[i]
+            break
+
+    if len(group) == 0:
+        index.pop(key, None)
+
+
+def _index_near(
+    index: Dict[Tuple[int, int], List[Any]], measure: float, position: int
+) -> List[Any]:
+    # Note measures are rounded to 4 decimal places, so every note within
+    # 0.0001 measures is in one of the neighbouring keys.
+    key = _time_key(measure)
+    return [
+        note
+        for offset in (-1, 0, 1)
+        for note in index.get((key + offset, position), [])
+        if math.isclose(note.measure, measure, abs_tol=0.0001)
+    ]
@@ -0,0 +1,108 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Union
+
+StartSlideInfo = Dict[str, Union[int, float]]
+
+
+@dataclass
+class SlidePairingStats:
+    """Counts kept by a SlideMatcher.
+
+    Attributes:
+        starts: Number of start slides read.
+        pairs: Number of end slides paired with their start slide.
+        replaced: Number of start slides replaced by another start slide
+            with the same slide id before their end slide was read.
+        unmatched_ends: Number of end slides without a start slide.
+        dangling: Number of start slides without an end slide when reading
+            finished.
+        max_pending: Most start slides waiting for their end slide at once.
+    """
+
+    starts: int = 0
+    pairs: int = 0
+    replaced: int = 0
+    unmatched_ends: int = 0
+    dangling: int = 0
+    max_pending: int = 0
+
+
+class SlideMatcher:
+    """Pairs start slides with their end slides as sxt lines are read.
+
+    Start slides wait in `pending` until the end slide with the same slide
+    id is read, and are evicted once paired. Memory used is bounded by the
+    number of slides in flight rather than the size of the chart.
+
+    Attributes:
+        pending: Start slides waiting for their end slide, by slide id.
+        stats: Counts of start slides, pairs, and unpaired slides.
+
+    Examples:
+        Pair the slides of an sxt file read line by line.
+
+        >>> sxt = MaiSxt(bpm=150)
+        >>> for line in lines:
+        ...     sxt.parse_line(line)
+        >>> dangling = sxt.slide_matcher.finish()
+        >>> sxt.slide_matcher.stats.pairs
+    """
+
+    def __init__(self) -> None:
+        self.pending: Dict[int, StartSlideInfo] = {}
+        self.stats = SlidePairingStats()
+
+    def start(self, slide_id: int, start_slide: StartSlideInfo) -> None:
+        """Adds a start slide that waits for its end slide.
+
+        Args:
+            slide_id: Slide id of the start slide in the file.
+            start_slide: Position, measure, duration, pattern, and
+                optionally the delay of the slide.
+        """
+        if slide_id in self.pending:
+            self.stats.replaced += 1
+
+        self.pending[slide_id] = start_slide
+        self.stats.starts += 1
+        self.stats.max_pending = max(self.stats.max_pending, len(self.pending))
+
+    def end(self, slide_id: int) -> Optional[StartSlideInfo]:
+        """Pairs an end slide with its start slide and evicts the start slide.
+
+        Args:
+            slide_id: Slide id of the end slide in the file.
+
+        Returns:
+            The start slide, or None when no start slide with the slide id
+            is waiting.
+        """
+        start_slide = self.pending.pop(slide_id, None)
+        if start_slide is None:
+            self.stats.unmatched_ends += 1
+        else:
+            self.stats.pairs += 1
+
+        return start_slide
+
+    def finish(self) -> List[Tuple[int, StartSlideInfo]]:
+        """Ends reading. Start slides still waiting for their end slide
+        are dropped with a warning.
+
+        Returns:
+            The slide ids and start slides that never had an end slide.
+        """
+        dangling = list(self.pending.items())
+        self.pending.clear()
+        self.stats.dangling += len(dangling)
+        if len(dangling) != 0:
+            print(
+                "Warning: Start slides without end slides are ignored. Slide ids: {}".format(
+                    [slide_id for slide_id, _ in dangling]
+                )
+            )
+
+        return dangling
+
+    def __len__(self) -> int:
+        return len(self.pending)
@@ -1,5 +1,5 @@
 import math
-from typing import Union, Optional
+from typing import Any, Callable, Union, Optional, Dict, Tuple
 
 from .sxtchart import SxtChartType
 from ..event import MaiNote, NoteType
@@ -228,6 +228,72 @@ class HoldNote(MaiNote):
         return sdt_note_to_str(self)
 
 
+_sdt_line = "{:.4f}, {:.4f}, {:.4f}, {:2d}, {:3d}, {:3d}, {:2d}, {:2d}, {:.4f},".format
+_star_types = frozenset([NoteType.star, NoteType.break_star])
+
+
+def _tap_to_sdt_line(note: TapNote) -> str:
+    fraction, whole = math.modf(note.measure)
+    amount = note.amount if note.note_type in _star_types else 0
+    return _sdt_line(
+        whole, fraction, 0.0625, note.position, note.note_type.value, 0, 0, amount, 0.0
+    )
+
+
+def _hold_to_sdt_line(note: HoldNote) -> str:
+    fraction, whole = math.modf(note.measure)
+    return _sdt_line(
+        whole,
+        fraction,
+        note.duration,
+        note.position,
+        note.note_type.value,
+        0,
+        0,
+        0,
+        0.0,
+    )
+
+
+def _start_slide_to_sdt_line(note: SlideStartNote) -> str:
+    fraction, whole = math.modf(note.measure)
+    return _sdt_line(
+        whole,
+        fraction,
+        note.duration,
+        note.position,
+        note.note_type.value,
+        note.slide_id,
+        note.pattern,
+        0,
+        note.delay,
+    )
+
+
+def _end_slide_to_sdt_line(note: SlideEndNote) -> str:
+    fraction, whole = math.modf(note.measure)
+    return _sdt_line(
+        whole,
+        fraction,
+        0,
+        note.position,
+        note.note_type.value,
+        note.slide_id,
+        note.pattern,
+        0,
+        0.0,
+    )
+
+
+# Sxt note class to the function that prints it as an sxt line
+sdt_line_emitters: Dict[type, Callable[[Any], str]] = {
+    TapNote: _tap_to_sdt_line,
+    HoldNote: _hold_to_sdt_line,
+    SlideStartNote: _start_slide_to_sdt_line,
+    SlideEndNote: _end_slide_to_sdt_line,
+}
+
+
 def sdt_note_to_str(
     note: Union[TapNote, HoldNote, SlideEndNote, SlideStartNote]
 ) -> str:
@@ -239,44 +305,15 @@ def sdt_note_to_str(
     Returns:
         A single line string.
     """
-    measure = math.modf(note.measure)
-    note_type = note.note_type
-    if isinstance(note, (HoldNote, SlideStartNote)):
-        note_duration = note.duration
-    elif isinstance(note, SlideEndNote):
-        note_duration = 0
-    else:
-        note_duration = 0.0625
-
-    if isinstance(note, (SlideStartNote, SlideEndNote)):
-        slide_id = note.slide_id
-        pattern = note.pattern
-    else:
-        slide_id = 0
-        pattern = 0
-
-    if isinstance(note, TapNote) and note.note_type in [
-        NoteType.star,
-        NoteType.break_star,
-    ]:
-        slide_amount = note.amount
-    else:
-        slide_amount = 0
-
-    delay = 0.0 if not isinstance(note, SlideStartNote) else note.delay
-    line_template = "{:.4f}, {:.4f}, {:.4f}, {:2d}, {:3d}, {:3d}, {:2d}, {:2d}, {:.4f},"
-    result = line_template.format(
-        measure[1],
-        measure[0],
-        note_duration,
-        note.position,
-        note_type.value,
-        slide_id,
-        pattern,
-        slide_amount,
-        delay,
-    )
-    return result
+    emitter = sdt_line_emitters.get(type(note))
+    if emitter is None:
+        emitter = next(
+            emitter
+            for note_class, emitter in sdt_line_emitters.items()
+            if isinstance(note, note_class)
+        )
+
+    return emitter(note)
 
 
 def check_slide(
@@ -298,43 +335,61 @@ def check_slide(
         ValueError: When given a slide that will crash the game or has undefined
             behaviour.
     """
-    if not (0 <= start_position <= 7):
-        raise ValueError(f"Invalid start position {start_position}")
-    if not (0 <= end_position <= 7):
-        raise ValueError(f"Invalid end position {end_position}")
-    if chart_type is SxtChartType.SRT and not (1 <= pattern <= 3):
-        raise ValueError(f"Invalid pattern for SRT chart {pattern}")
-    if chart_type is not SxtChartType.SRT and not (1 <= pattern <= 13):
+    key = (pattern, start_position, end_position, chart_type is SxtChartType.SRT)
+    if key not in _slide_errors:
+        if not (0 <= start_position <= 7):
+            raise ValueError(f"Invalid start position {start_position}")
+        if not (0 <= end_position <= 7):
+            raise ValueError(f"Invalid end position {end_position}")
+        if chart_type is SxtChartType.SRT:
+            raise ValueError(f"Invalid pattern for SRT chart {pattern}")
         raise ValueError(f"Invalid pattern for non-SRT chart {pattern}")
 
-    # Helper variables
+    error = _slide_errors[key]
+    if error is not None:
+        raise ValueError(error)
+
+
+def _slide_error(
+    pattern: int, start_position: int, end_position: int, is_srt: bool
+) -> Optional[str]:
+    # Returns why a slide is invalid, or None for valid slides
     distance_cw = slide_distance(start_position, end_position, is_cw=True)
     distance_ccw = slide_distance(start_position, end_position, is_cw=False)
 
     if pattern == 1:
         # Straight slide's end position should at least be two places away
         if not 2 <= distance_cw <= 6:
-            raise ValueError(
-                "Distance between start and end position should be greater than 1 in pattern 1"
-            )
-    elif pattern == 2 and chart_type is SxtChartType.SRT:
+            return "Distance between start and end position should be greater than 1 in pattern 1"
+    elif pattern == 2 and is_srt:
         # CCW around the judgement ring in SRT can only do 3 places max
         if not distance_ccw <= 3:
-            raise ValueError("SRT can only do distances of 3 places max in pattern 2")
-    elif pattern == 3 and chart_type is SxtChartType.SRT:
+            return "SRT can only do distances of 3 places max in pattern 2"
+    elif pattern == 3 and is_srt:
         # CW around the judgement ring in SRT can only do 3 places max
         if not distance_cw <= 3:
-            raise ValueError("SRT can only do distances of 3 places max in pattern 3")
+            return "SRT can only do distances of 3 places max in pattern 3"
     elif pattern in [6, 7] and distance_cw != 4:
         # Zigzags end_position should be opposite of start_position
-        raise ValueError(
-            "End position is not opposite of start position in pattern 6 or 7"
-        )
+        return "End position is not opposite of start position in pattern 6 or 7"
     elif pattern == 11:
         if not distance_ccw >= 4:
-            raise ValueError(f"CCW distance is less than 4 in pattern 11")
+            return "CCW distance is less than 4 in pattern 11"
     elif pattern == 12:
         if not distance_cw >= 4:
-            raise ValueError(f"CW distance is less than 4 in pattern 12")
+            return "CW distance is less than 4 in pattern 12"
     elif pattern == 13 and distance_cw != 4:
-        raise ValueError("End position is not opposite of start position in pattern 13")
+        return "End position is not opposite of start position in pattern 13"
+
+    return None
+
+
+# Why a slide is invalid, or None, for every (pattern, start, end, is SRT).
+# SRT charts only have patterns 1 to 3.
+_slide_errors: Dict[Tuple[int, int, int, bool], Optional[str]] = {
+    (pattern, start, end, is_srt): _slide_error(pattern, start, end, is_srt)
+    for is_srt, patterns in [(False, range(1, 14)), (True, range(1, 4))]
+    for pattern in patterns
+    for start in range(8)
+    for end in range(8)
+}
@@ -0,0 +1,197 @@
+import functools
+from typing import Callable, Dict, List, Tuple
+
+# Non-SRT note type to (is_break, is_star) of tap notes
+_tap_flags: Dict[int, Tuple[bool, bool]] = {
+    1: (False, False),
+    3: (True, False),
+    4: (False, True),
+    5: (True, True),
+}
+
+# SRT slide patterns to the slide patterns of SZT and later, which start at 1
+srt_slide_patterns: Dict[int, int] = {
+    0: 1,
+    1: 3,
+    2: 2,
+}
+
+
+def tokenize(lines: List[str]) -> List[List[str]]:
+    """Splits sxt lines into their comma-separated values, the same way
+    `MaiSxt.parse_line` does.
+    """
+    return [line.rstrip().rstrip(",").replace(" ", "").split(",") for line in lines]
+
+
+def _end_slide(sxt, slide_id: int, position: int) -> bool:
+    # Adds the slide that ends at position. Returns False when the slide
+    # wasn't started.
+    start = sxt.slide_matcher.end(slide_id)
+    if start is None:
+        return False
+
+    sxt.add_slide(
+        start["measure"],
+        int(start["position"]),
+        position,
+        start["duration"],
+        int(start["pattern"]),
+        start.get("delay", 0.25),
+    )
+    return True
+
+
+def _columns(rows: List[List[str]]) -> Tuple[List[float], List[int], List[int]]:
+    # Measure, position, and note type of every row
+    columns = list(zip(*rows))
+    measures = [
+        whole + fraction
+        for whole, fraction in zip(map(float, columns[0]), map(float, columns[1]))
+    ]
+    return measures, list(map(int, columns[3])), list(map(int, columns[4]))
+
+
+def read_sxt(sxt, rows: List[List[str]]) -> None:
+    """Bulk reader for SDT, SCT, and SZT charts.
+
+    Column counts are checked and the measure, position, and note type
+    columns are converted for the whole file at once. Notes are then added
+    in file order. The result is the same as feeding each line to
+    `parse_line`.
+
+    Args:
+        sxt: The MaiSxt object the lines are read into.
+        rows: Comma-separated values of every non-empty line.
+
+    Raises:
+        ValueError: When the number of columns are not between 7 and 9.
+            When an end slide is declared before an beginning slide.
+            When an unknown note type is given.
+    """
+    for values in rows:
+        if not (7 <= len(values) <= 9):
+            raise ValueError(f"Line has invalid number of columns {len(values)}")
+
+    if len(rows) == 0:
+        return
+
+    for values, measure, position, note_type in zip(rows, *_columns(rows)):
+        if note_type in _tap_flags:
+            is_break, is_star = _tap_flags[note_type]
+            sxt.add_tap(measure, position, is_break=is_break, is_star=is_star)
+        elif note_type == 2:
+            sxt.add_hold(measure, position, float(values[2]))
+        elif note_type == 0:
+            sxt.slide_matcher.start(
+                int(values[5]),
+                {
+                    "position": position,
+                    "measure": measure,
+                    "duration": float(values[2]),
+                    # SDT includes delay
+                    "delay": float(values[8]) if len(values) == 9 else 0.25,
+                    "pattern": int(values[6]),
+                },
+            )
+        elif note_type == 128:
+            if not _end_slide(sxt, int(values[5]), position):
+                raise ValueError("End slide is declared before slide start!")
+        else:
+            raise ValueError("Unknown note type {}".format(note_type))
+
+
+def _read_srt_tap(
+    sxt,
+    values: List[str],
+    measure: float,
+    position: int,
+    slide_id: int,
+    is_break: bool,
+) -> None:
+    if slide_id == 0:
+        sxt.add_tap(measure, position, is_break=is_break)
+        return
+
+    # Tap notes with a non-zero slide id are stars and start slide
+    pattern = srt_slide_patterns.get(int(values[6]))
+    if pattern is None:
+        raise ValueError(f"Unknown SRT slide pattern {values[6]}")
+
+    sxt.add_tap(measure, position, is_star=True)
+    sxt.slide_matcher.start(
+        slide_id,
+        {
+            "position": position,
+            "measure": measure,
+            "duration": float(values[2]),
+            "pattern": pattern,
+        },
+    )
+
+
+def _read_srt_hold(
+    sxt,
+    values: List[str],
+    measure: float,
+    position: int,
+    slide_id: int,
+) -> None:
+    sxt.add_hold(measure, position, float(values[2]))
+
+
+def _read_srt_end_slide(
+    sxt,
+    values: List[str],
+    measure: float,
+    position: int,
+    slide_id: int,
+) -> None:
+    if not _end_slide(sxt, slide_id, position):
+        raise RuntimeError("End slide is declared before slide start!")
+
+
+# SRT note type to the reader of its line. 0 is a tap note, or a star and
+# start slide note, 4 is a break tap note.
+_srt_readers: Dict[int, Callable[..., None]] = {
+    0: functools.partial(_read_srt_tap, is_break=False),
+    4: functools.partial(_read_srt_tap, is_break=True),
+    2: _read_srt_hold,
+    128: _read_srt_end_slide,
+}
+
+
+def read_srt(sxt, rows: List[List[str]]) -> None:
+    """Bulk reader for SRT charts.
+
+    Column counts are checked and the measure, position, note type, and
+    slide id columns are converted for the whole file at once. Every line
+    is then decoded through a table of readers by note type, with legacy
+    slide patterns translated by `srt_slide_patterns`.
+
+    Args:
+        sxt: The MaiSxt object the lines are read into.
+        rows: Comma-separated values of every non-empty line.
+
+    Raises:
+        ValueError: When the number of columns are not 7.
+            When an unknown note type or slide pattern is given.
+        RuntimeError: When an end slide is declared before an beginning slide.
+    """
+    for values in rows:
+        if len(values) != 7:
+            raise ValueError(f"SRT should have 7 columns. Given: {len(values)}")
+
+    if len(rows) == 0:
+        return
+
+    measures, positions, note_types = _columns(rows)
+    slide_ids = [int(values[5]) for values in rows]
+    for values, measure, position, note_type, slide_id in zip(
+        rows, measures, positions, note_types, slide_ids
+    ):
+        reader = _srt_readers.get(note_type)
+        if reader is None:
+            raise ValueError(f"Unknown note type {note_type}")
+
+        reader(sxt, values, measure, position, slide_id)
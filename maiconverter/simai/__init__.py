@@ -10,4 +10,4 @@ from .tools import (
     handle_touch_tap,
     handle_touch_hold,
 )
-from .simai import SimaiChart, parse_file, parse_file_str
+from .simai import SimaiChart, export_fragments, parse_file, parse_file_str
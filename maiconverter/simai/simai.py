@@ -1,7 +1,18 @@
 from __future__ import annotations
 
 import math
-from typing import Optional, Tuple, List, Union
+from collections import deque
+from typing import (
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    Optional,
+    Tuple,
+    List,
+    Union,
+)
 from lark import Lark
 
 from .tools import (
@@ -10,13 +21,13 @@ from .tools import (
     get_rest,
     parallel_parse_fragments,
 )
-from ..event import NoteType
+from ..event import NoteType, SimaiNote
 from .simainote import TapNote, HoldNote, SlideNote, TouchTapNote, TouchHoldNote, BPM
 from .simai_parser import SimaiTransformer
 
 # I hate the simai format can we use bmson or stepmania chart format for
 # community-made charts instead
-from ..tool import measure_to_second, second_to_measure, offset_arg_to_measure
+from ..tool import TempoMap, resolve_offset, apply_offset
 
 
 class SimaiChart:
@@ -587,168 +598,256 @@ class SimaiChart:
         return self
 
     def offset(self, offset: Union[float, str]) -> SimaiChart:
-        offset = offset_arg_to_measure(offset, self.second_to_measure)
+        apply_offset(self, resolve_offset(offset, self))
 
-        for note in self.notes:
-            note.measure = round(note.measure + offset, 4)
+        return self
 
-        for bpm in self.bpms:
-            if 0 <= bpm.measure <= 1:
+    def rescale_bpm(self, bpm: float) -> SimaiChart:
+        """Rewrites the chart so its starting BPM becomes the given BPM while
+        keeping every note's timing in seconds.
+
+        Every BPM event is multiplied by the same factor, and measures,
+        durations, and delays are scaled in place. Measures are scaled from
+        measure 1, the start of the chart, so the starting BPM event stays
+        at the start of the chart.
+
+        Args:
+            bpm: The new starting BPM of the chart.
+
+        Raises:
+            ValueError: When bpm is not positive, or there is no
+                starting BPM defined.
+
+        Examples:
+            Rewrite a 200 BPM chart in 100 BPM. A hold that starts one
+            measure after the start of the chart now starts half a measure
+            after it, and lasts half as many measures.
+
+            >>> simai = SimaiChart()
+            >>> simai.set_bpm(1, 200)
+            >>> simai.add_hold(2, 0, 0.5)
+            >>> simai.rescale_bpm(100)
+            >>> simai.notes[0].measure, simai.notes[0].duration
+            (1.5, 0.25)
+        """
+        if bpm <= 0:
+            raise ValueError(f"BPM is not positive {bpm}")
+
+        scale = bpm / self.get_bpm(1.0)
+        for note in self.notes:
+            note.measure = round(1.0 + (note.measure - 1.0) * scale, 4)
+            if isinstance(note, (HoldNote, TouchHoldNote, SlideNote)):
+                note.duration = round(note.duration * scale, 4)
+            if isinstance(note, SlideNote):
+                note.delay = round(note.delay * scale, 4)
+
+        for bpm_event in self.bpms:
+            bpm_event.bpm *= scale
+            if bpm_event.measure <= 1:
                 continue
 
-            bpm.measure = round(bpm.measure + offset, 4)
+            bpm_event.measure = round(1.0 + (bpm_event.measure - 1.0) * scale, 4)
 
         return self
 
     def measure_to_second(self, measure: float) -> float:
-        bpms = [(bpm.measure, bpm.bpm) for bpm in self.bpms]
-
-        return measure_to_second(measure, bpms)
+        return TempoMap.from_chart(self).measure_to_second(measure)
 
     def second_to_measure(self, seconds: float) -> float:
-        bpms = [(bpm.measure, bpm.bpm) for bpm in self.bpms]
-        measure = second_to_measure(seconds, bpms)
-
-        return measure
+        return TempoMap.from_chart(self).second_to_measure(seconds)
 
     def export(self, max_den: int = 1000) -> str:
-        # TODO: Rewrite this
-        measures = [event.measure for event in self.notes + self.bpms]
-
-        measures += [int(i) for i in measures]
-        measures.append(1.0)
-
-        measures = list(set(measures))
-        last_whole_measure = max([int(measure) for measure in measures])
-        measures.sort()
-
-        # whole_divisors contains divisors that fit perfectly all notes in one measure.
-        # It either contains an integer or None.
-        whole_divisors: List[Union[int, None]] = []
-        for whole_measure in range(last_whole_measure + 1):
-            note_measures = [
-                note_measure
-                for note_measure in measures
-                if int(note_measure) == whole_measure
-            ]
-            whole_divisors.append(get_measure_divisor(note_measures))
-
-        # last_measure takes into account slide and hold notes' end measure
-        last_measure = 1.0
-        # measure_tick is our time-tracking variable. Used to know what measure
-        # are we in-between rests ","
-        measure_tick = 1.0
-        # previous_divisor is used for comparing to current_divisor
-        # to know if we should add a "{}" indicator
-        previous_divisor: Optional[int] = None
-        # previous_measure_int is used for comparing to current measure.
-        # If we are in a new whole measure, add a new line and add the divisor.
-        previous_measure_int = 0
-        # Our resulting chart in text form. Assuming that string fits in memory
-        result = ""
-        for (i, current_measure) in enumerate(measures):
-            bpm = [bpm for bpm in self.bpms if bpm.measure == current_measure]
-            notes = [note for note in self.notes if note.measure == current_measure]
-
-            hold_slides = [
-                note
-                for note in notes
-                if note.note_type
-                   in [
-                       NoteType.hold,
-                       NoteType.ex_hold,
-                       NoteType.touch_hold,
-                       NoteType.complete_slide,
-                   ]
-            ]
-            for hold_slide in hold_slides:
-                # Get hold and slide end measure and compare with last_measure
-                if hold_slide.note_type == NoteType.complete_slide:
-                    last_measure = max(
-                        current_measure + hold_slide.delay + hold_slide.duration,
-                        last_measure,
-                    )
-                else:
-                    last_measure = max(
-                        current_measure + hold_slide.duration, last_measure
-                    )
+        return "".join(
+            export_fragments(self.export_points(), self.get_bpm, max_den=max_den)
+        )
 
-            whole_divisor = whole_divisors[int(current_measure)]
-
-            if i == len(measures) - 1:
-                # We are at the end so let's check if there are any
-                # active holds or slides
-                if last_measure > current_measure:
-                    (whole, current_divisor, rest_amount) = get_rest(
-                        current_measure,
-                        last_measure,
-                        current_divisor=(
-                            previous_divisor if whole_divisor is None else whole_divisor
-                        ),
-                        max_den=max_den,
-                    )
+    def export_points(self) -> List[Tuple[float, List[SimaiNote], List[BPM]]]:
+        """Groups the chart's notes and BPM events by measure for
+        `export_fragments`.
 
-                else:
-                    # Nothing to do
-                    current_divisor = (
-                        previous_divisor if whole_divisor is None else whole_divisor
-                    )
-                    whole, rest_amount = 0, 0
+        Returns:
+            A list of points in increasing measure. Points are the measures
+            of notes and BPM events, the whole measures they are in, and
+            measure 1. Each has its notes and BPM events in chart order.
+        """
+        notes: Dict[float, List[SimaiNote]] = {}
+        for note in self.notes:
+            notes.setdefault(note.measure, []).append(note)
+
+        bpms: Dict[float, List[BPM]] = {}
+        for bpm in self.bpms:
+            bpms.setdefault(bpm.measure, []).append(bpm)
+
+        measures = set(notes) | set(bpms)
+        measures |= {int(measure) for measure in measures}
+        measures.add(1.0)
+
+        return [
+            (measure, notes.get(measure, []), bpms.get(measure, []))
+            for measure in sorted(measures)
+        ]
+
+
+def export_fragments(
+        points: Iterable[Tuple[float, List[SimaiNote], List[BPM]]],
+        get_bpm: Callable[[float], float],
+        max_den: int = 1000,
+) -> Iterator[str]:
+    """Writes the text of a simai chart one measure at a time.
+
+    Only the points of the current whole measure and the two points after
+    the current one are held, so points can be read from a stream.
+
+    Args:
+        points: Measures of the chart in increasing order, with the notes
+            and BPM events at each. Whole measures that have a note or BPM
+            event, and measure 1, are included even when empty. See
+            `SimaiChart.export_points`.
+        get_bpm: Returns the chart's BPM at a measure.
+        max_den: The maximum denominator when making a fraction.
+
+    Yields:
+        Parts of the chart's text. Joined, they are the same as
+        `SimaiChart.export`.
+    """
+    points = iter(points)
+    # Points read but not written yet
+    window: Deque[Tuple[float, List[SimaiNote], List[BPM]]] = deque()
+    exhausted = False
+
+    # divisor that fits perfectly all notes in the current whole measure.
+    # It either contains an integer or None.
+    whole_measure: Optional[int] = None
+    whole_divisor: Optional[int] = None
+    # last_measure takes into account slide and hold notes' end measure
+    last_measure = 1.0
+    # measure_tick is our time-tracking variable. Used to know what measure
+    # are we in-between rests ","
+    measure_tick = 1.0
+    # previous_divisor is used for comparing to current_divisor
+    # to know if we should add a "{}" indicator
+    previous_divisor: Optional[int] = None
+    # previous_measure_int is used for comparing to current measure.
+    # If we are in a new whole measure, add a new line and add the divisor.
+    previous_measure_int = 0
+    while True:
+        # Read every point of the current whole measure, and the two
+        # points after the current one
+        while not exhausted and (
+                len(window) < 3 or int(window[-1][0]) <= int(window[0][0])
+        ):
+            point = next(points, None)
+            if point is None:
+                exhausted = True
             else:
-                # Why doesn't Python have a safe list 'get' method
-                next_measure: Optional[float] = (
-                    measures[i + 1] if i + 1 < len(measures) else None
+                window.append(point)
+
+        if len(window) == 0:
+            break
+
+        current_measure, notes, bpm = window.popleft()
+        if int(current_measure) != whole_measure:
+            whole_measure = int(current_measure)
+            whole_divisor = get_measure_divisor(
+                [current_measure]
+                + [measure for measure, _, _ in window if int(measure) == whole_measure]
+            )
+
+        result = ""
+        hold_slides = [
+            note
+            for note in notes
+            if note.note_type
+               in [
+                   NoteType.hold,
+                   NoteType.ex_hold,
+                   NoteType.touch_hold,
+                   NoteType.complete_slide,
+               ]
+        ]
+        for hold_slide in hold_slides:
+            # Get hold and slide end measure and compare with last_measure
+            if hold_slide.note_type == NoteType.complete_slide:
+                last_measure = max(
+                    current_measure + hold_slide.delay + hold_slide.duration,
+                    last_measure,
                 )
-                after_next_measure: Optional[float] = (
-                    measures[i + 2] if i + 2 < len(measures) else None
+            else:
+                last_measure = max(
+                    current_measure + hold_slide.duration, last_measure
                 )
+
+        if len(window) == 0:
+            # We are at the end so let's check if there are any
+            # active holds or slides
+            if last_measure > current_measure:
                 (whole, current_divisor, rest_amount) = get_rest(
                     current_measure,
-                    next_measure,
-                    after_next_measure=after_next_measure,
+                    last_measure,
                     current_divisor=(
                         previous_divisor if whole_divisor is None else whole_divisor
                     ),
                     max_den=max_den,
                 )
 
-            if (
-                    previous_divisor != current_divisor
-                    or int(measure_tick) > previous_measure_int
-            ):
-                result += "\n"
-                result += convert_to_fragment(
-                    notes + bpm,
-                    self.get_bpm(current_measure + 1),
-                    current_divisor,
-                    max_den=max_den,
-                )
-                previous_divisor = current_divisor
-                previous_measure_int = int(measure_tick)
             else:
-                result += convert_to_fragment(
-                    notes + bpm, self.get_bpm(current_measure + 1), max_den=max_den
+                # Nothing to do
+                current_divisor = (
+                    previous_divisor if whole_divisor is None else whole_divisor
                 )
+                whole, rest_amount = 0, 0
+        else:
+            next_measure = window[0][0]
+            after_next_measure: Optional[float] = (
+                window[1][0] if len(window) > 1 else None
+            )
+            (whole, current_divisor, rest_amount) = get_rest(
+                current_measure,
+                next_measure,
+                after_next_measure=after_next_measure,
+                current_divisor=(
+                    previous_divisor if whole_divisor is None else whole_divisor
+                ),
+                max_den=max_den,
+            )
+
+        if (
+                previous_divisor != current_divisor
+                or int(measure_tick) > previous_measure_int
+        ):
+            result += "\n"
+            result += convert_to_fragment(
+                notes + bpm,
+                get_bpm(current_measure + 1),
+                current_divisor,
+                max_den=max_den,
+            )
+            previous_divisor = current_divisor
+            previous_measure_int = int(measure_tick)
+        else:
+            result += convert_to_fragment(
+                notes + bpm, get_bpm(current_measure + 1), max_den=max_den
+            )
 
-            measure_tick = current_measure
+        measure_tick = current_measure
 
-            for _ in range(rest_amount):
-                result += ","
-                measure_tick += 1 / current_divisor
+        for _ in range(rest_amount):
+            result += ","
+            measure_tick += 1 / current_divisor
 
-            if whole > 0:
-                if current_divisor != 1:
-                    result += "{1}"
-                    previous_divisor = 1
+        if whole > 0:
+            if current_divisor != 1:
+                result += "{1}"
+                previous_divisor = 1
 
-                for _ in range(whole):
-                    result += ","
-                    measure_tick += 1
+            for _ in range(whole):
+                result += ","
+                measure_tick += 1
 
-            measure_tick = round(measure_tick * 10000) / 10000
+        measure_tick = round(measure_tick * 10000) / 10000
+        yield result
 
-        result += ",\nE\n"
-        return result
+    yield ",\nE\n"
 
 
 def parse_file_str(
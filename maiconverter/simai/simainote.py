@@ -1,4 +1,5 @@
-from typing import Optional, Tuple
+from types import SimpleNamespace
+from typing import Optional, Tuple, Dict
 
 from ..event import Event, EventType, SimaiNote, NoteType
 from ..tool import slide_distance, slide_is_cw
@@ -198,10 +199,19 @@ def slide_to_pattern_str(slide_note: SlideNote) -> str:
 
 def pattern_from_int(
         pattern: int, start_position: int, end_position: int
+) -> Tuple[str, Optional[int]]:
+    result = _patterns_from_int.get((pattern, start_position, end_position))
+    if result is not None:
+        return result
+
+    return _pattern_from_int(pattern, start_position, end_position)
+
+
+def _pattern_from_int(
+        pattern: int, start_position: int, end_position: int
 ) -> Tuple[str, Optional[int]]:
     top_list = [0, 1, 6, 7]
-    inv_slide_dict = {v: k for k, v in slide_dict.items()}
-    dict_result = inv_slide_dict.get(pattern)
+    dict_result = _inv_slide_dict.get(pattern)
     if dict_result is not None:
         return dict_result, None
     if pattern in [2, 3]:
@@ -293,6 +303,25 @@ class illegal_v_slide_exception(Exception):
 
 
 def pattern_to_int(slide_note: SlideNote) -> int:
+    pattern = slide_note.pattern
+    dict_result = slide_dict.get(pattern)
+    if dict_result is not None:
+        return dict_result
+
+    # V slides are decided by their reflect position instead of end position
+    if pattern == "V":
+        key = (pattern, slide_note.position, slide_note.reflect_position)
+    else:
+        key = (pattern, slide_note.position, slide_note.end_position)
+
+    result = _patterns_to_int.get(key)
+    if result is not None:
+        return result
+
+    return _pattern_to_int(slide_note)
+
+
+def _pattern_to_int(slide_note: SlideNote) -> int:
     pattern = slide_note.pattern
     top_list = [0, 1, 6, 7]
 
@@ -332,3 +361,38 @@ def pattern_to_int(slide_note: SlideNote) -> int:
             return 11
     else:
         raise ValueError(f"Unknown slide pattern {pattern}")
+
+
+def _build_patterns_to_int() -> Dict[Tuple[str, int, int], int]:
+    patterns: Dict[Tuple[str, int, int], int] = {}
+    for pattern in ["^", ">", "<", "V"]:
+        for start in range(8):
+            for other in range(8):
+                slide_note = SimpleNamespace(
+                    pattern=pattern,
+                    position=start,
+                    end_position=other,
+                    reflect_position=other,
+                )
+                try:
+                    patterns[(pattern, start, other)] = _pattern_to_int(slide_note)
+                except (ValueError, illegal_v_slide_exception):
+                    # Left out so pattern_to_int raises the same error
+                    continue
+
+    return patterns
+
+
+_inv_slide_dict = {v: k for k, v in slide_dict.items()}
+
+# Simai pattern and reflect position of every (ma2/sxt pattern, start, end)
+_patterns_from_int: Dict[Tuple[int, int, int], Tuple[str, Optional[int]]] = {
+    (pattern, start, end): _pattern_from_int(pattern, start, end)
+    for pattern in range(1, 14)
+    for start in range(8)
+    for end in range(8)
+}
+
+# Ma2/sxt pattern of every (simai pattern, start, end) for the simai patterns
+# that depend on positions. V slides use their reflect position as end.
+_patterns_to_int = _build_patterns_to_int()
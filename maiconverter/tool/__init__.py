@@ -1,2 +1,12 @@
 from .time import measure_to_second, second_to_measure, offset_arg_to_measure, quantise
 from .slide import slide_distance, slide_is_cw
+from .tempo import (
+    TempoMap,
+    conform_tempo,
+    retime_notes,
+    resolve_offset,
+    apply_offset,
+    offset_charts,
+)
+from .simultaneous import SimultaneousIndex
+from .writer import write_lines
@@ -0,0 +1,103 @@
+import math
+from typing import Any, Dict, Iterable, Iterator, List
+
+
+class SimultaneousIndex:
+    """An index of notes grouped by the time they happen.
+
+    Notes are kept in buckets by the multiple of the tolerance their
+    measure snaps to. Building the index is a single pass over the notes.
+    Notes within the tolerance of each other are simultaneous, even when
+    they snap to neighbouring buckets, so lookups check the buckets next
+    to a measure too.
+
+    Attributes:
+        tolerance: Measures closer than this are grouped together.
+
+    Examples:
+        Count the groups of simultaneous tap and hold notes in a chart.
+
+        >>> index = SimultaneousIndex(
+        ...     note for note in ma2.notes if isinstance(note, (TapNote, HoldNote))
+        ... )
+        >>> index.count_simultaneous()
+    """
+
+    def __init__(self, notes: Iterable[Any] = (), tolerance: float = 0.0001) -> None:
+        self.tolerance = tolerance
+        self._groups: Dict[int, List[Any]] = {}
+        for note in notes:
+            self.add(note)
+
+    def _key(self, measure: float) -> int:
+        return round(measure / self.tolerance)
+
+    def add(self, note: Any) -> None:
+        """Adds a note to the group of its measure."""
+        self._groups.setdefault(self._key(note.measure), []).append(note)
+
+    def remove(self, note: Any) -> None:
+        """Removes a note from the index. The note must be the same object
+        that was added.
+
+        Raises:
+            ValueError: When the note is not in the index.
+        """
+        key = self._key(note.measure)
+        group = self._groups.get(key, [])
+        for i, other in enumerate(group):
+            if other is note:
+                del group[i]
+                break
+        else:
+            raise ValueError(f"Note is not in the index: {note}")
+
+        if len(group) == 0:
+            del self._groups[key]
+
+    def _near(self, measure: float) -> Iterator[Any]:
+        # Notes within the tolerance of the measure, from its group and the
+        # groups next to it, in measure order
+        key = self._key(measure)
+        for near_key in (key - 1, key, key + 1):
+            for note in self._groups.get(near_key, ()):
+                if math.isclose(note.measure, measure, abs_tol=self.tolerance):
+                    yield note
+
+    def at(self, measure: float) -> List[Any]:
+        """Returns the notes that happen within the tolerance of given measure."""
+        return list(self._near(measure))
+
+    def count_at(self, measure: float) -> int:
+        """Returns the number of notes that happen within the tolerance of
+        given measure."""
+        return sum(1 for _ in self._near(measure))
+
+    def groups(self) -> List[List[Any]]:
+        """Returns every group of simultaneous notes, ordered by measure.
+        Neighbouring buckets with notes within the tolerance of each other
+        are one group."""
+        result: List[List[Any]] = []
+        previous_key = None
+        for key in sorted(self._groups):
+            bucket = sorted(self._groups[key], key=lambda note: note.measure)
+            if (
+                previous_key == key - 1
+                and math.isclose(
+                    bucket[0].measure, result[-1][-1].measure, abs_tol=self.tolerance
+                )
+            ):
+                result[-1].extend(bucket)
+            else:
+                result.append(bucket)
+
+            previous_key = key
+
+        return result
+
+    def count_simultaneous(self, min_size: int = 2) -> int:
+        """Returns the number of groups with at least min_size notes."""
+        return sum(1 for group in self.groups() if len(group) >= min_size)
+
+    def __len__(self) -> int:
+        return len(self.groups())
@@ -0,0 +1,329 @@
+import bisect
+import copy
+import functools
+import math
+from typing import List, Tuple, Sequence, Iterable, Optional, Union, Any
+
+from .time import _check_bpms, quantise, offset_arg_to_measure
+
+
+class TempoMap:
+    """A precomputed mapping between measures and seconds for a list of
+    (measure, bpm) tempo events.
+
+    Follows the same conventions as `measure_to_second` and `second_to_measure`,
+    but sorts and accumulates the tempo events once so every lookup is a binary
+    search instead of a walk over the whole BPM list.
+
+    Attributes:
+        bpms: Sorted tuple of (measure, bpm) pairs the map was built from.
+        include_metronome_ticks: Whether the first measure is counted as
+            metronome ticks.
+    """
+
+    def __init__(
+        self,
+        bpms: Sequence[Tuple[float, float]],
+        include_metronome_ticks: bool = True,
+    ) -> None:
+        bpms = sorted(bpms, key=lambda x: x[0])
+        _check_bpms(bpms)
+
+        self.bpms = tuple(bpms)
+        self.include_metronome_ticks = include_metronome_ticks
+
+        self._starting_bpm = bpms[0][1]
+        if include_metronome_ticks:
+            self._starting_time = 60 * 4 * 1 / self._starting_bpm
+        else:
+            self._starting_time = 0.0
+
+        # Tempo changes after the first measure, with the time they happen
+        self._measures: List[float] = []
+        self._times: List[float] = []
+        self._tempos: List[float] = []
+
+        previous_measure = 1.0
+        previous_bpm = self._starting_bpm
+        previous_time = self._starting_time
+        for current_measure, current_bpm in bpms:
+            if 0.0 <= current_measure < 1.0:
+                continue
+
+            gap_measure = current_measure - previous_measure
+            current_time = previous_time + 60 * 4 * gap_measure / previous_bpm
+
+            self._measures.append(current_measure)
+            self._times.append(current_time)
+            self._tempos.append(current_bpm)
+
+            previous_measure = current_measure
+            previous_bpm = current_bpm
+            previous_time = current_time
+
+        self._bpm_measures = [x[0] for x in bpms]
+        self._bpm_values = [x[1] for x in bpms]
+
+    @classmethod
+    def from_chart(cls, chart: Any, include_metronome_ticks: bool = True) -> "TempoMap":
+        """Returns the tempo map of a chart object. Accepts any chart with a `bpms`
+        list of BPM events (MaiMa2, SimaiChart) or a single `bpm` (MaiSxt).
+
+        Tempo maps are cached by their BPM events, so charts of the same song
+        share one tempo map and repeated calls don't rebuild it.
+        """
+        if hasattr(chart, "bpms"):
+            bpms = tuple(sorted((bpm.measure, bpm.bpm) for bpm in chart.bpms))
+        else:
+            bpms = ((0.0, chart.bpm),)
+
+        return _cached_tempo_map(cls, bpms, include_metronome_ticks)
+
+    def _segment(self, index: int) -> Tuple[float, float, float]:
+        if index < 0:
+            return 1.0, self._starting_time, self._starting_bpm
+
+        return self._measures[index], self._times[index], self._tempos[index]
+
+    def measure_to_second(self, measure: float) -> float:
+        if measure < 0.0:
+            return 60 * 4 * measure / self._starting_bpm
+
+        i = bisect.bisect_left(self._measures, measure - 0.0005)
+        if i < len(self._measures) and math.isclose(
+            self._measures[i], measure, abs_tol=0.0005
+        ):
+            return self._times[i]
+
+        previous_measure, previous_time, previous_bpm = self._segment(i - 1)
+        return previous_time + 60 * 4 * (measure - previous_measure) / previous_bpm
+
+    def second_to_measure(self, seconds: float) -> float:
+        if seconds < 0.0:
+            return seconds * self._starting_bpm / (60 * 4)
+
+        if self.include_metronome_ticks and (
+            seconds < self._starting_time
+            or math.isclose(seconds, self._starting_time, abs_tol=0.0001)
+        ):
+            return seconds / self._starting_time
+
+        i = bisect.bisect_left(self._times, seconds - 0.0005)
+        if i < len(self._times) and math.isclose(
+            self._times[i], seconds, abs_tol=0.0005
+        ):
+            return self._measures[i]
+
+        previous_measure, previous_time, previous_bpm = self._segment(i - 1)
+        return previous_measure + (seconds - previous_time) * previous_bpm / (60 * 4)
+
+    def get_bpm(self, measure: float) -> float:
+        """Gets the bpm at given measure. Same semantics as the charts' get_bpm."""
+        i = bisect.bisect_left(self._bpm_measures, measure - 0.0001)
+        if i < len(self._bpm_measures) and math.isclose(
+            self._bpm_measures[i], measure, abs_tol=0.0001
+        ):
+            return self._bpm_values[i]
+
+        return self._bpm_values[max(i - 1, 0)]
+
+    def measures_to_seconds(self, measures: Iterable[float]) -> List[float]:
+        return [self.measure_to_second(measure) for measure in measures]
+
+    def seconds_to_measures(self, seconds: Iterable[float]) -> List[float]:
+        return [self.second_to_measure(second) for second in seconds]
+
+    def get_bpms(self, measures: Iterable[float]) -> List[float]:
+        return [self.get_bpm(measure) for measure in measures]
+
+
+@functools.lru_cache(maxsize=128)
+def _cached_tempo_map(
+    cls, bpms: Tuple[Tuple[float, float], ...], include_metronome_ticks: bool
+) -> TempoMap:
+    return cls(bpms, include_metronome_ticks)
+
+
+def resolve_offset(offset: Union[float, str], chart: Any) -> float:
+    """Converts an offset argument to measures using a chart's tempo map.
+    The tempo map is only looked up for offsets given in seconds.
+
+    Args:
+        offset: Offset in measures, as a fraction ("1/4"), or in seconds ("1.5s").
+        chart: The chart, or a TempoMap, the offset is relative to.
+    """
+    def sec_to_measure(seconds: float) -> float:
+        tempo_map = chart if isinstance(chart, TempoMap) else TempoMap.from_chart(chart)
+        return tempo_map.second_to_measure(seconds)
+
+    return offset_arg_to_measure(offset, sec_to_measure)
+
+
+def apply_offset(chart: Any, offset: float) -> None:
+    """Shifts a chart's notes, and BPM and meter events if the chart has them,
+    by an offset in measures. Starting BPM and meter events are kept in place.
+    Measures are rounded to 4 decimal places.
+    """
+    for note in chart.notes:
+        _shift_note(note, offset)
+
+    for events in (getattr(chart, "bpms", ()), getattr(chart, "meters", ())):
+        for event in events:
+            if 0 <= event.measure <= 1:
+                continue
+
+            event.measure = round(event.measure + offset, 4)
+
+    _notes_changed(chart)
+
+
+def _shift_note(note: Any, offset: float) -> None:
+    # Notes that keep their file's integer ticks (MaiMa2 notes read with
+    # native_ticks) are moved by whole ticks when the offset allows it
+    has_native_ticks = getattr(note, "has_native_ticks", None)
+    if has_native_ticks is not None and has_native_ticks():
+        note.shift_native_ticks(offset)
+        if note.has_native_ticks():
+            return
+
+    note.measure = round(note.measure + offset, 4)
+
+
+def _notes_changed(chart: Any) -> None:
+    # Charts that keep state derived from note measures (MaiMa2's statistics
+    # and sorted flag) are told that notes were moved
+    notes_changed = getattr(chart, "notes_changed", None)
+    if notes_changed is not None:
+        notes_changed()
+
+
+def offset_charts(charts: Sequence[Any], offset: Union[float, str]) -> Sequence[Any]:
+    """Applies the same offset to several charts of one song. The offset is
+    resolved once with the first chart's tempo map.
+
+    Examples:
+        Delay every difficulty of a song by 1.5 seconds.
+
+        >>> offset_charts([chart for _, chart in charts], "1.5s")
+    """
+    if len(charts) == 0:
+        return charts
+
+    measure_offset = resolve_offset(offset, charts[0])
+    for chart in charts:
+        apply_offset(chart, measure_offset)
+
+    return charts
+
+
+def _shallow_copy_chart(chart: Any) -> Any:
+    # Containers, and other attributes with a copy method such as note
+    # statistics, are copied so the result can be modified without touching
+    # the original chart. Notes are copied, but their attributes are shared.
+    result = copy.copy(chart)
+    for name, value in vars(chart).items():
+        if hasattr(value, "copy"):
+            setattr(result, name, value.copy())
+
+    result.notes = [copy.copy(note) for note in chart.notes]
+    return result
+
+
+def retime_notes(
+    notes: Sequence[Any],
+    source: TempoMap,
+    target: TempoMap,
+    grid: Optional[int] = None,
+) -> None:
+    """Rewrites notes written in one tempo map in another, in place.
+
+    Every note keeps its timing in seconds. Note measures are converted through
+    both tempo maps in a single pass, and durations and delays are scaled by
+    the ratio between the new and old BPM at the note's start.
+
+    Note:
+        Charts that index their notes by measure have to be told the notes
+        moved, e.g. with MaiMa2's or MaiSxt's `notes_changed`.
+
+    Args:
+        notes: Notes to rewrite.
+        source: The tempo map the notes are written in.
+        target: The tempo map the notes are rewritten in.
+        grid: Optional quantisation grid applied to the resulting measures,
+            durations, and delays. E.g. 16 for 1/16 notes.
+
+    Examples:
+        Write converted SDT notes, still in a simai chart's measures, in the
+        SDT's single BPM.
+
+        >>> retime_notes(sdt.notes, TempoMap.from_chart(simai), TempoMap.from_chart(sdt))
+        >>> sdt.notes_changed()
+    """
+    measures = [note.measure for note in notes]
+    new_measures = target.seconds_to_measures(source.measures_to_seconds(measures))
+    old_bpms = source.get_bpms(measures)
+    new_bpms = target.get_bpms(new_measures)
+
+    def _quantise(value: float) -> float:
+        return value if grid is None else quantise(value, grid)
+
+    for note, new_measure, old_bpm, new_bpm in zip(
+        notes, new_measures, old_bpms, new_bpms
+    ):
+        scale = new_bpm / old_bpm
+        note.measure = _quantise(new_measure)
+        if hasattr(note, "duration"):
+            note.duration = _quantise(scale * note.duration)
+        if hasattr(note, "delay"):
+            note.delay = _quantise(scale * note.delay)
+
+
+def conform_tempo(
+    chart: Any,
+    reference: Union[Any, TempoMap],
+    grid: Optional[int] = None,
+) -> Any:
+    """Returns a copy of a chart written in another chart's tempo map.
+
+    Every note keeps its timing in seconds. Note measures are converted through
+    both tempo maps, and durations and delays are scaled by the ratio between
+    the new and old BPM at the note's start. The original chart is left untouched.
+
+    Args:
+        chart: The chart to conform. MaiMa2, SimaiChart, or MaiSxt.
+        reference: The chart, or a prebuilt TempoMap, whose BPMs are used. Pass
+            a TempoMap when conforming many charts to the same reference.
+        grid: Optional quantisation grid applied to the resulting measures,
+            durations, and delays. E.g. 16 for 1/16 notes.
+
+    Raises:
+        ValueError: When chart is a MaiSxt and the reference has BPM changes.
+
+    Examples:
+        Write an SDT-derived ma2 in the BPMs of an official chart.
+
+        >>> official = MaiMa2.open("000404_02.ma2")
+        >>> conformed = conform_tempo(sdt_to_ma2(sdt), official, grid=16)
+    """
+    source_map = TempoMap.from_chart(chart)
+    if isinstance(reference, TempoMap):
+        target_map = reference
+    else:
+        target_map = TempoMap.from_chart(reference)
+
+    if not hasattr(chart, "bpms") and len(target_map.bpms) != 1:
+        raise ValueError("Chart only supports a single BPM")
+
+    result = _shallow_copy_chart(chart)
+
+    retime_notes(result.notes, source_map, target_map, grid=grid)
+    _notes_changed(result)
+
+    if hasattr(result, "bpms"):
+        result.bpms = []
+        for measure, bpm in target_map.bpms:
+            result.set_bpm(measure, bpm)
+    else:
+        result.bpm = target_map.bpms[0][1]
+
+    return result
@@ -0,0 +1,27 @@
+import itertools
+from typing import Iterable, TextIO
+
+# Number of lines joined into a single write
+EXPORT_CHUNK_SIZE = 1024
+
+
+def write_lines(
+    fp: TextIO, lines: Iterable[str], chunk_size: int = EXPORT_CHUNK_SIZE
+) -> None:
+    """Writes lines separated by new lines to a file object, chunk_size
+    lines at a time. No new line is written after the last line.
+
+    Args:
+        fp: A text file object to write to.
+        lines: Lines to write, without new lines.
+        chunk_size: Number of lines joined into a single write.
+    """
+    separator = ""
+    lines = iter(lines)
+    while True:
+        chunk = list(itertools.islice(lines, chunk_size))
+        if len(chunk) == 0:
+            return
+
+        fp.write(separator + "\n".join(chunk))
+        separator = "\n"
@@ -0,0 +1,62 @@
+import argparse
+import os
+import random
+import tempfile
+import timeit
+
+from maiconverter.maima2 import MaiMa2
+
+
+def generate_ma2(lines: int, seed: int = 0) -> MaiMa2:
+    rng = random.Random(seed)
+    ma2 = MaiMa2()
+    ma2.set_bpm(0.0, 150)
+    ma2.set_meter(0.0, 4, 4)
+    for i in range(lines):
+        measure = 1 + i / 16
+        kind = rng.randrange(5)
+        if kind == 0:
+            ma2.add_tap(measure, rng.randrange(8), is_break=rng.random() < 0.1)
+        elif kind == 1:
+            ma2.add_tap(measure, rng.randrange(8), is_star=True, is_ex=rng.random() < 0.1)
+        elif kind == 2:
+            ma2.add_hold(measure, rng.randrange(8), rng.randint(1, 16) / 16)
+        elif kind == 3:
+            start = rng.randrange(8)
+            ma2.add_slide(measure, start, (start + 4) % 8, rng.randint(1, 16) / 16, 1)
+        else:
+            ma2.add_touch_tap(measure, rng.randrange(8), "B")
+
+    return ma2
+
+
+def main():
+    parser = argparse.ArgumentParser("ma2 parse throughput")
+    parser.add_argument("--lines", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--resolution", type=int, default=384)
+    parser.add_argument("--mmap", action="store_true", help="Memory map the file")
+
+    args = parser.parse_args()
+
+    text = generate_ma2(args.lines).export(resolution=args.resolution)
+    total_lines = len(text.splitlines())
+    with tempfile.NamedTemporaryFile("w", suffix=".ma2", delete=False) as out:
+        out.write(text)
+
+    try:
+        best = min(
+            timeit.repeat(
+                lambda: MaiMa2.open(out.name, use_mmap=args.mmap),
+                number=1,
+                repeat=args.repeat,
+            )
+        )
+    finally:
+        os.remove(out.name)
+
+    print(f"{total_lines} lines parsed in {best:.4f}s ({total_lines / best:.0f} lines/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import argparse
+import random
+import timeit
+
+from maiconverter.converter import sdt_to_ma2, sdt_to_simai
+from maiconverter.maisxt import MaiSxt
+
+
+def generate_sdt(slides: int, seed: int = 0) -> MaiSxt:
+    rng = random.Random(seed)
+    sdt = MaiSxt(150)
+    for i in range(slides):
+        measure = 1 + i / 16
+        start = rng.randrange(8)
+        sdt.add_tap(measure, start, is_star=True)
+        sdt.add_slide(measure, start, (start + 4) % 8, rng.randint(5, 16) / 16, 1)
+        if rng.random() < 0.25:
+            sdt.add_tap(measure, (start + 2) % 8)
+
+    return sdt
+
+
+def main():
+    parser = argparse.ArgumentParser("SDT conversion throughput")
+    parser.add_argument("--slides", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+
+    args = parser.parse_args()
+
+    sdt = generate_sdt(args.slides)
+    for name, convert in [("sdt_to_ma2", sdt_to_ma2), ("sdt_to_simai", sdt_to_simai)]:
+        best = min(timeit.repeat(lambda: convert(sdt), number=1, repeat=args.repeat))
+        print(
+            f"{name}: {len(sdt.notes)} notes converted in {best:.4f}s "
+            f"({len(sdt.notes) / best:.0f} notes/s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,7 @@
 import argparse
-import copy
 import os.path
 
-from maiconverter.maisxt import MaiSxt, HoldNote, SlideStartNote
+from maiconverter.maisxt import MaiSxt
 
 
 def main():
@@ -12,36 +11,12 @@ def main():
     parser.add_argument("new_bpm", type=float)
 
     args = parser.parse_args()
-    sdt = MaiSxt.open(args.input, bpm=args.new_bpm)
-    sdt.notes.sort(key=lambda x: x.measure)
-
-    scale = args.new_bpm / args.original_bpm
-
-    new_notes = []
-    previous_measure = 0.0
-    equivalent_current_measure = 0.0
-    for note in sdt.notes:
-        current_measure = note.measure
-        equivalent_current_measure += scale * (current_measure - previous_measure)
-        previous_measure = current_measure
-
-        note = copy.deepcopy(note)
-        note.measure = equivalent_current_measure
-
-        if isinstance(note, HoldNote):
-            note.duration *= scale
-        elif isinstance(note, SlideStartNote):
-            note.duration *= scale
-            note.delay *= scale
-
-        new_notes.append(note)
-
-    new_notes.sort()
-    sdt.notes = new_notes
+    sdt = MaiSxt.open(args.input, bpm=args.original_bpm)
+    sdt.rescale_bpm(args.new_bpm)
 
     filename, _ = os.path.splitext(args.input)
     with open(filename + f"_bpm{args.new_bpm}.sxt", "w", newline="\r\n") as out:
-        out.write(sdt.export())
+        sdt.export_to(out)
 
 
 if __name__ == "__main__":
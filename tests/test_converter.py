@@ -0,0 +1,251 @@
+import contextlib
+import io
+from typing import Dict, List, Tuple
+
+from maiconverter.event import NoteType
+from maiconverter.maima2 import MaiMa2
+from maiconverter.maisxt import MaiSxt
+from maiconverter.simai import SimaiChart
+from maiconverter.converter import (
+    ma2_to_sdt,
+    ma2_to_simai,
+    sdt_to_ma2,
+    sdt_to_simai,
+    simai_to_ma2,
+    simai_to_sdt,
+)
+
+TAP_TYPES = {
+    NoteType.tap,
+    NoteType.break_tap,
+    NoteType.ex_tap,
+    NoteType.ex_break_tap,
+    NoteType.star,
+    NoteType.break_star,
+    NoteType.ex_star,
+    NoteType.ex_break_star,
+}
+
+# (is_break, is_ex) of the notes at buttons 1 to 4
+FLAGS = [(False, False), (True, False), (False, True), (True, True)]
+
+
+def _every_note_ma2() -> MaiMa2:
+    ma2 = MaiMa2()
+    ma2.set_bpm(0.0, 120)
+    ma2.set_meter(0.0, 4, 4)
+    for position, (is_break, is_ex) in enumerate(FLAGS):
+        ma2.add_tap(1.0, position, is_break=is_break, is_ex=is_ex)
+        ma2.add_tap(2.0, position, is_break=is_break, is_ex=is_ex, is_star=True)
+        ma2.add_hold(3.0, position, 0.5, is_break=is_break, is_ex=is_ex)
+
+    ma2.add_slide(2.0, 0, 4, 0.5, 1)
+    ma2.add_slide(2.0, 1, 5, 0.5, 1, is_break=True)
+    ma2.add_slide(2.0, 2, 6, 0.5, 1, is_ex=True)
+    ma2.add_slide(2.5, 6, 2, 0.5, 1, delay=0.0, is_connect=True)
+    ma2.add_touch_tap(4.0, 0, "C")
+    ma2.add_touch_hold(4.5, 0, "C", 0.25, is_firework=True)
+    return ma2
+
+
+def _every_note_simai() -> SimaiChart:
+    simai = SimaiChart()
+    simai.set_bpm(1.0, 120)
+    for position, (is_break, is_ex) in enumerate(FLAGS):
+        simai.add_tap(1.0, position, is_break=is_break, is_ex=is_ex)
+        simai.add_tap(2.0, position, is_break=is_break, is_ex=is_ex, is_star=True)
+        simai.add_hold(3.0, position, 0.5, is_break=is_break, is_ex=is_ex)
+
+    simai.add_slide(2.0, 0, 4, 0.5, "-")
+    simai.add_slide(2.0, 1, 5, 0.5, "-", is_break=True)
+    simai.add_slide(2.0, 2, 6, 0.5, "-", is_ex=True)
+    simai.add_slide(2.5, 6, 2, 0.5, "-", delay=0.0, is_connect=True)
+    simai.add_touch_tap(4.0, 0, "C")
+    simai.add_touch_hold(4.5, 0, "C", 0.25, is_firework=True)
+    return simai
+
+
+def _every_note_sdt() -> MaiSxt:
+    sdt = MaiSxt(120)
+    for position, is_break in enumerate([False, True]):
+        sdt.add_tap(1.0, position, is_break=is_break)
+        sdt.add_tap(2.0, position, is_break=is_break, is_star=True)
+        sdt.add_slide(2.0, position, position + 4, 0.75, 1)
+
+    sdt.add_hold(3.0, 0, 0.5)
+    return sdt
+
+
+def _ma2_note_lines(ma2: MaiMa2) -> List[str]:
+    return [
+        line
+        for line in ma2.export().splitlines()
+        if line[:2] in ("NM", "BR", "EX", "BX", "CN")
+    ]
+
+
+# Output of the converters for a chart with every kind of note
+MA2_TO_SIMAI = [
+    "",
+    "(120){1}1/2b/3x,",
+    "{2}/1-5[2:1]/2b-6[2:1]/3x-7[2:1],7?-3[12000.00#1:50],",
+    "{1}1h[2:1]/2h[2:1]/3hx[2:1]/4h[2:1],",
+    "{2}C1,",
+    "{4}Chf[4:1],,",
+    "E",
+]
+
+MA2_TO_SDT = [
+    "1.0000, 0.0000, 0.0625,  0,   1,   0,  0,  0, 0.0000,",
+    "1.0000, 0.0000, 0.0625,  1,   3,   0,  0,  0, 0.0000,",
+    "1.0000, 0.0000, 0.0625,  2,   1,   0,  0,  0, 0.0000,",
+    "1.0000, 0.0000, 0.0625,  3,   3,   0,  0,  0, 0.0000,",
+    "2.0000, 0.0000, 0.7500,  0,   0,   1,  1,  0, 0.2500,",
+    "2.0000, 0.0000, 0.0625,  0,   4,   0,  0,  1, 0.0000,",
+    "2.0000, 0.0000, 0.7500,  1,   0,   2,  1,  0, 0.2500,",
+    "2.0000, 0.0000, 0.0625,  1,   5,   0,  0,  1, 0.0000,",
+    "2.0000, 0.0000, 0.7500,  2,   0,   3,  1,  0, 0.2500,",
+    "2.0000, 0.0000, 0.0625,  2,   4,   0,  0,  1, 0.0000,",
+    "2.0000, 0.0000, 0.0625,  3,   5,   0,  0,  0, 0.0000,",
+    "2.0000, 0.5000, 0.5000,  6,   0,   4,  1,  0, 0.0000,",
+    "2.0000, 0.7500, 0.0000,  4, 128,   1,  1,  0, 0.0000,",
+    "2.0000, 0.7500, 0.0000,  5, 128,   2,  1,  0, 0.0000,",
+    "2.0000, 0.7500, 0.0000,  6, 128,   3,  1,  0, 0.0000,",
+    "3.0000, 0.0000, 0.5000,  0,   2,   0,  0,  0, 0.0000,",
+    "3.0000, 0.0000, 0.5000,  1,   2,   0,  0,  0, 0.0000,",
+    "3.0000, 0.0000, 0.5000,  2,   2,   0,  0,  0, 0.0000,",
+    "3.0000, 0.0000, 0.0000,  2, 128,   4,  1,  0, 0.0000,",
+    "3.0000, 0.0000, 0.5000,  3,   2,   0,  0,  0, 0.0000,",
+    "4.0000, 0.0000, 0.0625,  0,   1,   0,  0,  0, 0.0000,",
+    "4.0000, 0.5000, 0.2500,  0,   2,   0,  0,  0, 0.0000,",
+]
+
+SIMAI_TO_MA2 = [
+    "NMTAP\t1\t0\t0",
+    "BRTAP\t1\t0\t1",
+    "EXTAP\t1\t0\t2",
+    "BXTAP\t1\t0\t3",
+    "NMSTR\t2\t0\t0",
+    "BRSTR\t2\t0\t1",
+    "EXSTR\t2\t0\t2",
+    "BXSTR\t2\t0\t3",
+    "NMSI_\t2\t0\t0\t96\t192\t4",
+    "BRSI_\t2\t0\t1\t96\t192\t5",
+    "NMSI_\t2\t0\t2\t96\t192\t6",
+    "CNSI_\t2\t192\t6\t0\t192\t2",
+    "NMHLD\t3\t0\t0\t192",
+    "BRHLD\t3\t0\t1\t192",
+    "EXHLD\t3\t0\t2\t192",
+    "BXHLD\t3\t0\t3\t192",
+    "NMTTP\t4\t0\t0\tC\t0\tM1",
+    "NMTHO\t4\t192\t0\t96\tC\t1\tM1",
+]
+
+SIMAI_TO_SDT = [
+    "1.0000, 0.0000, 0.0625,  0,   1,   0,  0,  0, 0.0000,",
+    "1.0000, 0.0000, 0.0625,  1,   3,   0,  0,  0, 0.0000,",
+    "1.0000, 0.0000, 0.0625,  2,   1,   0,  0,  0, 0.0000,",
+    "1.0000, 0.0000, 0.0625,  3,   3,   0,  0,  0, 0.0000,",
+    "2.0000, 0.0000, 0.7500,  0,   0,   1,  1,  0, 0.2500,",
+    "2.0000, 0.0000, 0.0625,  0,   4,   0,  0,  1, 0.0000,",
+    "2.0000, 0.0000, 0.7500,  1,   0,   2,  1,  0, 0.2500,",
+    "2.0000, 0.0000, 0.0625,  1,   5,   0,  0,  1, 0.0000,",
+    "2.0000, 0.0000, 0.7500,  2,   0,   3,  1,  0, 0.2500,",
+    "2.0000, 0.0000, 0.0625,  2,   4,   0,  0,  1, 0.0000,",
+    "2.0000, 0.0000, 0.0625,  3,   5,   0,  0,  0, 0.0000,",
+    "2.0000, 0.5000, 0.5000,  6,   0,   4,  1,  0, 0.0000,",
+    "2.0000, 0.7500, 0.0000,  4, 128,   1,  1,  0, 0.0000,",
+    "2.0000, 0.7500, 0.0000,  5, 128,   2,  1,  0, 0.0000,",
+    "2.0000, 0.7500, 0.0000,  6, 128,   3,  1,  0, 0.0000,",
+    "3.0000, 0.0000, 0.5000,  0,   2,   0,  0,  0, 0.0000,",
+    "3.0000, 0.0000, 0.5000,  1,   2,   0,  0,  0, 0.0000,",
+    "3.0000, 0.0000, 0.5000,  2,   2,   0,  0,  0, 0.0000,",
+    "3.0000, 0.0000, 0.0000,  2, 128,   4,  1,  0, 0.0000,",
+    "3.0000, 0.0000, 0.5000,  3,   2,   0,  0,  0, 0.0000,",
+    "4.0000, 0.0000, 0.0625,  0,   1,   0,  0,  0, 0.0000,",
+    "4.0000, 0.5000, 0.2500,  0,   2,   0,  0,  0, 0.0000,",
+]
+
+SDT_TO_MA2 = [
+    "NMTAP\t1\t0\t0",
+    "BRTAP\t1\t0\t1",
+    "NMSTR\t2\t0\t0",
+    "BRSTR\t2\t0\t1",
+    "NMSI_\t2\t0\t0\t96\t192\t4",
+    "NMSI_\t2\t0\t1\t96\t192\t5",
+    "NMHLD\t3\t0\t0\t192",
+]
+
+SDT_TO_SIMAI = [
+    "",
+    "(120){1},1/2b,",
+    "{1}1-5[2:1]/2b-6[2:1],",
+    "{2}1h[2:1],,",
+    "E",
+]
+
+
+def test_converters_output():
+    """Tests whether every converter writes the expected notes for a chart
+    with every kind of note."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        ma2_simai = ma2_to_simai(_every_note_ma2())
+        ma2_sdt = ma2_to_sdt(_every_note_ma2(), convert_touch=True)
+        simai_ma2 = simai_to_ma2(_every_note_simai())
+        simai_sdt = simai_to_sdt(_every_note_simai(), convert_touch=True)
+
+    assert ma2_simai.export().splitlines() == MA2_TO_SIMAI
+    assert ma2_sdt.export().splitlines() == MA2_TO_SDT
+    assert _ma2_note_lines(simai_ma2) == SIMAI_TO_MA2
+    assert simai_sdt.export().splitlines() == SIMAI_TO_SDT
+    assert _ma2_note_lines(sdt_to_ma2(_every_note_sdt())) == SDT_TO_MA2
+    assert sdt_to_simai(_every_note_sdt()).export().splitlines() == SDT_TO_SIMAI
+
+
+def _tap_types(notes) -> Dict[Tuple[float, int], NoteType]:
+    # Note type of each tap and star by measure and button
+    return {
+        (note.measure, note.position): note.note_type
+        for note in notes
+        if note.note_type in TAP_TYPES
+    }
+
+
+def test_ma2_to_simai_keeps_flags():
+    """Tests whether ex break stars and slide flags are kept in simai."""
+    simai = ma2_to_simai(_every_note_ma2())
+    assert _tap_types(simai.notes) == _tap_types(_every_note_ma2().notes)
+
+    slides = [note for note in simai.notes if note.note_type == NoteType.complete_slide]
+    assert [(note.is_break, note.is_ex, note.is_connect) for note in slides] == [
+        (False, False, False),
+        (True, False, False),
+        (False, True, False),
+        (False, False, True),
+    ]
+
+
+def test_ma2_and_simai_to_sdt_keep_flags():
+    """Tests whether break stars, ex stars, and ex break stars stay stars in
+    sdt, and ex break taps become break taps."""
+    expected = {}
+    for position in range(4):
+        is_break = position % 2 == 1
+        expected[(1.0, position)] = NoteType.break_tap if is_break else NoteType.tap
+        expected[(2.0, position)] = NoteType.break_star if is_break else NoteType.star
+
+    assert _tap_types(ma2_to_sdt(_every_note_ma2()).notes) == expected
+    assert _tap_types(simai_to_sdt(_every_note_simai()).notes) == expected
+
+
+def test_sdt_converters_keep_flags():
+    """Tests whether sdt break taps and break stars keep their flags in ma2
+    and simai."""
+    expected = {
+        (1.0, 0): NoteType.tap,
+        (1.0, 1): NoteType.break_tap,
+        (2.0, 0): NoteType.star,
+        (2.0, 1): NoteType.break_star,
+    }
+    assert _tap_types(sdt_to_ma2(_every_note_sdt()).notes) == expected
+    assert _tap_types(sdt_to_simai(_every_note_sdt()).notes) == expected
@@ -0,0 +1,449 @@
+import os
+import random
+import tempfile
+from types import SimpleNamespace
+
+import pytest
+
+from maiconverter.maima2 import Ma2Statistics, MaiMa2, TapNote, diff_ma2
+from maiconverter.maima2.ma2note import TickTable
+from maiconverter.maima2.maima2 import sort_note
+from maiconverter.tool import SimultaneousIndex, offset_charts
+
+
+def _reopen(ma2: MaiMa2, resolution: int) -> MaiMa2:
+    with tempfile.NamedTemporaryFile("w", suffix=".ma2", delete=False) as out:
+        ma2.export_to(out, resolution=resolution)
+
+    try:
+        return MaiMa2.open(out.name)
+    finally:
+        os.remove(out.name)
+
+
+def test_export_open_roundtrip():
+    """Tests whether notes written by export are read back by open."""
+    ma2 = MaiMa2()
+    ma2.set_bpm(0.0, 150)
+    ma2.set_bpm(5.0, 300)
+    ma2.set_meter(0.0, 4, 4)
+    ma2.add_tap(1.0, 0)
+    ma2.add_tap(1.25, 1, is_break=True, is_ex=True)
+    ma2.add_tap(1.5, 2, is_star=True)
+    ma2.add_hold(2.0, 3, 0.5, is_ex=True)
+    ma2.add_slide(1.5, 2, 6, 0.75, 1, is_break=True)
+    ma2.add_slide(2.5, 6, 2, 0.25, 1, delay=0.0, is_connect=True)
+    ma2.add_touch_tap(3.0, 1, "B", is_firework=True)
+    ma2.add_touch_hold(3.5, 0, "C", 1.0)
+
+    for resolution in [384, 1920]:
+        reopened = _reopen(ma2, resolution)
+        assert reopened.resolution == resolution
+        assert len(reopened.notes) == len(ma2.notes)
+        assert reopened.export(resolution=resolution) == ma2.export(resolution=resolution)
+
+
+def test_from_str_matches_parse_line():
+    """Tests whether the bulk reader reads the same chart as parse_line."""
+    text = "\n".join(
+        [
+            "VERSION\t0.00.00\t1.04.00",
+            "FES_MODE\t0",
+            "RESOLUTION\t384",
+            "",
+            "BPM\t0\t0\t150.000",
+            "MET\t0\t0\t4\t4",
+            "",
+            "TAP\t1\t0\t0",
+            "BRSTR\t1\t96\t2",
+            "NMSI_\t1\t96\t2\t96\t48\t6",
+            "CNSI_\t1\t240\t6\t0\t48\t2",
+            "XHO\t2\t0\t3\t192",
+            "NMTTP\t2\t0\t1\tB\t1",
+            "NMTHO\t2\t192\t0\t384\tC\t0\tM1",
+            "T_REC_TAP\t1",
+        ]
+    )
+
+    per_line = MaiMa2()
+    for line in text.splitlines():
+        if line:
+            per_line.parse_line(line)
+
+    bulk = MaiMa2.from_str(text)
+    assert [type(note) for note in bulk.notes] == [
+        type(note) for note in per_line.notes
+    ]
+    assert bulk.notes_stat == per_line.notes_stat
+    assert bulk.export() == per_line.export()
+
+
+def test_notes_use_resolution_at_their_line():
+    """Tests whether every reader times notes with the RESOLUTION before them."""
+    text = "\n".join(
+        [
+            "VERSION\t0.00.00\t1.04.00",
+            "RESOLUTION\t384",
+            "BPM\t0\t0\t150.000",
+            "MET\t0\t0\t4\t4",
+            "NMTAP\t1\t96\t0",
+            "NMHLD\t1\t192\t1\t96",
+            "RESOLUTION\t1920",
+            "BPM\t2\t960\t300.000",
+            "NMTAP\t3\t480\t2",
+            "NMHLD\t3\t960\t3\t480",
+        ]
+    )
+    expected = [(1.25, 0.0), (1.5, 0.25), (3.25, 0.0), (3.5, 0.25)]
+
+    def timings(notes):
+        return sorted((note.measure, getattr(note, "duration", 0.0)) for note in notes)
+
+    for native_ticks in [False, True]:
+        bulk = MaiMa2.from_str(text, native_ticks=native_ticks)
+        assert timings(bulk.notes) == expected
+        assert [bpm.measure for bpm in bulk.bpms] == [0.0, 2.5]
+
+    per_line = MaiMa2()
+    for line in text.splitlines():
+        per_line.parse_line(line)
+    assert timings(per_line.notes) == expected
+
+    assert timings(MaiMa2().iter_notes(text.splitlines())) == expected
+
+
+def test_epilog_eachpairs():
+    """Tests whether simultaneous taps, holds, and touches are counted once per measure."""
+    ma2 = MaiMa2()
+    ma2.set_bpm(0.0, 120)
+    ma2.add_tap(1.0, 0)
+    ma2.add_tap(1.0, 4)
+    ma2.add_hold(1.0, 2, 0.5)
+    ma2.add_tap(1.5, 0)
+    ma2.add_touch_tap(2.0, 0, "C")
+    ma2.add_hold(2.00004, 3, 0.25)
+    ma2.add_tap(2.5, 1, is_star=True)
+    ma2.add_slide(2.5, 1, 5, 0.5, 1)
+
+    assert "TTM_EACHPAIRS\t2\n" in ma2.get_epilog()
+
+
+def test_simultaneous_index_tolerance_at_group_edges():
+    """Tests whether lookups find notes within the tolerance across groups."""
+    # Chart notes round measures to 4 decimals, so use bare measures
+    first = SimpleNamespace(measure=1.00004)
+    second = SimpleNamespace(measure=1.00006)
+    far = SimpleNamespace(measure=1.0003)
+    index = SimultaneousIndex([first, second, far])
+
+    # 1.00004 and 1.00006 snap to different buckets
+    assert index.groups() == [[first, second], [far]]
+    assert index.count_simultaneous() == 1
+    assert index.count_at(1.00004) == 2
+    assert index.count_at(1.00006) == 2
+    assert index.at(1.00005) == [first, second]
+    assert index.at(1.0003) == [far]
+    assert index.count_at(1.00018) == 0
+
+    index.remove(second)
+    assert index.at(1.00006) == [first]
+
+    # Each pairs of ma2 statistics agree with the index
+    taps = [TapNote(1.0, 0), TapNote(1.0, 1)]
+    taps[0].measure, taps[1].measure = 1.00004, 1.00006
+    stats = Ma2Statistics(taps)
+    assert stats.eachpairs == 1
+    assert "TTM_EACHPAIRS\t1" in stats.get_epilog()
+    stats.remove(taps[1])
+    assert stats.eachpairs == 0
+
+
+def test_stats_add_del_merge():
+    """Tests whether note statistics follow added and deleted notes."""
+    ma2 = MaiMa2()
+    ma2.set_bpm(0.0, 120)
+    ma2.add_tap(1.0, 0, is_break=True, is_ex=True)
+    ma2.add_hold(1.0, 2, 0.5, is_break=True)
+    ma2.add_slide(1.0, 0, 4, 0.5, 1)
+    ma2.add_slide(1.5, 4, 0, 0.5, 1, is_break=True, is_connect=True)
+    ma2.add_tap(2.0, 3)
+    assert ma2.stats.eachpairs == 1
+
+    ma2.del_hold(1.0, 2)
+    ma2.del_slide(1.5, 4, 0)
+    assert ma2.notes_stat["BRHLD"] == 0
+    assert ma2.notes_stat["BSL"] == 0
+    assert ma2.notes_stat["SLD"] == 1
+    assert ma2.stats.eachpairs == 0
+
+    ma2.del_tap(1.0, 0)
+    assert ma2.notes_stat["BXTAP"] == 0
+    assert ma2.stats.total == 2
+
+    total = ma2.stats + ma2.stats
+    assert total["NMTAP"] == 2
+    assert ma2.notes_stat["NMTAP"] == 1
+
+
+def test_stats_merge_counts_only():
+    """Tests whether merged statistics add up counts and reject note edits."""
+    charts = []
+    for position in [0, 4]:
+        ma2 = MaiMa2()
+        ma2.set_bpm(0.0, 120)
+        ma2.add_tap(1.0, position)
+        ma2.add_tap(1.0, position + 1)
+        ma2.add_hold(2.0, position, 0.5)
+        charts.append(ma2)
+    first, second = charts
+
+    total = Ma2Statistics()
+    for ma2 in charts:
+        total.merge(ma2.stats)
+    for merged in [total, first.stats + second.stats]:
+        assert merged["NMTAP"] == 4
+        assert merged["NMHLD"] == 2
+        assert merged.eachpairs == 2
+        assert "TTM_EACHPAIRS\t2" in merged.get_epilog()
+        with pytest.raises(ValueError, match="Merged"):
+            merged.remove(second.notes[0])
+        with pytest.raises(ValueError, match="Merged"):
+            merged.add(TapNote(3.0, 0))
+        with pytest.raises(ValueError, match="Merged"):
+            merged.copy()
+
+    # The charts' own statistics still follow their notes
+    second.del_tap(1.0, 4)
+    assert second.stats.eachpairs == 0
+    assert first.stats.eachpairs == 1
+    assert (first.stats + second.stats).eachpairs == 1
+
+    total.rebuild(first.notes)
+    total.remove(first.notes[0])
+    assert total.eachpairs == 0
+
+
+def test_stats_follow_direct_note_edits():
+    """Tests whether deleting and summarizing notes edited directly work."""
+    ma2 = MaiMa2()
+    ma2.set_bpm(0.0, 120)
+    ma2.add_tap(1.0, 1)
+    ma2.add_tap(1.0, 2)
+    ma2.notes[0].measure = 2.0
+    ma2.del_tap(2.0, 1)
+    assert len(ma2.notes) == 1
+    assert ma2.stats.total == 1
+    assert ma2.stats.eachpairs == 0
+
+    ma2.notes.append(TapNote(1.0, 3))
+    epilog = ma2.get_epilog()
+    assert "T_REC_TAP\t2\n" in epilog
+    assert "TTM_EACHPAIRS\t1\n" in epilog
+
+
+def test_tick_table_and_cached_ticks():
+    """Tests whether cached note ticks follow measure and resolution changes."""
+    assert TickTable.get(384) is TickTable.get(384)
+    assert TickTable.get(384).to_measure(2, 96) == 2.25
+    assert TickTable.get(1920).to_measure(2, 480) == 2.25
+    assert TickTable.get(384).to_ma2_time(3.75) == (3, 288)
+
+    note = TapNote(1.5, 0)
+    assert note.ticks(384) == (1, 192)
+    assert note.ticks(1920) == (1, 960)
+    assert note.ticks(384) == (1, 192)
+
+    note.measure = 2.25
+    assert note.ticks(384) == (2, 96)
+    assert note.ticks(1920) == (2, 480)
+
+    notes = [TapNote(1.0, 0), TapNote(1.125, 1), note]
+    assert TickTable.get(384).note_times(notes) == [(1, 0), (1, 48), (2, 96)]
+    notes[1].measure = 1.5
+    assert TickTable.get(1920).note_times(notes) == [(1, 0), (1, 960), (2, 480)]
+
+
+def test_get_bpm_statistic():
+    """Tests the starting, mode, highest, and lowest BPM of a chart."""
+    ma2 = MaiMa2()
+    ma2.set_bpm(6.0, 90)
+    ma2.set_bpm(0.0, 150)
+    ma2.set_bpm(2.0, 240)
+    ma2.add_tap(10.0, 0)
+    order = [bpm.measure for bpm in ma2.bpms]
+
+    # 150 lasts 2 measures, 240 lasts 4, and 90 lasts 4 but comes later
+    assert ma2.get_bpm_statistic() == (150, 240, 240, 90)
+    assert [bpm.measure for bpm in ma2.bpms] == order
+
+    ma2.add_tap(12.0, 1)
+    assert ma2.get_bpm_statistic() == (150, 90, 240, 90)
+
+    empty = MaiMa2()
+    empty.set_bpm(0.0, 120)
+    empty.set_bpm(4.0, 180)
+    assert empty.get_bpm_statistic() == (120, 120, 180, 120)
+    assert "BPM_DEF\t120.000\t120.000\t180.000\t120.000" in empty.get_header(384)
+
+    with pytest.raises(ValueError, match="No BPMs defined"):
+        MaiMa2().get_bpm_statistic()
+    late = MaiMa2()
+    late.set_bpm(2.0, 120)
+    with pytest.raises(ValueError, match="No starting BPM defined"):
+        late.get_bpm_statistic()
+
+
+def test_sort_notes_consistent_with_sort_note():
+    """Tests whether the key-based note order never contradicts sort_note."""
+    rng = random.Random(0)
+    for _ in range(20):
+        ma2 = MaiMa2()
+        for _ in range(200):
+            measure = 1 + rng.randrange(16) / 4
+            kind = rng.randrange(5)
+            if kind == 0:
+                ma2.add_tap(measure, rng.randrange(8), is_star=rng.random() < 0.5)
+            elif kind == 1:
+                ma2.add_hold(measure, rng.randrange(8), 0.25)
+            elif kind == 2:
+                ma2.add_touch_tap(measure, 0, "C")
+            else:
+                ma2.add_slide(measure, 0, 4, 0.5, 1, is_connect=kind == 4)
+
+        notes = ma2.sort_notes().notes
+        for i, note in enumerate(notes):
+            for other in notes[i + 1:]:
+                assert sort_note(note, other) <= 0
+
+
+def test_export_sorts_notes_edited_in_place():
+    """Tests whether notes moved directly are written in order."""
+    ma2 = MaiMa2()
+    ma2.set_bpm(0, 120)
+    ma2.add_tap(1.5, 1)
+    ma2.add_tap(1.0, 2)
+    ma2.export()
+
+    ma2.notes[0].measure = 3.0
+    lines = [line for line in ma2.export().splitlines() if line.startswith("NMTAP")]
+    assert lines == ["NMTAP\t1\t192\t1", "NMTAP\t3\t0\t2"]
+
+
+def test_native_ticks_exact():
+    """Tests whether charts read with native ticks keep their tick timing."""
+    text = "\n".join(
+        [
+            "VERSION\t0.00.00\t1.04.00",
+            "FES_MODE\t0",
+            "RESOLUTION\t38400",
+            "BPM\t0\t0\t150.000",
+            "MET\t0\t0\t4\t4",
+            "NMTAP\t1\t1\t0",
+            "NMHLD\t1\t3\t3\t38401",
+            "NMSI_\t2\t7\t2\t9600\t11\t6",
+        ]
+    )
+    ma2 = MaiMa2.from_str(text, native_ticks=True)
+    notes = ma2.export(resolution=38400)
+    assert "NMTAP\t1\t1\t0\n" in notes
+    assert "NMHLD\t1\t3\t3\t38401\n" in notes
+    assert "NMSI_\t2\t7\t2\t9600\t11\t6\n" in notes
+
+    ma2.offset(1 / 384)
+    assert "NMTAP\t1\t101\t0\n" in ma2.export(resolution=38400)
+    offset_charts([ma2], 1 / 384)
+    assert "NMTAP\t1\t201\t0\n" in ma2.export(resolution=38400)
+
+    # Measures read without native ticks are rounded to 4 decimal places
+    assert "NMTAP\t1\t0\t0\n" in MaiMa2.from_str(text).export(resolution=38400)
+
+
+def test_extend_from_columns_matches_add_methods():
+    """Tests whether notes added from columns match notes added one at a time."""
+    single = MaiMa2()
+    single.set_bpm(0.0, 120)
+    single.add_tap(1.0, 0, is_star=True)
+    single.add_hold(1.5, 2, 0.5, is_break=True)
+    single.add_slide(1.0, 0, 4, 0.75, 1, delay=0.125)
+    single.add_touch_hold(2.0, 0, "C", 1.0, is_firework=True)
+
+    columns = MaiMa2()
+    columns.set_bpm(0.0, 120)
+    columns.extend_from_columns(
+        ["tap", "hold", "slide", "touch_hold"],
+        [1.0, 1.5, 1.0, 2.0],
+        [0, 2, 0, 0],
+        durations=[0.0, 0.5, 0.75, 1.0],
+        end_positions=[0, 0, 4, 0],
+        patterns=[0, 0, 1, 0],
+        delays=[0.25, 0.25, 0.125, 0.25],
+        is_break=[False, True, False, False],
+        is_star=[True, False, False, False],
+        is_firework=[False, False, False, True],
+    )
+    assert columns.export() == single.export()
+
+
+def test_extend_from_columns_length_mismatch():
+    """Tests whether columns of another length than kinds are rejected."""
+    ma2 = MaiMa2()
+    with pytest.raises(ValueError, match="measures"):
+        ma2.extend_from_columns(["tap", "tap"], [1.0], [0, 1])
+    with pytest.raises(ValueError, match="durations"):
+        ma2.extend_from_columns(
+            ["tap", "hold"], [1.0, 2.0], [0, 1], durations=[0.0, 0.5, 0.5]
+        )
+    assert len(ma2.notes) == 0
+
+
+def test_diff_ma2():
+    """Tests whether diff_ma2 classifies added, removed, moved, and retimed notes."""
+    old = MaiMa2()
+    old.set_bpm(0.0, 120)
+    old.set_meter(0.0, 4, 4)
+    old.add_tap(1.0, 0)
+    old.add_tap(1.25, 2)
+    old.add_hold(1.5, 3, 0.5)
+    old.add_slide(2.0, 1, 5, 0.5, 1)
+    old.add_tap(3.0, 6)
+
+    new = MaiMa2()
+    new.set_bpm(0.0, 120)
+    new.set_bpm(2.0, 150)
+    new.set_meter(0.0, 4, 4)
+    new.add_tap(1.0, 0)
+    new.add_tap(1.25, 4)
+    new.add_hold(1.5, 3, 0.75)
+    new.add_slide(2.125, 1, 5, 0.5, 1)
+    new.add_touch_tap(3.5, 0, "C")
+
+    result = diff_ma2(old, new)
+    assert [(a.position, b.position) for a, b in result.moved] == [(2, 4)]
+    assert [(a.measure, b.measure) for a, b in result.retimed] == [
+        (1.5, 1.5),
+        (2.0, 2.125),
+    ]
+    assert [note.position for note in result.removed] == [6]
+    assert [note.measure for note in result.added] == [3.5]
+    assert result.bpm_changes == [(2.0, None, 150)]
+    assert result.meter_changes == []
+    assert diff_ma2(old, old).is_empty()
+
+
+def test_diff_ma2_far_notes_not_retimed():
+    """Tests whether a removed and an added note far apart stay separate."""
+    old = MaiMa2()
+    old.set_bpm(0.0, 120)
+    old.add_tap(1.0, 0)
+    old.add_tap(2.0, 3)
+
+    new = MaiMa2()
+    new.set_bpm(0.0, 120)
+    new.add_tap(2.5, 3)
+    new.add_tap(9.0, 0)
+
+    result = diff_ma2(old, new)
+    assert [(a.measure, b.measure) for a, b in result.retimed] == [(2.0, 2.5)]
+    assert [note.measure for note in result.removed] == [1.0]
+    assert [note.measure for note in result.added] == [9.0]
+    assert len(diff_ma2(old, new, max_retime=10.0).retimed) == 2
@@ -1,5 +1,11 @@
+import io
+import random
+
+import pytest
+
 from maiconverter.maima2 import MaiMa2
-from maiconverter.converter import ma2_to_simai
+from maiconverter.converter import ma2_to_simai, stream_ma2_to_simai
+from maiconverter.converter.maima2tosimai import STREAM_CHUNK_SIZE
 
 
 def test_slide360_conversion():
@@ -44,3 +50,90 @@ def test_slide360_conversion():
     simai_ccw_360_slide = simai_ccw_360_2.notes[0]
     assert simai_ccw_360_slide.position == simai_ccw_360_slide.end_position
     assert simai_ccw_360_slide.pattern == ">"
+
+
+def test_stream_ma2_to_simai():
+    """Streaming conversion writes the same text as the chart objects."""
+    ma2 = MaiMa2()
+    ma2.set_bpm(0.0, 120)
+    ma2.set_bpm(3.5, 180)
+    ma2.add_tap(1.0, 0, is_star=True)
+    ma2.add_slide(1.0, 0, 4, 2.75, 1)
+    ma2.add_hold(2.25, 3, 1.5, is_break=True)
+    ma2.add_tap(2.5, 5, is_ex=True)
+    ma2.add_touch_hold(3.0, 0, "C", 1.0)
+    ma2.add_touch_tap(4.125, 1, "B")
+    ma2.add_tap(5 + 1 / 3, 6)
+
+    lines = io.StringIO(ma2.export()).readlines()
+    streamed = "".join(stream_ma2_to_simai(lines))
+    assert streamed == ma2_to_simai(MaiMa2.from_str(ma2.export())).export()
+
+
+def _generated_ma2(seed: int, chords: int) -> MaiMa2:
+    # Chords of three notes on a 1/16 grid, with a BPM change every few measures
+    rng = random.Random(seed)
+    ma2 = MaiMa2()
+    ma2.set_bpm(0.0, 150)
+    for measure in range(4, chords // 8, 7):
+        ma2.set_bpm(measure + rng.choice([0.0, 0.25, 0.5]), rng.choice([90, 180, 240]))
+
+    for chord in range(chords):
+        measure = 1 + chord / 8 + rng.choice([0, 1]) / 16
+        for position in rng.sample(range(8), 3):
+            kind = rng.choice(["tap", "hold", "slide", "touch_tap"])
+            if kind == "tap":
+                ma2.add_tap(measure, position, is_break=rng.random() < 0.2)
+            elif kind == "hold":
+                ma2.add_hold(measure, position, rng.choice([0.25, 0.5, 1.5]))
+            elif kind == "slide":
+                ma2.add_tap(measure, position, is_star=True)
+                ma2.add_slide(measure, position, (position + 4) % 8, 0.75, 1)
+            else:
+                ma2.add_touch_tap(measure, position, "B")
+
+    return ma2
+
+
+def _note_lines(text: str):
+    # Splits ma2 lines into header, note, and epilog lines. Note tags are
+    # the only 5 letter tags.
+    lines = text.splitlines(keepends=True)
+    indices = [i for i, line in enumerate(lines) if len(line.split("\t")[0]) == 5]
+    first, last = indices[0], indices[-1] + 1
+    return lines[:first], lines[first:last], lines[last:]
+
+
+def test_stream_ma2_to_simai_chunks():
+    """Streaming conversion over several chunks writes the same text as the
+    chart objects, with a chord split by a chunk boundary."""
+    for seed in range(3):
+        ma2 = _generated_ma2(seed, 400)
+        text = ma2.export()
+        _, notes, _ = _note_lines(text)
+        assert len(notes) > 3 * STREAM_CHUNK_SIZE
+        assert len(ma2.bpms) > 2
+        # The notes before and after the first chunk boundary are a chord
+        before, after = notes[STREAM_CHUNK_SIZE - 1], notes[STREAM_CHUNK_SIZE]
+        assert before.split("\t")[1:3] == after.split("\t")[1:3]
+
+        streamed = "".join(stream_ma2_to_simai(io.StringIO(text)))
+        assert streamed == ma2_to_simai(MaiMa2.from_str(text)).export()
+
+
+def test_stream_ma2_to_simai_notes_out_of_order():
+    header, notes, footer = _note_lines(_generated_ma2(0, 200).export())
+    # The first note is read after the first chunk
+    split = STREAM_CHUNK_SIZE + 10
+    lines = header + notes[1:split] + notes[:1] + notes[split:] + footer
+    with pytest.raises(ValueError, match="not in time order"):
+        "".join(stream_ma2_to_simai(lines))
+
+
+def test_stream_ma2_to_simai_bpm_after_notes():
+    header, notes, footer = _note_lines(_generated_ma2(0, 200).export())
+    split = STREAM_CHUNK_SIZE + 10
+    bpm = ["BPM\t90\t0\t200.000\n"]
+    lines = header + notes[:split] + bpm + notes[split:] + footer
+    with pytest.raises(ValueError, match="BPM change after notes"):
+        "".join(stream_ma2_to_simai(lines))
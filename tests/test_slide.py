@@ -0,0 +1,118 @@
+import itertools
+import re
+
+import pytest
+
+from maiconverter.maima2 import ma2note
+from maiconverter.maisxt import sxtnote
+from maiconverter.maisxt.sxtchart import SxtChartType
+from maiconverter.simai import simainote
+
+ALL_SLIDES = list(itertools.product(range(1, 14), range(8), range(8)))
+
+
+# Error message and the clockwise distances from start to end button of
+# invalid slides, by pattern. Other slides are valid.
+MA2_INVALID_SLIDES = {
+    1: (
+        "Distance between start and end position must be greater than 1 in SI_.",
+        {0, 1, 7},
+    ),
+    6: (
+        "Start and end position must be opposite of each other in SSL, SSR, or SF_.",
+        {0, 1, 2, 3, 5, 6, 7},
+    ),
+    7: (
+        "Start and end position must be opposite of each other in SSL, SSR, or SF_.",
+        {0, 1, 2, 3, 5, 6, 7},
+    ),
+    8: ("Start and end position must not be equal to each other in SV_.", {0}),
+    11: ("Clockwise distance must be between 0 and 5 in SLL.", {0, 5, 6, 7}),
+    12: ("Counter-clockwise distance must be between 0 and 5 in SLR.", {0, 1, 2, 3}),
+    13: (
+        "Start and end position must be opposite of each other in SSL, SSR, or SF_.",
+        {0, 1, 2, 3, 5, 6, 7},
+    ),
+}
+
+SXT_INVALID_SLIDES = {
+    1: (
+        "Distance between start and end position should be greater than 1 in pattern 1",
+        {0, 1, 7},
+    ),
+    6: (
+        "End position is not opposite of start position in pattern 6 or 7",
+        {0, 1, 2, 3, 5, 6, 7},
+    ),
+    7: (
+        "End position is not opposite of start position in pattern 6 or 7",
+        {0, 1, 2, 3, 5, 6, 7},
+    ),
+    11: ("CCW distance is less than 4 in pattern 11", {0, 5, 6, 7}),
+    12: ("CW distance is less than 4 in pattern 12", {0, 1, 2, 3}),
+    13: (
+        "End position is not opposite of start position in pattern 13",
+        {0, 1, 2, 3, 5, 6, 7},
+    ),
+}
+
+SRT_INVALID_SLIDES = {
+    1: SXT_INVALID_SLIDES[1],
+    2: ("SRT can only do distances of 3 places max in pattern 2", {1, 2, 3, 4}),
+    3: ("SRT can only do distances of 3 places max in pattern 3", {4, 5, 6, 7}),
+}
+
+
+def _expected_error(invalid_slides, pattern: int, start: int, end: int):
+    message, distances = invalid_slides.get(pattern, (None, set()))
+    return message if (end - start) % 8 in distances else None
+
+
+def test_ma2_check_slide_table():
+    """Tests whether ma2 check_slide raises the expected error for every slide."""
+    for pattern, start, end in ALL_SLIDES:
+        error = _expected_error(MA2_INVALID_SLIDES, pattern, start, end)
+        if error is None:
+            ma2note.check_slide(pattern, start, end)
+        else:
+            with pytest.raises(ValueError, match=re.escape(error)):
+                ma2note.check_slide(pattern, start, end)
+
+
+def test_sxt_check_slide_table():
+    """Tests whether sxt check_slide raises the expected error for every slide
+    and chart type."""
+    for chart_type in SxtChartType:
+        is_srt = chart_type is SxtChartType.SRT
+        invalid_slides = SRT_INVALID_SLIDES if is_srt else SXT_INVALID_SLIDES
+        for pattern, start, end in ALL_SLIDES:
+            if is_srt and pattern > 3:
+                error = f"Invalid pattern for SRT chart {pattern}"
+            else:
+                error = _expected_error(invalid_slides, pattern, start, end)
+
+            if error is None:
+                sxtnote.check_slide(pattern, start, end, chart_type)
+            else:
+                with pytest.raises(ValueError, match=re.escape(error)):
+                    sxtnote.check_slide(pattern, start, end, chart_type)
+
+
+def test_simai_pattern_tables():
+    """Tests whether simai pattern conversion tables match the conversion rules."""
+    for pattern, start, end in ALL_SLIDES:
+        assert simainote.pattern_from_int(
+            pattern, start, end
+        ) == simainote._pattern_from_int(pattern, start, end)
+
+        simai_pattern, reflect_position = simainote.pattern_from_int(pattern, start, end)
+        slide = simainote.SlideNote(
+            1.0, start, end, 0.25, simai_pattern, reflect_position=reflect_position
+        )
+        try:
+            expected = simainote._pattern_to_int(slide)
+        except ValueError:
+            with pytest.raises(ValueError):
+                simainote.pattern_to_int(slide)
+        else:
+            assert simainote.pattern_to_int(slide) == expected
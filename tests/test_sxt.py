@@ -0,0 +1,173 @@
+import io
+import os
+import random
+import tempfile
+
+from maiconverter.maisxt import HoldNote, MaiSxt, SlideStartNote, TapNote
+from maiconverter.maisxt.sxtnote import _slide_error
+
+
+def _random_sdt(seed: int, count: int = 300) -> MaiSxt:
+    rng = random.Random(seed)
+    sdt = MaiSxt(150)
+    for _ in range(count):
+        measure = rng.randrange(0, 2000) / 64
+        kind = rng.random()
+        if kind < 0.4:
+            sdt.add_tap(
+                measure,
+                rng.randrange(8),
+                is_break=rng.random() < 0.2,
+                is_star=rng.random() < 0.3,
+            )
+        elif kind < 0.6:
+            sdt.add_hold(measure, rng.randrange(8), rng.randrange(1, 16) / 16)
+        else:
+            while True:
+                pattern = rng.randrange(1, 14)
+                start, end = rng.randrange(8), rng.randrange(8)
+                if _slide_error(pattern, start, end, False) is None:
+                    break
+
+            sdt.add_tap(measure, start, is_star=True)
+            sdt.add_slide(measure, start, end, rng.randrange(5, 16) / 16, pattern)
+
+    return sdt
+
+
+def test_from_str_matches_parse_line():
+    """Tests whether the bulk sxt reader gives the same notes as parse_line."""
+    text = _random_sdt(0).export()
+    bulk = MaiSxt.from_str(text, 150)
+    per_line = MaiSxt(150)
+    for line in text.splitlines():
+        per_line.parse_line(line)
+
+    assert [str(note) for note in bulk.notes] == [str(note) for note in per_line.notes]
+    assert bulk.slide_count == per_line.slide_count
+
+
+def test_srt_from_str():
+    """Tests whether SRT lines are decoded into later sxt notes."""
+    text = (
+        "1.000000, 0.000000, 0.062500,  0,   0,   0,  0,\n"
+        "1.000000, 0.250000, 0.062500,  1,   4,   0,  0,\n"
+        "1.000000, 0.500000, 0.500000,  2,   2,   0,  0,\n"
+        "2.000000, 0.000000, 0.750000,  3,   0,   5,  1,\n"
+        "2.000000, 0.750000, 0.000000,  6, 128,   5,  1,\n"
+    )
+    srt = MaiSxt.from_str(text, 150, is_srt=True)
+
+    assert [str(note) for note in srt.notes] == [
+        "1.0000, 0.0000, 0.0625,  0,   1,   0,  0,  0, 0.0000,",
+        "1.0000, 0.2500, 0.0625,  1,   3,   0,  0,  0, 0.0000,",
+        "1.0000, 0.5000, 0.5000,  2,   2,   0,  0,  0, 0.0000,",
+        "2.0000, 0.0000, 0.0625,  3,   4,   0,  0,  1, 0.0000,",
+        "2.0000, 0.0000, 0.7500,  3,   0,   1,  3,  0, 0.2500,",
+        "2.0000, 0.7500, 0.0000,  6, 128,   1,  3,  0, 0.0000,",
+    ]
+
+
+def test_export_to_lines():
+    """Tests whether export_to writes the expected line for every kind of note."""
+    sdt = MaiSxt(150)
+    sdt.add_tap(1.0, 0)
+    sdt.add_tap(1.25, 1, is_break=True)
+    sdt.add_tap(1.5, 2, is_star=True)
+    sdt.add_tap(1.75, 3, is_break=True, is_star=True)
+    sdt.add_hold(2.0, 4, 0.5)
+    sdt.add_slide(1.5, 2, 6, 0.75, 1)
+    out = io.StringIO()
+    sdt.export_to(out)
+
+    assert out.getvalue().splitlines() == [
+        "1.0000, 0.0000, 0.0625,  0,   1,   0,  0,  0, 0.0000,",
+        "1.0000, 0.2500, 0.0625,  1,   3,   0,  0,  0, 0.0000,",
+        "1.0000, 0.5000, 0.7500,  2,   0,   1,  1,  0, 0.2500,",
+        "1.0000, 0.5000, 0.0625,  2,   4,   0,  0,  1, 0.0000,",
+        "1.0000, 0.7500, 0.0625,  3,   5,   0,  0,  0, 0.0000,",
+        "2.0000, 0.0000, 0.5000,  4,   2,   0,  0,  0, 0.0000,",
+        "2.0000, 0.2500, 0.0000,  6, 128,   1,  1,  0, 0.0000,",
+    ]
+    assert out.getvalue() == sdt.export()
+
+
+def test_slide_matcher_evicts_pairs():
+    """Tests whether paired start slides are evicted and dangling ones reported."""
+    text = (
+        "1.0000, 0.0000, 0.5000,  0,   0,   1,  1,  0, 0.2500,\n"
+        "1.0000, 0.0000, 0.5000,  0,   0,   2,  1,  0, 0.2500,\n"
+        "1.0000, 0.5000, 0.0000,  4, 128,   1,  1,  0, 0.0000,\n"
+        "2.0000, 0.0000, 0.5000,  2,   0,   1,  1,  0, 0.2500,\n"
+        "2.0000, 0.5000, 0.0000,  6, 128,   1,  1,  0, 0.0000,\n"
+    )
+    sdt = MaiSxt(150)
+    for line in text.splitlines():
+        sdt.parse_line(line)
+
+    assert list(sdt.start_slide_notes) == [2]
+    dangling = sdt.slide_matcher.finish()
+    assert [slide_id for slide_id, _ in dangling] == [2]
+    assert len(sdt.slide_matcher) == 0
+
+    stats = sdt.slide_matcher.stats
+    assert (stats.starts, stats.pairs, stats.dangling, stats.max_pending) == (3, 2, 1, 2)
+    assert len([note for note in sdt.notes if isinstance(note, SlideStartNote)]) == 2
+
+
+def test_star_and_slide_indexes():
+    """Tests whether slides update star amounts and are found after an offset."""
+    sdt = MaiSxt(150)
+    sdt.add_tap(1.0, 0, is_star=True)
+    sdt.add_slide(1.0, 0, 4, 0.5, 1)
+    sdt.add_slide(1.00004, 0, 3, 0.5, 1)
+    star = sdt.notes[0]
+    assert star.amount == 2
+
+    sdt.del_slide(1.0, 0, 4)
+    assert star.amount == 1
+    assert len(sdt.notes) == 3
+
+    sdt.offset(0.5)
+    sdt.del_slide(1.5, 0, 5)
+    assert star.amount == 1
+    sdt.del_slide(1.5, 0, 3)
+    assert star.amount == 0
+    assert sdt.notes == [star]
+
+
+def test_indexes_follow_direct_note_edits():
+    """Tests whether notes added or moved directly are found by the add and
+    del methods."""
+    sdt = MaiSxt(150)
+    sdt.notes.append(TapNote(1.0, 0, is_star=True))
+    sdt.add_slide(1.0, 0, 4, 0.5, 1)
+    star = sdt.notes[0]
+    assert star.amount == 1
+
+    star.measure = 2.0
+    sdt.add_slide(2.0, 0, 3, 0.5, 1)
+    assert star.amount == 2
+
+    sdt.notes.append(HoldNote(3.0, 5, 0.5))
+    sdt.add_hold(4.0, 6, 0.5)
+    sdt.notes[-1].measure = 5.0
+    sdt.del_hold(3.0, 5)
+    sdt.del_hold(5.0, 6)
+    sdt.del_tap(2.0, 0)
+    assert not any(isinstance(note, (TapNote, HoldNote)) for note in sdt.notes)
+
+
+def test_encrypted_roundtrip():
+    """Tests whether an encrypted export is read back by from_encrypted."""
+    sdt = _random_sdt(2, count=50)
+    key = "0x000102030405060708090a0b0c0d0e0f"
+    with tempfile.NamedTemporaryFile("wb", suffix=".sdb", delete=False) as out:
+        out.write(sdt.export_encrypted(key))
+
+    try:
+        decrypted = MaiSxt.from_encrypted(out.name, 150, key)
+    finally:
+        os.remove(out.name)
+
+    assert decrypted.export() == MaiSxt.from_str(sdt.export(), 150).export()
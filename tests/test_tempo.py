@@ -0,0 +1,163 @@
+import random
+
+import pytest
+
+from maiconverter.maima2 import MaiMa2
+from maiconverter.maisxt import MaiSxt
+from maiconverter.simai import SimaiChart
+from maiconverter.tool import TempoMap, conform_tempo, measure_to_second, second_to_measure
+
+
+def test_tempo_map_matches_linear_conversion():
+    """Tests whether TempoMap gives the same results as measure_to_second and second_to_measure."""
+    rng = random.Random(26)
+    bpms = [(0.0, 150.0), (4.0, 75.0), (10.5, 300.0), (12.25, 180.0)]
+    tempo_map = TempoMap(bpms)
+
+    measures = [rng.uniform(-1.0, 20.0) for _ in range(500)] + [m for m, _ in bpms]
+    for measure in measures:
+        seconds = measure_to_second(measure, list(bpms))
+        assert abs(tempo_map.measure_to_second(measure) - seconds) < 1e-9
+        assert abs(
+            tempo_map.second_to_measure(seconds) - second_to_measure(seconds, list(bpms))
+        ) < 1e-9
+
+
+def test_conform_tempo():
+    ma2 = MaiMa2()
+    ma2.set_bpm(0.0, 120)
+    ma2.add_hold(2.0, 1, 0.5)
+    ma2.add_slide(3.0, 0, 4, 0.5, 1)
+
+    reference = MaiMa2()
+    reference.set_bpm(0.0, 120)
+    reference.set_bpm(2.5, 240)
+
+    conformed = conform_tempo(ma2, reference, grid=16)
+    assert [note.measure for note in conformed.notes] == [2.0, 3.5]
+    assert [note.duration for note in conformed.notes] == [0.5, 1.0]
+    assert conformed.notes[1].delay == 0.5
+    assert [(bpm.measure, bpm.bpm) for bpm in conformed.bpms] == [(0.0, 120), (2.5, 240)]
+    # Original chart is untouched
+    assert [note.measure for note in ma2.notes] == [2.0, 3.0]
+    assert len(ma2.bpms) == 1
+
+
+def _ma2_timings(ma2):
+    result = []
+    for note in ma2.notes:
+        start = ma2.measure_to_second(note.measure)
+        timing = [start]
+        if hasattr(note, "delay"):
+            timing.append(ma2.measure_to_second(note.measure + note.delay) - start)
+            end = note.measure + note.delay + note.duration
+        else:
+            end = note.measure + getattr(note, "duration", 0.0)
+        timing.append(ma2.measure_to_second(end) - start)
+        result.append(timing)
+
+    return result
+
+
+def _bpm_timings(chart, origin=0.0):
+    start = chart.measure_to_second(origin)
+    return [
+        (chart.measure_to_second(max(bpm.measure, origin)) - start, bpm.bpm)
+        for bpm in chart.bpms
+    ]
+
+
+def _assert_close(old, new):
+    assert len(old) == len(new)
+    for old_values, new_values in zip(old, new):
+        assert all(abs(a - b) < 1e-3 for a, b in zip(old_values, new_values))
+
+
+def test_ma2_rescale_bpm_keeps_seconds():
+    ma2 = MaiMa2()
+    ma2.set_bpm(0.0, 150)
+    ma2.set_bpm(0.5, 120)
+    ma2.set_bpm(3.0, 240)
+    ma2.set_meter(0.0, 4, 4)
+    ma2.add_tap(1.25, 2)
+    ma2.add_hold(2.0, 1, 0.5)
+    ma2.add_slide(3.5, 0, 4, 0.75, 1, delay=0.25)
+
+    notes = _ma2_timings(ma2)
+    bpms = _bpm_timings(ma2)
+    ma2.rescale_bpm(75)
+
+    assert ma2.get_bpm(0.0) == 75
+    _assert_close(notes, _ma2_timings(ma2))
+    assert [bpm for _, bpm in _bpm_timings(ma2)] == [75, 60, 120]
+    _assert_close(
+        [[seconds] for seconds, _ in bpms],
+        [[seconds] for seconds, _ in _bpm_timings(ma2)],
+    )
+
+
+def test_sxt_rescale_bpm_keeps_seconds():
+    sxt = MaiSxt(150)
+    sxt.add_tap(1.25, 2)
+    sxt.add_hold(2.0, 1, 0.5)
+    sxt.add_slide(3.5, 0, 4, 1.0, 1, delay=0.25)
+
+    def timings():
+        return [
+            [
+                sxt.measure_to_second(note.measure),
+                240 * getattr(note, "delay", 0.0) / sxt.bpm,
+                240 * getattr(note, "duration", 0.0) / sxt.bpm,
+            ]
+            for note in sxt.notes
+        ]
+
+    old = timings()
+    sxt.rescale_bpm(300)
+
+    assert sxt.bpm == 300
+    _assert_close(old, timings())
+
+
+def test_simai_rescale_bpm_keeps_seconds():
+    simai = SimaiChart()
+    simai.set_bpm(1.0, 200)
+    simai.set_bpm(2.5, 100)
+    simai.add_tap(1.5, 2)
+    simai.add_hold(2.0, 1, 0.5)
+    simai.add_slide(3.0, 0, 4, 0.75, "-", delay=0.25)
+
+    def timings():
+        # Simai durations and delays follow the BPM at the start of the note
+        start = simai.measure_to_second(1.0)
+        return [
+            [
+                simai.measure_to_second(note.measure) - start,
+                240 * getattr(note, "delay", 0.0) / simai.get_bpm(note.measure),
+                240 * getattr(note, "duration", 0.0) / simai.get_bpm(note.measure),
+            ]
+            for note in simai.notes
+        ]
+
+    notes = timings()
+    bpms = _bpm_timings(simai, origin=1.0)
+    simai.rescale_bpm(100)
+
+    assert simai.get_bpm(1.0) == 100
+    _assert_close(notes, timings())
+    assert [bpm for _, bpm in _bpm_timings(simai, origin=1.0)] == [100, 50]
+    _assert_close(
+        [[seconds] for seconds, _ in bpms],
+        [[seconds] for seconds, _ in _bpm_timings(simai, origin=1.0)],
+    )
+
+
+def test_rescale_bpm_not_positive():
+    ma2 = MaiMa2()
+    ma2.set_bpm(0.0, 120)
+    simai = SimaiChart()
+    simai.set_bpm(1.0, 120)
+    for chart in (ma2, MaiSxt(120), simai):
+        for bpm in (0, -120):
+            with pytest.raises(ValueError):
+                chart.rescale_bpm(bpm)